@@ -45,6 +45,9 @@ if not os.path.exists(LOG_DIR):
 # playwright执行过程中产生的图片，视频保存的目录
 TRACING_DIR = os.path.join(OUT_DIR, "tracing")
 
+# 浏览器静态资源（js/css等）的本地缓存目录，所有浏览器上下文共享
+ASSET_CACHE_DIR = os.path.join(OUT_DIR, "asset_cache")
+
 # 第三方库目录
 LIB_DIR = os.path.join(BASE_DIR, "lib")
 
@@ -54,6 +54,29 @@ class RunConfig:
     # 当达到最大失败数，停止执行
     max_fail = "10"
 
+    # 并行worker进程数，大于1时按用例分片，每个worker进程使用独立的浏览器
+    workers = 1
+
+    # HAR录制/回放模式（off, record, replay）
+    # record：每个用例的网络请求录制到 projects/项目名/hars 下，cookie、token请求头会脱敏，但HAR仍不要提交到代码库
+    # replay：从录制的HAR返回响应，不访问服务端，也不调用登录接口；
+    #         需要登录的用例使用 .auth 中缓存的登录态，没有缓存时以未登录状态执行（token保存在localStorage中的项目需要先录制一次）
+    har = "off"
+
+
+# ------------------------------------ 登录态缓存配置 ----------------------------------------------------#
+# .auth 目录下缓存的 storage_state 有效期（秒），超过有效期或者其中的 cookie 已过期时才重新登录
+AUTH_STATE_TTL = int(os.getenv("AUTH_STATE_TTL", 3600))
+
+# ------------------------------------ 并发请求配置 ----------------------------------------------------#
+# AsyncRequestControl.run_batch 批量发送接口请求时，同时进行中的请求数上限
+API_CONCURRENCY = int(os.getenv("API_CONCURRENCY", 20))
+
+# ------------------------------------ allure附件配置 ----------------------------------------------------#
+# 每个进程写入 allure 结果目录的附件总大小预算（MB），超过后跳过低价值附件（例如元素取值），截图、视频不受影响
+ALLURE_ATTACHMENT_BUDGET_MB = int(os.getenv("ALLURE_ATTACHMENT_BUDGET_MB", 500))
+# 单个低价值附件的大小上限（KB），超过时文本附件被截断，其他附件被跳过
+ALLURE_LOW_VALUE_ATTACHMENT_KB = int(os.getenv("ALLURE_LOW_VALUE_ATTACHMENT_KB", 64))
 
 # ------------------------------------ 配置信息 ----------------------------------------------------#
 # 0表示默认不发送任何通知， 1 代表钉钉通知，2 代表企业微信通知， 3 代表邮件通知， 4 代表所有途径都发送通知
@@ -63,8 +86,10 @@ SEND_RESULT_TYPE = int(_send_result_type) if _send_result_type and _send_result_
 # 指定日志收集级别和日志文件路径
 LOG_INFO = [
     {"level": "INFO", "filename": os.path.join(LOG_DIR, "service_info.log")},
-    {"level": "TRACE", "filename": os.path.join(LOG_DIR, "service_full.log")}
+    {"level": os.getenv("LOG_FULL_LEVEL", "TRACE"), "filename": os.path.join(LOG_DIR, "service_full.log")}
 ]
+# 控制台日志级别。控制台和所有日志文件的级别都高于 DEBUG 时，调试日志中的大对象不会再被格式化，可减少每个操作的开销
+LOG_CONSOLE_LEVEL = os.getenv("LOG_CONSOLE_LEVEL", "DEBUG")
 """
 支持的日志级别：
     TRACE: 最低级别的日志级别，用于详细追踪程序的执行。
@@ -5,19 +5,26 @@
 # @Software: PyCharm
 # @Desc: 这是文件的描述信息
 
-import time
 import os
-from datetime import datetime
+import json
+import time
 from loguru import logger
 import pytest
 import allure
-from config.path_config import REPORT_DIR
 from config.global_vars import GLOBAL_VARS
 from config.settings import RunConfig
 from utils.data_utils.data_handle import data_handle
+from utils.database_utils.mysql_handle import mysql_pool
+from utils.report_utils.timing_handle import timing_collector
+from utils.report_utils.attachment_store import attachment_store
+from utils.base_utils.network_filter import NetworkFilter
+from plugins.pytest_shard import get_report_dir
+from plugins.pytest_results import results_store
+from utils.report_utils.get_results_handle import write_test_result
 
 # 本地插件注册
-pytest_plugins = ['plugins.pytest_playwright']  # noqa
+pytest_plugins = ['plugins.pytest_playwright', 'plugins.pytest_shard', 'plugins.pytest_action_profiler',
+                  'plugins.pytest_results']  # noqa
 """
 添加本地插件后需要在 pytest.ini 中禁用 pip 安装的 pytest-playwright 插件
 [pytest]
@@ -64,12 +71,45 @@ def browser_type_launch_args(browser_type_launch_args):
     }
 
 
+@pytest.fixture(scope="session")
+def browser_context_hooks(browser_context_hooks):
+    """
+    pytest-playwright 内置 fixture 覆写
+    作用域：session
+    功能：项目配置了 NETWORK_RULES 时，新建的浏览器上下文按规则中止/伪造不需要的资源请求，静态资源走本地磁盘缓存
+    """
+    rules = GLOBAL_VARS.get("network_rules")
+    if not rules:
+        yield browser_context_hooks
+        return
+    network_filter = NetworkFilter(rules)
+    yield [*browser_context_hooks, network_filter.attach]
+    network_filter.log_stats()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def close_mysql_pool():
+    """
+    作用域：session
+    功能：会话结束时关闭数据库连接池中的所有连接和SSH隧道
+    """
+    yield
+    mysql_pool.close_all()
+
+
 # ------------------------------------- START: pytest钩子函数处理---------------------------------------#
 def pytest_configure(config):
     """
     pytest 钩子函数：初始化配置
-    功能：在测试运行前，将全局变量中的 URL 设置为 pytest 的 base_url
+    功能：
+    1. 并行模式下 worker 是独立的子进程，GLOBAL_VARS、RunConfig 由 run.py 通过环境变量 UI_GLOBAL_VARS、UI_RUN_CONFIG 传递过来
+    2. 在测试运行前，将全局变量中的 URL 设置为 pytest 的 base_url
     """
+    if not GLOBAL_VARS and os.getenv("UI_GLOBAL_VARS"):
+        GLOBAL_VARS.update(json.loads(os.getenv("UI_GLOBAL_VARS")))
+    if os.getenv("UI_RUN_CONFIG"):
+        for key, value in json.loads(os.getenv("UI_RUN_CONFIG")).items():
+            setattr(RunConfig, key, value)
     config.option.base_url = GLOBAL_VARS.get("url")
 
 
@@ -113,21 +153,22 @@ def pytest_terminal_summary(terminalreporter, config):
     2. 计算成功率
     3. 将统计结果输出到日志和文件 (test_result.txt)，用于后续通知发送
     """
-    _RERUN = len([i for i in terminalreporter.stats.get('rerun', []) if i.when != 'teardown'])
+    # 用例结果由 pytest_results 插件在运行过程中逐条记录，这里直接汇总
+    summary = results_store.summary()
+    outcomes = summary["outcomes"]
+    _RERUN = summary["rerun"]
     try:
         # 获取pytest传参--reruns的值
         reruns_value = int(config.getoption("--reruns"))
         _RERUN = int(_RERUN / reruns_value)
     except Exception:
         reruns_value = "未配置--reruns参数"
-        _RERUN = len([i for i in terminalreporter.stats.get('rerun', []) if i.when != 'teardown'])
-
-    _PASSED = len([i for i in terminalreporter.stats.get('passed', []) if i.when != 'teardown'])
-    _ERROR = len([i for i in terminalreporter.stats.get('error', []) if i.when != 'teardown'])
-    _FAILED = len([i for i in terminalreporter.stats.get('failed', []) if i.when != 'teardown'])
-    _SKIPPED = len([i for i in terminalreporter.stats.get('skipped', []) if i.when != 'teardown'])
-    _XPASSED = len([i for i in terminalreporter.stats.get('xpassed', []) if i.when != 'teardown'])
-    _XFAILED = len([i for i in terminalreporter.stats.get('xfailed', []) if i.when != 'teardown'])
+    _PASSED = outcomes.get("passed", 0)
+    _ERROR = outcomes.get("error", 0)
+    _FAILED = outcomes.get("failed", 0)
+    _SKIPPED = outcomes.get("skipped", 0)
+    _XPASSED = outcomes.get("xpassed", 0)
+    _XFAILED = outcomes.get("xfailed", 0)
 
     _TOTAL = terminalreporter._numcollected
 
@@ -138,31 +179,19 @@ def pytest_terminal_summary(terminalreporter, config):
 
     _DURATION = time.time() - _start_timestamp
 
-    session_start_time = datetime.fromtimestamp(_start_timestamp)
-    _START_TIME = f"{session_start_time.year}年{session_start_time.month}月{session_start_time.day}日 " \
-                  f"{session_start_time.hour}:{session_start_time.minute}:{session_start_time.second}"
-
-    test_info = f"各位同事, 大家好:\n" \
-                f"自动化用例于 {_START_TIME}- 开始运行，运行时长：{_DURATION:.2f} s， 目前已执行完成。\n" \
-                f"--------------------------------------\n" \
-                f"#### 执行结果如下:\n" \
-                f"- 用例运行总数: {_TOTAL} 个\n" \
-                f"- 跳过用例个数（skipped）: {_SKIPPED} 个\n" \
-                f"- 实际执行用例总数: {_PASSED + _FAILED + _XPASSED + _XFAILED} 个\n" \
-                f"- 通过用例个数（passed）: {_PASSED} 个\n" \
-                f"- 失败用例个数（failed）: {_FAILED} 个\n" \
-                f"- 异常用例个数（error）: {_ERROR} 个\n" \
-                f"- 重跑的用例数(--reruns的值): {_RERUN} ({reruns_value}) 个\n"
-    try:
-        _RATE = (_PASSED + _XPASSED) / (_PASSED + _FAILED + _XPASSED + _XFAILED) * 100
-        test_result = f"- 用例成功率: {_RATE:.2f} %\n"
-        logger.success(f"{test_info}{test_result}")
-    except ZeroDivisionError:
-        test_result = "- 用例成功率: 0.00 %\n"
-        logger.critical(f"{test_info}{test_result}")
-
-    # 这里是方便在流水线里面发送测试结果到钉钉/企业微信的
-    with open(file=os.path.join(REPORT_DIR, "test_result.txt"), mode="w", encoding="utf-8") as f:
-        f.write(f"{test_info}{test_result}")
+    stats = {"start": _start_timestamp, "duration": _DURATION, "reruns_value": reruns_value, "total": _TOTAL,
+             "passed": _PASSED, "failed": _FAILED, "error": _ERROR, "skipped": _SKIPPED, "xpassed": _XPASSED,
+             "xfailed": _XFAILED, "rerun": _RERUN}
+    # 并行模式下每个 worker 写入各自的目录，由 run.py 合并统计后重新生成
+    test_result, executed = write_test_result(get_report_dir(config), stats)
+    if executed:
+        logger.success(test_result)
+    else:
+        logger.critical(test_result)
+
+    # 接口分阶段耗时汇总，与 test_result.txt 放在同一目录下
+    timing_collector.write(get_report_dir(config))
+    # allure附件去重、截断、跳过的统计
+    attachment_store.log_stats()
 
 # ------------------------------------- END: pytest钩子函数处理---------------------------------------#
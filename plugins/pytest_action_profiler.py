@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# @Version: Python 3.13
+# @Author  : 会飞的🐟
+# @File    : pytest_action_profiler.py
+# @Software: PyCharm
+# @Desc: 页面操作耗时插件：每个用例生成火焰图格式的耗时汇总，会话结束时输出最慢的元素定位和等待耗时汇总
+
+import os
+import json
+from typing import Any, Dict, List
+import allure
+import pytest
+from loguru import logger
+from utils.base_utils.action_profiler import action_profiler, folded_stacks, format_folded, format_locator_table, \
+    locator_stats
+from utils.base_utils.wait_handle import format_sleep_summary, sleep_ledger
+from plugins.pytest_shard import get_report_dir
+
+# 会话汇总文件，与 test_result.txt 放在同一目录下
+PROFILE_STATS_FILE = "action_profile.json"
+PROFILE_FOLDED_FILE = "action_profile.folded"
+SLEEP_REPORT_FILE = "sleep_report.json"
+
+# 各用例的火焰图汇总：用例nodeid -> {调用栈: 耗时ms}
+_folded_by_test: Dict[str, Dict[str, float]] = {}
+
+
+def pytest_addoption(parser: Any) -> None:
+    group = parser.getgroup("action-profile", "Action profile")
+    group.addoption(
+        "--action-profile-top",
+        default=20,
+        type=int,
+        help="Number of slowest page actions shown in the terminal summary, 0 to disable the table.",
+    )
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item: pytest.Item) -> None:
+    action_profiler.current_test = item.nodeid
+
+
+def pytest_runtest_makereport(item: pytest.Item, call: pytest.CallInfo) -> None:
+    """
+    用例的 teardown 结束后，将该用例的页面操作耗时以火焰图格式附加到allure
+    """
+    if call.when != "teardown":
+        return
+    action_profiler.current_test = None
+    records = action_profiler.pop_test_records(item.nodeid)
+    if not records:
+        return
+    folded = folded_stacks(records)
+    _folded_by_test[item.nodeid] = folded
+    allure.attach(body=format_folded(folded), name="页面操作耗时(folded stacks, ms)",
+                  attachment_type=allure.attachment_type.TEXT)
+
+
+def write_profile(report_dir: str, stats: List[dict], folded_lines: List[str]) -> None:
+    """
+    将最慢元素定位的汇总和火焰图数据写入 report_dir
+    """
+    with open(os.path.join(report_dir, PROFILE_STATS_FILE), mode="w", encoding="utf-8") as f:
+        json.dump(stats, f, ensure_ascii=False, indent=4)
+    with open(os.path.join(report_dir, PROFILE_FOLDED_FILE), mode="w", encoding="utf-8") as f:
+        f.write("\n".join(folded_lines))
+    logger.info("页面操作耗时汇总已保存至：{}", os.path.join(report_dir, PROFILE_STATS_FILE))
+
+
+def write_sleep_report(report_dir: str, summary: dict) -> None:
+    """
+    将等待台账汇总写入 report_dir
+    """
+    with open(os.path.join(report_dir, SLEEP_REPORT_FILE), mode="w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=4)
+
+
+def pytest_terminal_summary(terminalreporter: Any, config: Any) -> None:
+    """
+    输出会话中最慢的页面操作、强制等待与条件等待的耗时，并保存会话汇总
+    """
+    report_dir = get_report_dir(config)
+    sleep_summary = sleep_ledger.summary()
+    if sleep_summary["hard_sleeps"] or sleep_summary["waits"]:
+        write_sleep_report(report_dir, sleep_summary)
+        terminalreporter.write_sep("=", "sleep report")
+        for line in format_sleep_summary(sleep_summary).splitlines():
+            terminalreporter.write_line(line)
+
+    records = action_profiler.all_records()
+    if not records:
+        return
+    stats = locator_stats(records)
+    # 火焰图的根节点是用例，不属于任何用例的操作（例如session级fixture中的操作）归到 session 下
+    folded = {f"{test.replace(';', ',')};{stack}": ms
+              for test, stacks in _folded_by_test.items() for stack, ms in stacks.items()}
+    folded.update(folded_stacks([record for record in records if record.test is None], root="session"))
+    write_profile(report_dir, stats, format_folded(folded).splitlines())
+
+    top = config.getoption("--action-profile-top")
+    if top > 0:
+        terminalreporter.write_sep("=", f"slowest {top} page actions")
+        for line in format_locator_table(stats, limit=top).splitlines():
+            terminalreporter.write_line(line)
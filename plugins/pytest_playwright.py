@@ -6,11 +6,15 @@
 # @Desc: TODO: Description
 
 import hashlib
+import json
 import shutil
 import os
 import sys
 import warnings
+import weakref
+from concurrent.futures import Future
 from pathlib import Path
+from urllib.parse import urlparse
 from typing import (
     Any,
     Callable,
@@ -18,6 +22,7 @@ from typing import (
     Generator,
     List,
     Literal,
+    Set,
     Optional,
     Protocol,
     Sequence,
@@ -42,9 +47,26 @@ from playwright.sync_api import (
     ViewportSize,
 )
 from slugify import slugify
+from pytest_rerunfailures import get_reruns_count
 import tempfile
 import allure  # ---flora添加------#
 from pathvalidate import sanitize_filename  # ---flora添加------#
+from plugins.pytest_shard import get_report_dir
+from utils.report_utils.artifact_writer import ArtifactWriter
+
+# 各用例的trace大小，会话结束时写入报告目录
+TRACE_SIZES_FILE = "trace_sizes.json"
+# 录制HAR时脱敏的请求头/响应头，cookie 的值同样替换为 HAR_REDACTED
+HAR_SENSITIVE_HEADERS = {"cookie", "set-cookie", "authorization", "proxy-authorization", "token", "x-auth-token"}
+HAR_REDACTED = "***"
+_trace_sizes: List[dict] = []
+# tracing的开启参数：full 记录DOM快照、截图和源码；cheap 只记录操作、网络请求和控制台日志，开销接近不开启tracing
+_TRACE_TIERS = {
+    "full": {"screenshots": True, "snapshots": True, "sources": True},
+    "cheap": {"screenshots": False, "snapshots": False, "sources": False},
+}
+# 已开启tracing的上下文 -> 开启时的级别，池化的上下文在多个用例间复用，级别不同时需要重新开启
+_context_trace_tiers: "weakref.WeakKeyDictionary[BrowserContext, str]" = weakref.WeakKeyDictionary()
 
 
 @pytest.fixture(scope="session")
@@ -129,6 +151,44 @@ def _get_skiplist(item: Any, values: List[str], value_name: str) -> List[str]:
     return skipped_values
 
 
+def summarize_trace_sizes(records: List[dict]) -> dict:
+    """
+    按tracing级别汇总trace大小
+    """
+    tiers: Dict[str, dict] = {}
+    for record in records:
+        tier = tiers.setdefault(record["tier"], {"tests": 0, "bytes": 0, "kept_tests": 0, "kept_bytes": 0})
+        tier["tests"] += 1
+        tier["bytes"] += record["bytes"]
+        if record["kept"]:
+            tier["kept_tests"] += 1
+            tier["kept_bytes"] += record["bytes"]
+    for tier in tiers.values():
+        tier["avg_bytes"] = round(tier["bytes"] / tier["tests"])
+    return {"tiers": tiers, "tests": sorted(records, key=lambda record: -record["bytes"])}
+
+
+def write_trace_sizes(report_dir: str, summary: dict) -> None:
+    with open(os.path.join(report_dir, TRACE_SIZES_FILE), mode="w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=4)
+
+
+def pytest_terminal_summary(terminalreporter: Any, config: Any) -> None:
+    """
+    输出各级别tracing的用例数和trace大小，并将每个用例的trace大小写入报告目录
+    """
+    if not _trace_sizes:
+        return
+    summary = summarize_trace_sizes(_trace_sizes)
+    write_trace_sizes(get_report_dir(config), summary)
+    terminalreporter.write_sep("=", "trace sizes")
+    for name, tier in summary["tiers"].items():
+        terminalreporter.write_line(
+            f"{name:>5}: {tier['tests']} tests, avg {tier['avg_bytes'] / 1024:.1f}KB, "
+            f"total {tier['bytes'] / 1024:.1f}KB, kept {tier['kept_tests']} ({tier['kept_bytes'] / 1024:.1f}KB)"
+        )
+
+
 def pytest_runtest_setup(item: Any) -> None:
     if not hasattr(item, "callspec"):
         return
@@ -176,9 +236,9 @@ def _is_debugger_attached() -> bool:
 
 
 def _build_artifact_test_folder(
-        pytestconfig: Any, request: pytest.FixtureRequest, folder_or_file_name: str
+        pytestconfig: Any, request: pytest.FixtureRequest, folder_or_file_name: str, output_dir: Optional[str] = None
 ) -> str:
-    output_dir = pytestconfig.getoption("--output")
+    output_dir = output_dir or pytestconfig.getoption("--output")
     # flora添加
     new_node_id = request.node.nodeid.replace(".py", "").split("::")
     return os.path.join(
@@ -218,15 +278,27 @@ def browser_context_args(
     return context_args
 
 
+@pytest.fixture(scope="session")
+def _artifact_writer(
+        pytestconfig: Any, _pw_artifacts_folder: tempfile.TemporaryDirectory
+) -> Generator[ArtifactWriter, None, None]:
+    # 依赖 _pw_artifacts_folder，保证临时目录删除之前所有产物已经写入完成
+    workers = pytestconfig.getoption("--artifact-workers")
+    writer = ArtifactWriter(max_workers=workers, max_pending=max(workers, 1) * 8)
+    yield writer
+    writer.shutdown()
+
+
 @pytest.fixture()
 def _artifacts_recorder(
         request: pytest.FixtureRequest,
         playwright: Playwright,
         pytestconfig: Any,
         _pw_artifacts_folder: tempfile.TemporaryDirectory,
+        _artifact_writer: ArtifactWriter,
 ) -> Generator["ArtifactsRecorder", None, None]:
     artifacts_recorder = ArtifactsRecorder(
-        pytestconfig, request, playwright, _pw_artifacts_folder
+        pytestconfig, request, playwright, _pw_artifacts_folder, _artifact_writer
     )
     yield artifacts_recorder
     # If request.node is missing rep_call, then some error happened during execution
@@ -267,6 +339,182 @@ def browser(launch_browser: Callable[[], Browser]) -> Generator[Browser, None, N
     browser.close()
 
 
+@pytest.fixture(scope="session")
+def _context_pool(pytestconfig: Any, browser: Browser) -> Generator[Optional["ContextPool"], None, None]:
+    if not pytestconfig.getoption("--context-pool"):
+        yield None
+        return
+    if pytestconfig.getoption("--video") in ["on", "retain-on-failure"]:
+        # 录制视频的上下文无法复用（视频在上下文关闭时才生成），开启录制视频时池中不会有任何上下文
+        warnings.warn(
+            f"--context-pool has no effect with --video={pytestconfig.getoption('--video')}: "
+            "contexts recording video are never pooled"
+        )
+    pool = ContextPool(max_idle=pytestconfig.getoption("--context-pool-size"))
+    yield pool
+    pool.close_all()
+
+
+# 用例结束后清理当前页面所在源的 localStorage / sessionStorage / IndexedDB
+_CLEAR_STORAGE_JS = """async () => {
+    try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}
+    try {
+        if (window.indexedDB && indexedDB.databases) {
+            for (const db of await indexedDB.databases()) { indexedDB.deleteDatabase(db.name); }
+        }
+    } catch (e) {}
+}"""
+
+# 这些方法修改的状态无法通过重置撤销，用例中调用过则该上下文不再放回池中
+_DIRTYING_CONTEXT_METHODS = (
+    "route",
+    "route_from_har",
+    "route_web_socket",
+    "add_init_script",
+    "expose_binding",
+    "expose_function",
+    "set_extra_http_headers",
+    "set_geolocation",
+    "set_offline",
+    "set_default_timeout",
+    "set_default_navigation_timeout",
+)
+
+
+def _url_origin(url: str) -> Optional[str]:
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https"):
+        return None
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+def _load_storage_state(storage_state: Union[StorageState, str, Path, None]) -> Dict:
+    if not storage_state:
+        return {}
+    if isinstance(storage_state, dict):
+        return cast(Dict, storage_state)
+    with open(storage_state, mode="r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class PooledContext:
+    def __init__(self, context: BrowserContext, key: str, cookies: List[Dict]) -> None:
+        self.context = context
+        self.key = key
+        # 真正的 close 方法，context.close 会在每个用例中被包装
+        self.real_close = context.close
+        # 创建时 storage_state 中的 cookie，重置后需要重新写入
+        self.cookies = cookies
+        # 用例中访问过的源，重置时只能清理仍然打开的页面所在源的存储
+        self.origins: Set[str] = set()
+        self.dirty = False
+
+
+class ContextPool:
+    """
+    BrowserContext 池（--context-pool 开启）
+
+    用例结束后不关闭 BrowserContext，而是重置后放回池中供下一个参数相同的用例复用：
+    清理 cookie、权限、页面所在源的存储并关闭所有页面。
+    以下情况会直接关闭上下文，下个用例重新创建：
+    - 用例失败
+    - 用例中调用了 route/add_init_script/set_offline 等无法撤销的方法
+    - 访问过的源中有页面已关闭，其存储无法清理
+    - 录制视频或HAR、storage_state 中带有 localStorage 等无法复用的参数
+    """
+
+    def __init__(self, max_idle: int = 2) -> None:
+        self._max_idle = max_idle
+        self._idle: Dict[str, List[PooledContext]] = {}
+
+    def key(self, context_args: Dict) -> Optional[str]:
+        if context_args.get("record_video_dir") or context_args.get("record_har_path"):
+            return None
+        try:
+            storage_state = _load_storage_state(context_args.get("storage_state"))
+        except (OSError, ValueError):
+            return None
+        if any(origin.get("localStorage") for origin in storage_state.get("origins", [])):
+            return None
+        try:
+            return json.dumps(context_args, sort_keys=True, default=str)
+        except (TypeError, ValueError):
+            return None
+
+    def track(self, context: BrowserContext, key: str, context_args: Dict) -> PooledContext:
+        pooled = PooledContext(
+            context, key, _load_storage_state(context_args.get("storage_state")).get("cookies", [])
+        )
+
+        def _mark_dirty(method: Callable) -> Callable:
+            def _wrapper(*args: Any, **kwargs: Any) -> Any:
+                pooled.dirty = True
+                return method(*args, **kwargs)
+
+            return _wrapper
+
+        for name in _DIRTYING_CONTEXT_METHODS:
+            setattr(context, name, _mark_dirty(getattr(context, name)))
+
+        def _on_page(page: Page) -> None:
+            def _on_frame_navigated(frame: Any) -> None:
+                origin = _url_origin(frame.url)
+                if origin and frame == page.main_frame:
+                    pooled.origins.add(origin)
+
+            page.on("framenavigated", _on_frame_navigated)
+
+        context.on("page", _on_page)
+        return pooled
+
+    def acquire(self, key: str) -> Optional[PooledContext]:
+        idle = self._idle.get(key)
+        if not idle:
+            return None
+        return idle.pop()
+
+    def release(self, pooled: PooledContext) -> None:
+        idle = self._idle.setdefault(pooled.key, [])
+        if pooled.dirty or len(idle) >= self._max_idle or not self._reset(pooled):
+            self._close(pooled)
+            return
+        idle.append(pooled)
+
+    def close_all(self) -> None:
+        for idle in self._idle.values():
+            for pooled in idle:
+                self._close(pooled)
+        self._idle.clear()
+
+    def _reset(self, pooled: PooledContext) -> bool:
+        context = pooled.context
+        try:
+            cleared: Set[str] = set()
+            for page in context.pages:
+                origin = _url_origin(page.url)
+                if origin:
+                    page.evaluate(_CLEAR_STORAGE_JS)
+                    cleared.add(origin)
+                page.close()
+            if pooled.origins - cleared:
+                return False
+            context.clear_cookies()
+            context.clear_permissions()
+            if pooled.cookies:
+                context.add_cookies(pooled.cookies)
+        except Error:
+            return False
+        pooled.origins.clear()
+        return True
+
+    @staticmethod
+    def _close(pooled: PooledContext) -> None:
+        try:
+            pooled.real_close()
+        except Error:
+            pass
+
+
 class CreateContextCallback(Protocol):
     def __call__(
             self,
@@ -310,11 +558,22 @@ class CreateContextCallback(Protocol):
         ...
 
 
+@pytest.fixture(scope="session")
+def browser_context_hooks() -> List[Callable[[BrowserContext], Any]]:
+    """
+    新建浏览器上下文后依次调用的函数（例如注册网络请求过滤的路由），可以在 conftest.py 中覆写；
+    在上下文放入复用池之前调用，因此注册的路由不会使上下文无法复用，复用时也不会重复注册
+    """
+    return []
+
+
 @pytest.fixture
 def new_context(
         browser: Browser,
         browser_context_args: Dict,
+        browser_context_hooks: List[Callable[[BrowserContext], Any]],
         _artifacts_recorder: "ArtifactsRecorder",
+        _context_pool: Optional["ContextPool"],
         request: pytest.FixtureRequest,
 ) -> Generator[CreateContextCallback, None, None]:
     browser_context_args = browser_context_args.copy()
@@ -322,24 +581,110 @@ def new_context(
     additional_context_args = context_args_marker.kwargs if context_args_marker else {}
     browser_context_args.update(additional_context_args)
     contexts: List[BrowserContext] = []
+    pooled_contexts: Dict[BrowserContext, PooledContext] = {}
+    har_mode = request.config.getoption("--har")
+    har_count = 0
 
     def _new_context(**kwargs: Any) -> BrowserContext:
-        context = browser.new_context(**browser_context_args, **kwargs)
-        original_close = context.close
+        nonlocal har_count
+        context_args = {**browser_context_args, **kwargs}
+        # 录制的HAR在上下文关闭时才写入，回放的路由也无法撤销，这两种模式下上下文不复用
+        pool_key = _context_pool.key(context_args) if _context_pool and har_mode == "off" else None
+        pooled = _context_pool.acquire(pool_key) if pool_key else None
+        reused = pooled is not None
+        har_path = None
+        if pooled is None:
+            if har_mode != "off":
+                har_count += 1
+                har_path = _build_har_path(request, har_count)
+                if har_mode == "replay" and not os.path.isfile(har_path):
+                    pytest.skip(f"HAR回放模式下未找到该用例录制的HAR文件：{har_path}")
+            context = browser.new_context(**context_args)
+            for hook in browser_context_hooks:
+                hook(context)
+            # HAR的路由最后注册，优先级最高：录制时记录真实的响应，回放时不再经过其他路由访问网络
+            if har_path:
+                _route_from_har(context, har_path, har_mode, request.config)
+            if pool_key:
+                pooled = _context_pool.track(context, pool_key, context_args)
+        else:
+            context = pooled.context
+        original_close = pooled.real_close if pooled else context.close
 
         def _close_wrapper(*args: Any, **kwargs: Any) -> None:
             contexts.remove(context)
-            _artifacts_recorder.on_will_close_browser_context(context)
+            pooled_contexts.pop(context, None)
+            _artifacts_recorder.on_will_close_browser_context(context, pooled=pooled is not None)
             original_close(*args, **kwargs)
+            if har_path and har_mode == "record":
+                _scrub_har(har_path)
 
         context.close = _close_wrapper
         contexts.append(context)
-        _artifacts_recorder.on_did_create_browser_context(context)
+        if pooled:
+            pooled_contexts[context] = pooled
+        _artifacts_recorder.on_did_create_browser_context(context, pooled=pooled is not None, reused=reused)
         return context
 
     yield cast(CreateContextCallback, _new_context)
+    # 用例失败时，上下文中可能残留无法重置的状态，不放回池中
+    failed = request.node.rep_call.failed if hasattr(request.node, "rep_call") else True
     for context in contexts.copy():
-        context.close()
+        pooled = pooled_contexts.pop(context, None)
+        if pooled and not failed:
+            contexts.remove(context)
+            _artifacts_recorder.on_will_close_browser_context(context, pooled=True)
+            _context_pool.release(pooled)
+        else:
+            context.close()
+
+
+def _build_har_path(request: pytest.FixtureRequest, index: int) -> str:
+    """
+    用例的HAR文件路径：--har-dir/测试模块/用例名/context.har，同一个用例中第二个及之后的上下文为 context-2.har ...
+    """
+    file_name = "context.har" if index == 1 else f"context-{index}.har"
+    return _build_artifact_test_folder(request.config, request, file_name,
+                                       output_dir=request.config.getoption("--har-dir"))
+
+
+def _route_from_har(context: BrowserContext, har_path: str, har_mode: str, pytestconfig: Any) -> None:
+    """
+    record：请求照常发送到服务端，上下文关闭时将匹配 --har-url 的请求和响应写入HAR文件
+    replay：匹配 --har-url 的请求从HAR文件中返回响应，HAR中没有的请求按 --har-not-found 处理：
+            abort 直接中止（完全离线），fallback 继续发送到服务端
+    """
+    if har_mode == "record":
+        os.makedirs(os.path.dirname(har_path), exist_ok=True)
+    context.route_from_har(
+        har_path,
+        url=pytestconfig.getoption("--har-url"),
+        not_found=pytestconfig.getoption("--har-not-found"),
+        update=har_mode == "record",
+        update_content="embed",
+        update_mode="minimal",
+    )
+
+
+def _scrub_har(har_path: str) -> None:
+    """
+    上下文关闭、HAR写入后，将请求头、响应头中的 cookie、token 等登录凭证替换为 HAR_REDACTED
+    回放时按 url、method、请求体匹配响应，不依赖这些值；请求体、响应体中的账号密码、token 不做处理，
+    因此录制的HAR仍然只能保存在本地，不要提交到代码库
+    """
+    if not os.path.isfile(har_path):
+        return
+    with open(har_path, "r", encoding="utf-8") as f:
+        har = json.load(f)
+    for entry in har.get("log", {}).get("entries", []):
+        for message in (entry.get("request", {}), entry.get("response", {})):
+            for header in message.get("headers", []):
+                if header.get("name", "").lower() in HAR_SENSITIVE_HEADERS:
+                    header["value"] = HAR_REDACTED
+            for cookie in message.get("cookies", []):
+                cookie["value"] = HAR_REDACTED
+    with open(har_path, "w", encoding="utf-8") as f:
+        json.dump(har, f, ensure_ascii=False, indent=2)
 
 
 @pytest.fixture
@@ -433,8 +778,10 @@ def pytest_addoption(parser: Any) -> None:
     group.addoption(
         "--tracing",
         default="off",
-        choices=["on", "off", "retain-on-failure"],
-        help="Whether to record a trace for each test.",
+        choices=["on", "off", "retain-on-failure", "tiered"],
+        help="Whether to record a trace for each test. tiered records a cheap trace (actions and network only) "
+             "and switches to full snapshots when the test is retried; tests without reruns always record full traces. "
+             "Traces are kept only for failed tests.",
     )
     group.addoption(
         "--video",
@@ -454,6 +801,51 @@ def pytest_addoption(parser: Any) -> None:
         default=False,
         help="Whether to take a full page screenshot",
     )
+    group.addoption(
+        "--context-pool",
+        action="store_true",
+        default=False,
+        help="Reuse warm browser contexts between tests, resetting cookies, storage and pages after each test. "
+        "Contexts recording video or HAR are never pooled, so this has no effect with --video on/retain-on-failure.",
+    )
+    group.addoption(
+        "--context-pool-size",
+        default=2,
+        type=int,
+        help="Maximum number of idle contexts kept per set of context arguments.",
+    )
+    group.addoption(
+        "--artifact-workers",
+        default=4,
+        type=int,
+        help="Number of background threads moving screenshots, traces and videos and copying allure attachments, "
+             "0 to write them on the test thread.",
+    )
+    group.addoption(
+        "--har",
+        default="off",
+        choices=["off", "record", "replay"],
+        help="Record network traffic of each test into a HAR file, or replay tests against the recorded HAR files. "
+             "Cookies and auth headers are scrubbed from recorded HAR files, but request and response bodies are not, "
+             "so keep them out of version control. Replay mode never logs in against the server: "
+             "tests that need a logged-in state reuse the cached .auth state, if any.",
+    )
+    group.addoption(
+        "--har-dir",
+        default="hars",
+        help="Directory for the HAR files of each test, defaults to hars.",
+    )
+    group.addoption(
+        "--har-url",
+        default=None,
+        help="Glob pattern of the request urls recorded into and replayed from HAR files, defaults to all requests.",
+    )
+    group.addoption(
+        "--har-not-found",
+        default="abort",
+        choices=["abort", "fallback"],
+        help="What to do with requests missing from the HAR file in replay mode: abort them or send them to the server.",
+    )
 
 
 class ArtifactsRecorder:
@@ -463,17 +855,35 @@ class ArtifactsRecorder:
             request: pytest.FixtureRequest,
             playwright: Playwright,
             pw_artifacts_folder: tempfile.TemporaryDirectory,
+            artifact_writer: ArtifactWriter,
     ) -> None:
         self._request = request
         self._pytestconfig = pytestconfig
         self._playwright = playwright
         self._pw_artifacts_folder = pw_artifacts_folder
+        # 截图、trace、视频的移动和allure附件的复制都交给 artifact_writer 在后台执行
+        self._artifact_writer = artifact_writer
 
         self._all_pages: List[Page] = []
+        self._page_listeners: Dict[BrowserContext, Callable[[Page], None]] = {}
         self._screenshots: List[str] = []
+        # 截图 -> 复制到allure结果目录的后台任务，移动或删除截图前需要等它完成
+        self._screenshot_attachments: Dict[str, Optional[Future]] = {}
         self._traces: List[str] = []
         self._tracing_option = pytestconfig.getoption("--tracing")
-        self._capture_trace = self._tracing_option in ["on", "retain-on-failure"]
+        self._capture_trace = self._tracing_option in ["on", "retain-on-failure", "tiered"]
+        self._trace_tier = self._get_trace_tier()
+
+    def _get_trace_tier(self) -> str:
+        """
+        tiered 模式下，用例第一次执行时只记录低开销的trace，失败重跑（pytest-rerunfailures 的 execution_count > 1）时记录完整快照；
+        用例没有重跑次数（--reruns=0 且没有 flaky 标记）时，失败后不会再重跑，第一次执行就记录完整快照
+        """
+        if self._tracing_option != "tiered":
+            return "full"
+        if not get_reruns_count(self._request.node):
+            return "full"
+        return "full" if getattr(self._request.node, "execution_count", 1) > 1 else "cheap"
 
     def did_finish_test(self, failed: bool) -> None:
         screenshot_option = self._pytestconfig.getoption("--screenshot")
@@ -488,15 +898,26 @@ class ArtifactsRecorder:
                     self._request,
                     f"test-{human_readable_status}-{index + 1}.png",
                 )
-                os.makedirs(os.path.dirname(screenshot_path), exist_ok=True)
-                shutil.move(screenshot, screenshot_path)
+                self._artifact_writer.move(screenshot, screenshot_path,
+                                           after=[self._screenshot_attachments.get(screenshot)])
         else:
             for screenshot in self._screenshots:
-                os.remove(screenshot)
+                self._artifact_writer.remove(screenshot, after=[self._screenshot_attachments.get(screenshot)])
 
-        if self._tracing_option == "on" or (
-                failed and self._tracing_option == "retain-on-failure"
-        ):
+        keep_trace = self._tracing_option == "on" or (
+                failed and self._tracing_option in ["retain-on-failure", "tiered"]
+        )
+        if self._traces:
+            _trace_sizes.append({
+                "test": self._request.node.nodeid,
+                "tier": self._trace_tier,
+                "execution_count": getattr(self._request.node, "execution_count", 1),
+                "failed": failed,
+                "kept": keep_trace,
+                "traces": len(self._traces),
+                "bytes": sum(os.path.getsize(trace) for trace in self._traces if os.path.isfile(trace)),
+            })
+        if keep_trace:
             for index, trace in enumerate(self._traces):
                 trace_file_name = (
                     "trace.zip" if len(self._traces) == 1 else f"trace-{index + 1}.zip"
@@ -504,11 +925,10 @@ class ArtifactsRecorder:
                 trace_path = _build_artifact_test_folder(
                     self._pytestconfig, self._request, trace_file_name
                 )
-                os.makedirs(os.path.dirname(trace_path), exist_ok=True)
-                shutil.move(trace, trace_path)
+                self._artifact_writer.move(trace, trace_path)
         else:
             for trace in self._traces:
-                os.remove(trace)
+                self._artifact_writer.remove(trace)
 
         video_option = self._pytestconfig.getoption("--video")
         preserve_video = video_option == "on" or (
@@ -525,16 +945,18 @@ class ArtifactsRecorder:
                         if len(self._all_pages) == 1
                         else f"video-{index + 1}.webm"
                     )
-                    video.save_as(
-                        path=_build_artifact_test_folder(
-                            self._pytestconfig, self._request, video_file_name
-                        )
-                    )
+                    video_path = _build_artifact_test_folder(self._pytestconfig, self._request, video_file_name)
+                    try:
+                        # 上下文已关闭，视频文件已经写完，直接在后台移动，不再由 save_as 在当前线程中复制
+                        moved = self._artifact_writer.move(video.path(), video_path)
+                    except Error:
+                        # 连接远程浏览器时无法获取视频的本地路径
+                        video.save_as(path=video_path)
+                        moved = None
                     # ----------------------------------------------
                     # flora添加： 往allure报告中放入视频
-                    allure.attach.file(_build_artifact_test_folder(self._pytestconfig, self._request, video_file_name),
-                                       name=f"{self._request.node.name}-{index + 1}",
-                                       attachment_type=allure.attachment_type.WEBM)
+                    self._artifact_writer.attach_file(video_path, name=f"{self._request.node.name}-{index + 1}",
+                                                      attachment_type=allure.attachment_type.WEBM, after=[moved])
 
                     # ---------------------------------------------
                 except Error:
@@ -549,22 +971,44 @@ class ArtifactsRecorder:
                     except Error:
                         pass
 
-    def on_did_create_browser_context(self, context: BrowserContext) -> None:
-        context.on("page", lambda page: self._all_pages.append(page))
+    def on_did_create_browser_context(
+            self, context: BrowserContext, pooled: bool = False, reused: bool = False
+    ) -> None:
+        listener = self._all_pages.append
+        self._page_listeners[context] = listener
+        context.on("page", listener)
         if self._request and self._capture_trace:
-            context.tracing.start(
-                title=slugify(self._request.node.nodeid),
-                screenshots=True,
-                snapshots=True,
-                sources=True,
-            )
-
-    def on_will_close_browser_context(self, context: BrowserContext) -> None:
+            if not pooled and self._tracing_option != "tiered":
+                context.tracing.start(
+                    title=slugify(self._request.node.nodeid),
+                    **_TRACE_TIERS["full"],
+                )
+                return
+            # 池化的上下文和 tiered 模式下，每个用例录制为一个chunk；
+            # tracing 只在上下文创建时开启一次，复用的上下文开启时的级别与当前用例不同时才重新开启
+            if not reused or _context_trace_tiers.get(context) != self._trace_tier:
+                if reused and context in _context_trace_tiers:
+                    context.tracing.stop()
+                context.tracing.start(**_TRACE_TIERS[self._trace_tier])
+                _context_trace_tiers[context] = self._trace_tier
+            context.tracing.start_chunk(title=slugify(self._request.node.nodeid))
+
+    def on_will_close_browser_context(self, context: BrowserContext, pooled: bool = False) -> None:
+        listener = self._page_listeners.pop(context, None)
+        if pooled and listener:
+            context.remove_listener("page", listener)
         if self._capture_trace:
             trace_path = Path(self._pw_artifacts_folder.name) / create_guid()
-            context.tracing.stop(path=trace_path)
+            if pooled:
+                context.tracing.stop_chunk(path=trace_path)
+            elif self._tracing_option == "tiered":
+                context.tracing.stop_chunk(path=trace_path)
+                context.tracing.stop()
+                _context_trace_tiers.pop(context, None)
+            else:
+                context.tracing.stop(path=trace_path)
             self._traces.append(str(trace_path))
-        else:
+        elif not pooled:
             context.tracing.stop()
 
         if self._pytestconfig.getoption("--screenshot") in ["on", "only-on-failure"]:
@@ -582,8 +1026,9 @@ class ArtifactsRecorder:
                     )
                     # ------------------------------------------------
                     # flora添加： 往allure报告中放入截图
-                    allure.attach.file(screenshot_path, name=f"{self._request.node.name}",
-                                       attachment_type=allure.attachment_type.PNG)
+                    self._screenshot_attachments[str(screenshot_path)] = self._artifact_writer.attach_file(
+                        str(screenshot_path), name=f"{self._request.node.name}",
+                        attachment_type=allure.attachment_type.PNG)
 
                     # ------------------------------------------------
                     self._screenshots.append(str(screenshot_path))
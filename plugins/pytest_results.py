@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+# @Version: Python 3.13
+# @Author  : 会飞的🐟
+# @File    : pytest_results.py
+# @Software: PyCharm
+# @Desc: 用例结果插件：运行过程中将每个用例的结果和耗时逐条写入 test_results.jsonl，汇总和通知直接读取该文件
+
+import os
+import json
+import time
+import threading
+from typing import Dict, List, Optional, TextIO
+import pytest
+from plugins.pytest_shard import get_report_dir, is_worker
+from utils.report_utils.get_results_handle import TEST_RESULTS_FILE, summarize_test_results
+
+
+class ResultsStore:
+    """
+    用例结果记录（进程内共享，使用模块级的 results_store 实例）
+
+    每条记录一行JSON：
+    - {"type": "session", "start"/"stop": 时间戳, "worker": worker编号}
+    - {"type": "test", "nodeid", "outcome", "duration", "start", "stop", "execution_count", "worker"}
+    outcome 为 passed、failed、error、skipped、xfailed、xpassed、rerun（失败后被重跑的那一次执行）
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._file: Optional[TextIO] = None
+        self.worker: Optional[int] = None
+        self.records: List[dict] = []
+
+    def open(self, report_dir: str, worker: Optional[int] = None) -> None:
+        self.worker = worker
+        self.records = []
+        self._file = open(os.path.join(report_dir, TEST_RESULTS_FILE), mode="w", encoding="utf-8")
+
+    def add(self, record: dict) -> None:
+        """
+        保存一条记录并立即写入文件，进程异常退出时已执行的用例结果不会丢失
+        """
+        record["worker"] = self.worker
+        with self._lock:
+            self.records.append(record)
+            if self._file:
+                self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def summary(self) -> dict:
+        with self._lock:
+            return summarize_test_results(list(self.records))
+
+
+# 执行中的用例各阶段的报告：nodeid -> [report, ...]
+_reports: Dict[str, List[pytest.TestReport]] = {}
+
+
+def _outcome(reports: List[pytest.TestReport]) -> str:
+    """
+    根据用例 setup/call/teardown 三个阶段的报告判断用例结果
+    """
+    for report in reports:
+        if report.outcome == "rerun":
+            return "rerun"
+    for report in reports:
+        if report.failed:
+            return "failed" if report.when == "call" else "error"
+    for report in reports:
+        if report.skipped:
+            return "xfailed" if hasattr(report, "wasxfail") else "skipped"
+    call = next((report for report in reports if report.when == "call"), None)
+    if call is not None and hasattr(call, "wasxfail"):
+        return "xpassed"
+    return "passed"
+
+
+def pytest_sessionstart(session: pytest.Session) -> None:
+    config = session.config
+    results_store.open(get_report_dir(config),
+                       worker=config.getoption("--shard-id") if is_worker(config) else None)
+    results_store.add({"type": "session", "start": time.time()})
+
+
+def pytest_runtest_logreport(report: pytest.TestReport) -> None:
+    """
+    收集用例各阶段的报告，teardown 阶段结束（或者被重跑）时写入一条用例结果
+    """
+    reports = _reports.setdefault(report.nodeid, [])
+    reports.append(report)
+    if report.when != "teardown" and report.outcome != "rerun":
+        return
+    _reports.pop(report.nodeid, None)
+    results_store.add({
+        "type": "test",
+        "nodeid": report.nodeid,
+        "outcome": _outcome(reports),
+        "duration": round(sum(item.duration for item in reports), 3),
+        "start": min(item.start for item in reports),
+        "stop": max(item.stop for item in reports),
+        # pytest-rerunfailures 在报告中记录已重跑的次数
+        "execution_count": getattr(report, "rerun", 0) + 1,
+    })
+
+
+def pytest_sessionfinish(session: pytest.Session) -> None:
+    results_store.add({"type": "session", "stop": time.time()})
+    results_store.close()
+
+
+results_store = ResultsStore()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# @Version: Python 3.13
+# @Author  : 会飞的🐟
+# @File    : pytest_shard.py
+# @Software: PyCharm
+# @Desc: 用例分片插件，配合 run.py -workers N 实现多进程并行执行
+
+import os
+from typing import Any, List
+import pytest
+from config.path_config import REPORT_DIR
+
+# 并行模式下，每个 worker 的产物（allure结果、日志、统计文件）都放在该目录下的 gw{N} 子目录中
+WORKERS_DIR = os.path.join(REPORT_DIR, "workers")
+
+
+def worker_dir(shard_id: int) -> str:
+    """
+    获取指定 worker 的产物目录，例如：outputs/report/workers/gw0
+    :param shard_id: worker 编号，从 0 开始
+    """
+    path = os.path.join(WORKERS_DIR, f"gw{shard_id}")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def is_worker(config: Any) -> bool:
+    """
+    判断当前 pytest 进程是否是并行模式下的一个 worker
+    """
+    return config.getoption("--num-shards", 1) > 1
+
+
+def get_report_dir(config: Any) -> str:
+    """
+    获取当前进程的报告目录：单进程运行时为 REPORT_DIR，worker 进程为各自的 gw{N} 目录，
+    避免多个进程同时写 test_result.txt 之类的文件互相覆盖
+    """
+    if is_worker(config):
+        return worker_dir(config.getoption("--shard-id"))
+    return REPORT_DIR
+
+
+def pytest_addoption(parser: Any) -> None:
+    group = parser.getgroup("shard", "Shard")
+    group.addoption(
+        "--num-shards",
+        default=1,
+        type=int,
+        help="Total number of shards (worker processes) the collected items are split into.",
+    )
+    group.addoption(
+        "--shard-id",
+        default=0,
+        type=int,
+        help="Index of the shard executed by this process, starting from 0.",
+    )
+
+
+def pytest_configure(config: Any) -> None:
+    num_shards = config.getoption("--num-shards")
+    shard_id = config.getoption("--shard-id")
+    if num_shards < 1 or not 0 <= shard_id < num_shards:
+        raise pytest.UsageError(f"--shard-id={shard_id} 超出范围，--num-shards={num_shards}")
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(config: Any, items: List[pytest.Item]) -> None:
+    """
+    按收集顺序轮询分片：第 i 个用例分给 i % num_shards 号 worker。
+    所有 worker 收集到的用例顺序一致，因此每个用例有且只有一个 worker 执行；
+    tryfirst 保证后续 hook（如用例数据处理）只处理本分片的用例。
+    """
+    num_shards = config.getoption("--num-shards")
+    if num_shards <= 1:
+        return
+    shard_id = config.getoption("--shard-id")
+    selected: List[pytest.Item] = []
+    deselected: List[pytest.Item] = []
+    for index, item in enumerate(items):
+        if index % num_shards == shard_id:
+            selected.append(item)
+        else:
+            deselected.append(item)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+    items[:] = selected
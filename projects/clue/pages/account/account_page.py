@@ -22,6 +22,15 @@ class AccountPage(BasePage):
     locator_radio_allow_export = "xpath=//*[@id='allow_export']/label[2]/span[1]/input"
     locator_radio_allow_export_sensitive = "xpath=//*[@id='allow_export_sensitive']/label[2]"
     locator_btn_confirm = "xpath=/html/body/div[2]/div/div[2]/div/div[1]/div/div[3]/div/div/button[2]"
+    # 首页侧边栏的【账号管理】菜单可见即认为页面就绪
+    ready_locator = locator_menu_account_management
+
+    @allure.step("访问首页：/welcome")
+    def navigate(self):
+        """
+        访问首页，账号管理菜单在首页侧边栏中
+        """
+        self.visit("/welcome")
 
     @allure.step("点击【账号管理】菜单")
     def click_menu_account_management(self):
@@ -30,8 +39,8 @@ class AccountPage(BasePage):
     @allure.step("点击【新建账号】按钮")
     def click_btn_new_account(self):
         self.click(self.locator_btn_new_account)
-        # 等待弹窗加载
-        self.wait(2)
+        # 等待弹窗加载：弹窗中的手机号输入框可见
+        self.wait_for_element(self.locator_input_phone, replaces=2)
 
     @allure.step("选择账号类型")
     def select_account_type(self):
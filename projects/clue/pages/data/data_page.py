@@ -20,6 +20,8 @@ class DataPage(BasePage):
     # 模块/标签
     locator_section_clue_follow = "text=线索跟进情况"
     locator_tab_accident_clue = "role=tab[name=\"事故线索\"]"
+    # 看板有轮询接口，达不到 networkidle；筛选区域渲染出来即认为页面就绪
+    ready_locator = locator_week
 
     @allure.step("访问欢迎页：/welcome")
     def navigate(self):
@@ -125,4 +127,3 @@ class DataPage(BasePage):
         self.enter_clue_follow_section()
         self.switch_to_accident_clue_tab()
         self.click_company_by_title(title=company_title, index=company_index)
-        self.wait(1)
@@ -16,6 +16,8 @@ class LoginPage(BasePage):
     locator_page_login_btn = "xpath=//*[@id='root']/div/div/form/button"
     # 登录成功后的 title
     locator_welcome_tip = "xpath=//*[@id='root']/div/div[2]/div[2]/header[2]/div/div[3]/div/div/div/span/div/div[2]/div/span"
+    # 登录表单可以输入时即认为页面就绪
+    ready_locator = locator_page_username
 
     @allure.step("访问登录页面：/user/login")
     def navigate(self, timeout: int = 30):
@@ -54,6 +56,7 @@ class LoginPage(BasePage):
         self.input_username_on_page(login)
         self.input_password_on_page(password)
         self.submit_login_on_page()
-        self.page.wait_for_timeout(3000)
+        # 等待登录成功后离开登录页
+        self.wait_for_url(lambda url: "/user/login" not in url, timeout=30, replaces=3)
         # 断言登录成功后的 title 是否包含用户名
         # self.assert_text_contains(locator=self.locator_welcome_tip, text=login)
@@ -9,12 +9,14 @@ from utils.base_utils.base_page import BasePage
 
 
 class WelcomeRecordedPage(BasePage):
+    # 与 DataPage 相同：看板达不到 networkidle，筛选区域渲染出来即认为页面就绪
+    ready_locator = "text=本周"
+
     def open_welcome(self):
         """
         打开欢迎页
         """
         self.visit("/welcome")
-        self.wait_for_load_state()
 
     def interact_filters(self):
         """
@@ -24,7 +26,8 @@ class WelcomeRecordedPage(BasePage):
         self.click("text=本月")
         self.click("text=安装数")
         self.click(".ant-picker.ant-picker-borderless > .ant-picker-input")
-        self.wait(1)
+        # 等待日期下拉面板弹出
+        self.wait_for_element(".ant-picker-dropdown", replaces=1)
         # 1月在某些视图下可能不存在或不可见，失败时跳过该步骤
         try:
             self.click('text="1月"')
@@ -37,7 +40,6 @@ class WelcomeRecordedPage(BasePage):
 
     def assert_welcome(self):
         """
-        断言当前仍在欢迎页
+        断言当前仍在欢迎页（assert_url_contains 本身会等待url满足条件）
         """
-        self.wait(1)
         self.assert_url_contains("/welcome")
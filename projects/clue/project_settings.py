@@ -31,3 +31,21 @@ ENV_VARS = {
         "admin_user_password": os.getenv("CLUE_ADMIN_PASSWORD", ""),
     }
 }
+
+# ------------------------------------ 网络请求过滤配置 ----------------------------------------------------#
+# 浏览器上下文中的请求过滤规则，详见 utils/base_utils/network_filter.py 中的 NetworkFilter，不需要过滤时置为空字典
+NETWORK_RULES = {
+    # 直接中止：字体和音视频不影响页面功能
+    "block_resource_types": ["font", "media"],
+    # 直接中止：统计埋点
+    "block_urls": ["*hm.baidu.com/*", "*google-analytics.com/*"],
+    # 返回伪造的响应：图片返回1x1透明图片，避免页面出现加载失败的占位
+    "stub_resource_types": ["image"],
+    "stub_urls": [],
+    # 缓存到本地磁盘，所有浏览器上下文共享：带内容哈希的文件直接使用缓存，其他文件每次向服务端确认是否变化
+    "cache_resource_types": ["script", "stylesheet"],
+    "cache_urls": [],
+    "cache_ttl": 24 * 3600,
+    # 不做任何处理：接口请求
+    "allow_urls": ["*clueapi-dev.spreadwin.cn/*"],
+}
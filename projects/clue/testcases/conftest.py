@@ -6,31 +6,91 @@
 # @Desc: TODO: Description
 
 import os
+import time
 import pytest
-from playwright.sync_api import Browser
+from playwright.sync_api import Browser, BrowserContext
 from loguru import logger
 from config.global_vars import GLOBAL_VARS
-from config.path_config import AUTH_DIR
+from pages.login_page import LoginPage
+from pages.account.account_page import AccountPage
 from utils.base_utils.request_control import RequestControl
+from utils.auth_utils.storage_state_handle import StorageStateCache
 
 PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 INTERFACE_DIR = os.path.join(PROJECT_DIR, "interfaces")
+# 校验登录态时访问的页面，未登录时前端会重定向到登录页
+AUTH_CHECK_PATH = "/welcome"
+LOGIN_PATH = "/user/login"
+
+
+def _login_on_page(context: BrowserContext) -> None:
+    """
+    在 context 中打开一个页面走网页登录，登录后 context 中的其他页面共享登录态（cookie、localStorage）
+    """
+    page = context.new_page()
+    try:
+        login_page = LoginPage(page)
+        login_page.navigate()
+        login_page.login_on_page_flow(login=str(GLOBAL_VARS.get("admin_user_name")),
+                                      password=str(GLOBAL_VARS.get("admin_user_password")))
+    finally:
+        page.close()
+
+
+def _is_logged_in(browser: Browser, auth_path: str, timeout: int = 10) -> bool:
+    """
+    校验登录态能否登录UI页面：带上 storage_state 访问首页，侧边栏的【账号管理】菜单先出现即为已登录，先跳转到登录页即为未登录，
+    两者都没有出现时按未登录处理
+    接口域名下获取的登录态不一定能登录页面域名（例如token保存在页面域名的localStorage中），因此不能只看接口是否登录成功
+    """
+    context = browser.new_context(base_url=GLOBAL_VARS.get("url"), storage_state=auth_path)
+    try:
+        page = context.new_page()
+        page.goto(AUTH_CHECK_PATH, timeout=timeout * 1000)
+        logged_in_marker = page.locator(AccountPage.locator_menu_account_management)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if LOGIN_PATH in page.url:
+                return False
+            if logged_in_marker.is_visible():
+                return True
+            page.wait_for_timeout(100)
+        logger.warning(f"{timeout}s内既没有跳转到登录页，也没有出现【账号管理】菜单，按未登录处理：{auth_path}")
+        return False
+    finally:
+        context.close()
+
+
+def _check_login(browser: Browser, cache: StorageStateCache) -> bool:
+    """
+    校验缓存的登录态，同一份登录态只在页面上校验一次，校验通过后其他会话、worker直接复用
+    """
+    if cache.is_verified():
+        logger.info(f"登录态已校验过，直接复用：{cache.path}")
+        return True
+    if _is_logged_in(browser, cache.path):
+        cache.mark_verified()
+        return True
+    return False
 
 
 @pytest.fixture(scope="session", autouse=True)
 def reset_login_times(browser: Browser, pytestconfig):
     """
-    会话级前置：在所有 UI 用例执行前，通过接口完成一次超级管理员登录。
+    会话级前置：在所有 UI 用例执行前，准备超级管理员的登录态。
 
     设计意图：
     1. 通过 API 登录，比逐条用例走 UI 登录更稳定、更高效。
-    2. 将登录成功后的会话信息保存到 .auth/clue_state.json，后续如果需要，
-       可以通过 Playwright 的 storage_state 机制直接复用该登录态，跳过登录页面。
-    3. 登录请求相关的账号、登录类型等参数统一从 GLOBAL_VARS 中读取，
+    2. 登录态按 环境+用户 缓存在 .auth 目录下（StorageStateCache），未过期时直接复用，
+       不再重复调用登录接口；标记了 @pytest.mark.auth 的用例通过 storage_state 直接带上登录态，跳过登录页面。
+    3. 登录态需要能访问 /welcome 才使用；接口登录态无法登录页面时，改为网页登录一次，保存页面域名下的登录态；
+       同一份登录态校验通过后记录标记，其他会话、worker不再重复校验。
+    4. 登录请求相关的账号、登录类型等参数统一从 GLOBAL_VARS 中读取，
        保证不同环境（test/live）下只需调整配置文件即可复用。
+    5. --har=replay 回放时不访问服务端，不调用登录接口也不校验登录态，只使用 .auth 中已缓存的登录态。
+    :return: storage_state 文件路径，登录失败时返回 None
     """
     logger.info("\n-------------- Start: 开启测试前的操作 ----------------")
-    print(f"DEBUG: testcases conftest reset_login_times - GLOBAL_VARS: {GLOBAL_VARS}")
     # 超级管理远账号
     users = {
         "user_name": GLOBAL_VARS['admin_user_name'],
@@ -39,24 +99,72 @@ def reset_login_times(browser: Browser, pytestconfig):
         "uuid": GLOBAL_VARS['uuid'],
         "sms_state": GLOBAL_VARS['sms_state'],
     }
-
-    # 手动创建一个新的 APIRequest 上下文实例，用于发送纯 API 请求
     api_base_url = GLOBAL_VARS.get("host")
-    api_request_context = browser.new_context(base_url=api_base_url).request
 
-    # 发送登录请求，api_request_context 会自动存储登录态，
-    # 下一个请求会自动带上 Cookie / Token 等信息
-    logger.info("\n-------------- Start: 登录 ----------------")
-    try:
-        RequestControl(api_request_context=api_request_context).api_request_flow(
-            api_file_path=os.path.join(INTERFACE_DIR, "clue_login.yml"), key="clue_login", global_var=users)
-        
-        # 保存登录态到本地文件，方便后续 UI 测试复用（如果需要）
-        auth_path = os.path.join(AUTH_DIR, "clue_state.json")
-        api_request_context.storage_state(path=auth_path)
-        logger.info(f"登录态已保存至: {auth_path}")
+    def _login(auth_path: str):
+        # 手动创建一个新的 APIRequest 上下文实例，用于发送纯 API 请求，
+        # api_request_context 会自动存储登录态，下一个请求会自动带上 Cookie / Token 等信息
+        logger.info("\n-------------- Start: 登录 ----------------")
+        api_context = browser.new_context(base_url=api_base_url)
+        try:
+            api_request_context = api_context.request
+            RequestControl(api_request_context=api_request_context).api_request_flow(
+                api_file_path=os.path.join(INTERFACE_DIR, "clue_login.yml"), key="clue_login", global_var=users)
+            api_request_context.storage_state(path=auth_path)
+        finally:
+            api_context.close()
+
+    def _page_login(auth_path: str):
+        page_context = browser.new_context(base_url=GLOBAL_VARS.get("url"))
+        try:
+            _login_on_page(page_context)
+            page_context.storage_state(path=auth_path)
+        finally:
+            page_context.close()
 
+    cache = StorageStateCache(env=api_base_url, user=users["user_name"])
+    if pytestconfig.getoption("--har") == "replay":
+        if os.path.isfile(cache.path):
+            logger.info(f"HAR回放模式，使用已缓存的登录态：{cache.path}")
+            return cache.path
+        logger.warning("HAR回放模式下没有已缓存的登录态，需要登录的用例以未登录状态执行")
+        return None
+    try:
+        auth_path = cache.get(login=_login)
+        if _check_login(browser, cache):
+            return auth_path
+        logger.warning(f"接口登录获取的登录态无法访问 {AUTH_CHECK_PATH}，改为网页登录：{auth_path}")
     except Exception as e:
         import traceback
-        logger.error(f"登录前置接口调用失败，已跳过，错误：{e}")
+        logger.error(f"登录前置接口调用失败，改为网页登录，错误：{e}")
         logger.error(traceback.format_exc())
+    try:
+        cache.invalidate()
+        auth_path = cache.get(login=_page_login)
+        if _check_login(browser, cache):
+            return auth_path
+        logger.error(f"网页登录获取的登录态仍无法访问 {AUTH_CHECK_PATH}：{auth_path}")
+    except Exception as e:
+        logger.error(f"网页登录失败，错误：{e}")
+    cache.invalidate()
+    return None
+
+
+@pytest.fixture
+def context(new_context, request: pytest.FixtureRequest, reset_login_times):
+    """
+    pytest-playwright 内置 fixture 覆写
+    标记了 @pytest.mark.auth 的用例，使用 reset_login_times 缓存的登录态创建 BrowserContext，
+    没有可用的登录态时，在该 BrowserContext 中走一次网页登录（HAR回放模式下不登录）；
+    其他用例（例如登录用例本身）仍然使用未登录的 BrowserContext
+    """
+    if request.node.get_closest_marker("auth"):
+        if reset_login_times:
+            return new_context(storage_state=reset_login_times)
+        if request.config.getoption("--har") == "replay":
+            return new_context()
+        logger.warning(f"未获取到可用的登录态，用例前置改为网页登录：{request.node.nodeid}")
+        context = new_context()
+        _login_on_page(context)
+        return context
+    return new_context()
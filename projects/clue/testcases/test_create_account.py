@@ -8,13 +8,12 @@
 import pytest
 from loguru import logger
 from playwright.sync_api import Page
-from pages.login_page import LoginPage
 from pages.account.account_page import AccountPage
-from config.global_vars import GLOBAL_VARS
 import os
 from utils.files_utils.yaml_handle import YamlHandle
 
 @pytest.mark.account
+@pytest.mark.auth
 class TestCreateAccount:
     """创建账号"""
 
@@ -25,21 +24,12 @@ class TestCreateAccount:
     @pytest.fixture(autouse=True)
     def setup_teardown_for_each(self, page: Page):
         logger.info("\n\n---------------Start: 开始测试创建账号-------------")
-        # 登录
-        self.login_page = LoginPage(page)
-        self.login_page.navigate()
-        # 使用配置文件中的用户名密码登录
-        self.login_page.login_on_page_flow(login=GLOBAL_VARS.get("admin_user_name"),
-                                           password=str(GLOBAL_VARS.get("admin_user_password")))
-
-        # 初始化账号页面
+        # 登录态由 @pytest.mark.auth 通过 storage_state 注入，直接进入首页
         self.account_page = AccountPage(page)
+        self.account_page.navigate()
 
         yield
 
-        # 清除登录cookies，避免影响其他登录用例
-        page.context.clear_cookies()
-
     @pytest.mark.parametrize("case", cases["account_cases"], ids=lambda x: x["title"])
     def test_create_account_success(self, case):
         """
@@ -9,14 +9,13 @@ import os
 import pytest
 from loguru import logger
 from playwright.sync_api import Page
-from pages.login_page import LoginPage
 from pages.data.data_page import DataPage
-from config.global_vars import GLOBAL_VARS
 from utils.files_utils.yaml_handle import YamlHandle
 
 
 @pytest.mark.data
 @pytest.mark.recordings
+@pytest.mark.auth
 class TestDataPage:
     """欢迎页/数据概览"""
 
@@ -27,19 +26,12 @@ class TestDataPage:
     @pytest.fixture(autouse=True)
     def setup_teardown_for_each(self, page: Page):
         """
-        登录并进入欢迎页
+        进入欢迎页（登录态由 @pytest.mark.auth 通过 storage_state 注入）
         """
         logger.info("\n\n---------------Start: 欢迎页交互测试-------------")
-        self.login_page = LoginPage(page)
-        self.login_page.navigate()
-        self.login_page.login_on_page_flow(
-            login=str(GLOBAL_VARS.get("admin_user_name")),
-            password=str(GLOBAL_VARS.get("admin_user_password")),
-        )
         self.data_page = DataPage(page)
         self.data_page.navigate()
         yield
-        page.context.clear_cookies()
 
     @pytest.mark.parametrize("case", cases["data_cases"], ids=lambda x: x["title"])
     def test_data_interaction(self, case):
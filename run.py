@@ -18,9 +18,12 @@
   > python run.py -report=yes   生成allure html report
   > python run.py -mode=headed   使用有头模式运行
   > python run.py -env test -m 'projects or login' -report no -mode headless  在test环境，使用无头模式浏览器运行标记了project或者login的用例，并且生成allure html report
+  > python run.py -workers 4   用例分片到4个进程并行执行，每个进程使用独立的浏览器，结束后合并allure结果
 """
 
 import os
+import json
+import shutil
 import argparse
 import sys
 import importlib.util
@@ -28,18 +31,147 @@ import pytest
 from loguru import logger
 from dotenv import load_dotenv
 load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config', 'env', '.env'))
-from config.settings import LOG_INFO, RunConfig
+from config.settings import LOG_INFO, LOG_CONSOLE_LEVEL, RunConfig
 ENV_VARS = {}
 from config.global_vars import GLOBAL_VARS
 from config.path_config import REPORT_DIR, TRACING_DIR, CONF_DIR, ALLURE_RESULTS_DIR, ALLURE_HTML_DIR
 from utils.report_utils.send_result_handle import send_result
+from utils.report_utils.get_results_handle import TEST_RESULTS_FILE, TEST_RESULT_STATS_FILE, write_test_result, \
+    merge_test_result_stats
 from utils.logger_utils.loguru_log import capture_logs
 from utils.report_utils.allure_handle import generate_allure_report
 from utils.report_utils.platform_handle import PlatformHandle
+from utils.report_utils.timing_handle import read_records, write_summary
+from utils.base_utils.action_profiler import merge_locator_stats
+from utils.base_utils.wait_handle import merge_sleep_summaries
+from plugins.pytest_shard import WORKERS_DIR, worker_dir
+from plugins.pytest_playwright import TRACE_SIZES_FILE, summarize_trace_sizes, write_trace_sizes
+from plugins.pytest_action_profiler import PROFILE_STATS_FILE, PROFILE_FOLDED_FILE, SLEEP_REPORT_FILE, write_profile, \
+    write_sleep_report
 import subprocess
 import time
 
 
+def run_in_workers(arg_list: list, workers: int, project_path: str = None):
+    """
+    并行模式：将用例分片到多个 pytest 子进程中执行
+
+    1. 每个 worker 是一个独立的 pytest 进程，通过 --num-shards/--shard-id 只执行属于自己的那一部分用例，
+       session 级别的 browser fixture 也因此每个 worker 各有一个
+    2. 每个 worker 的 allure 结果、tracing 产物、控制台日志都写入 outputs/report/workers/gw{N}，互不干扰
+    3. 子进程无法共享当前进程的 GLOBAL_VARS 和 RunConfig，分别通过环境变量 UI_GLOBAL_VARS、UI_RUN_CONFIG 传递；
+       项目目录通过 PYTHONPATH 传递
+    4. 所有 worker 结束后，合并 allure 结果到 ALLURE_RESULTS_DIR，供 generate_allure_report 使用
+
+    :param arg_list: 单进程模式下的 pytest 参数
+    :param workers: worker 进程数
+    :param project_path: 项目目录，例如 projects/clue
+    """
+    if os.path.exists(WORKERS_DIR):
+        shutil.rmtree(WORKERS_DIR, ignore_errors=True)
+
+    # 每个 worker 需要使用独立的 allure 结果目录和 tracing 输出目录
+    base_args = [arg for arg in arg_list if not arg.startswith(("--alluredir=", "--output="))]
+
+    env = os.environ.copy()
+    env["UI_GLOBAL_VARS"] = json.dumps(GLOBAL_VARS, ensure_ascii=False)
+    # conftest 中根据 RunConfig.mode 决定 viewport，命令行传入的 -mode/-browser 等需要同步给 worker
+    env["UI_RUN_CONFIG"] = json.dumps({"mode": RunConfig.mode, "browser": RunConfig.browser,
+                                       "video": RunConfig.video, "har": RunConfig.har}, ensure_ascii=False)
+    python_paths = [os.path.dirname(os.path.abspath(__file__))]
+    if project_path:
+        python_paths.insert(0, project_path)
+    if env.get("PYTHONPATH"):
+        python_paths.append(env["PYTHONPATH"])
+    env["PYTHONPATH"] = os.pathsep.join(python_paths)
+
+    procs = []
+    for shard_id in range(workers):
+        _worker_dir = worker_dir(shard_id)
+        worker_args = base_args + [f"--alluredir={os.path.join(_worker_dir, 'allure_results')}",
+                                   f"--output={os.path.join(TRACING_DIR, f'gw{shard_id}')}",
+                                   f"--num-shards={workers}", f"--shard-id={shard_id}"]
+        log_file = open(os.path.join(_worker_dir, "pytest.log"), mode="w", encoding="utf-8")
+        logger.info(f"启动worker gw{shard_id}，日志文件：{log_file.name}")
+        logger.debug(f"worker gw{shard_id} 的pytest参数：{worker_args}")
+        proc = subprocess.Popen([sys.executable, "-m", "pytest", *worker_args], env=env,
+                                cwd=os.path.dirname(os.path.abspath(__file__)),
+                                stdout=log_file, stderr=subprocess.STDOUT)
+        procs.append((shard_id, proc, log_file))
+
+    for shard_id, proc, log_file in procs:
+        return_code = proc.wait()
+        log_file.close()
+        logger.info(f"worker gw{shard_id} 执行结束，退出码：{return_code}")
+
+    merge_worker_results(workers)
+
+
+def merge_worker_results(workers: int):
+    """
+    合并各 worker 的运行结果：
+    1. allure 结果文件（uuid命名，不会冲突）移动到 ALLURE_RESULTS_DIR
+    2. 各 worker 的结果统计（test_result.json）相加后重新生成 REPORT_DIR/test_result.txt
+    3. 各 worker 的接口耗时记录重新汇总成 REPORT_DIR/api_timing.json
+    4. 各 worker 的页面操作耗时汇总合并成 REPORT_DIR/action_profile.json、action_profile.folded
+    5. 各 worker 的等待台账合并成 REPORT_DIR/sleep_report.json
+    6. 各 worker 的trace大小重新汇总成 REPORT_DIR/trace_sizes.json
+    7. 各 worker 的用例结果记录拼接成 REPORT_DIR/test_results.jsonl，供发送通知时汇总
+    """
+    if os.path.exists(ALLURE_RESULTS_DIR):
+        shutil.rmtree(ALLURE_RESULTS_DIR, ignore_errors=True)
+    os.makedirs(ALLURE_RESULTS_DIR, exist_ok=True)
+
+    result_stats = []
+    timing_records = []
+    profile_stats, profile_folded, sleep_summaries = [], [], []
+    trace_sizes, test_results = [], []
+    for shard_id in range(workers):
+        _worker_dir = worker_dir(shard_id)
+        results_dir = os.path.join(_worker_dir, "allure_results")
+        if os.path.isdir(results_dir):
+            for file_name in os.listdir(results_dir):
+                shutil.move(os.path.join(results_dir, file_name), os.path.join(ALLURE_RESULTS_DIR, file_name))
+        result_stats_path = os.path.join(_worker_dir, TEST_RESULT_STATS_FILE)
+        if os.path.isfile(result_stats_path):
+            with open(result_stats_path, mode="r", encoding="utf-8") as f:
+                result_stats.append(json.load(f))
+        timing_records.extend(read_records(_worker_dir))
+        stats_path = os.path.join(_worker_dir, PROFILE_STATS_FILE)
+        if os.path.isfile(stats_path):
+            with open(stats_path, mode="r", encoding="utf-8") as f:
+                profile_stats.append(json.load(f))
+            with open(os.path.join(_worker_dir, PROFILE_FOLDED_FILE), mode="r", encoding="utf-8") as f:
+                profile_folded.extend(f.read().splitlines())
+        sleep_path = os.path.join(_worker_dir, SLEEP_REPORT_FILE)
+        if os.path.isfile(sleep_path):
+            with open(sleep_path, mode="r", encoding="utf-8") as f:
+                sleep_summaries.append(json.load(f))
+        trace_sizes_path = os.path.join(_worker_dir, TRACE_SIZES_FILE)
+        if os.path.isfile(trace_sizes_path):
+            with open(trace_sizes_path, mode="r", encoding="utf-8") as f:
+                trace_sizes.extend(json.load(f)["tests"])
+        test_results_path = os.path.join(_worker_dir, TEST_RESULTS_FILE)
+        if os.path.isfile(test_results_path):
+            with open(test_results_path, mode="r", encoding="utf-8") as f:
+                test_results.extend(line for line in f if line.strip())
+
+    if result_stats:
+        test_result, _ = write_test_result(REPORT_DIR, merge_test_result_stats(result_stats))
+        logger.info(f"{workers}个worker的执行结果汇总：\n{test_result}")
+    with open(os.path.join(REPORT_DIR, TEST_RESULTS_FILE), mode="w", encoding="utf-8") as f:
+        f.writelines(line if line.endswith("\n") else f"{line}\n" for line in test_results)
+    if timing_records:
+        write_summary(timing_records, REPORT_DIR)
+    if profile_stats:
+        write_profile(REPORT_DIR, merge_locator_stats(*profile_stats), profile_folded)
+    if sleep_summaries:
+        write_sleep_report(REPORT_DIR, merge_sleep_summaries(*sleep_summaries))
+    if trace_sizes:
+        write_trace_sizes(REPORT_DIR, summarize_trace_sizes(trace_sizes))
+    logger.info(f"已合并{workers}个worker的allure结果至：{ALLURE_RESULTS_DIR}")
+
+
 def run(**kwargs):
     """
     框架统一入口函数
@@ -53,7 +185,7 @@ def run(**kwargs):
     """
     try:
         # ------------------------ 捕获日志----------------------------
-        capture_logs(log_info=LOG_INFO)
+        capture_logs(log_info=LOG_INFO, console_level=LOG_CONSOLE_LEVEL)
 
         logger.info("""\n\n ===============UI自动化测试开始了==================""")
         # ------------------------ 处理一下获取到的参数----------------------------
@@ -68,11 +200,14 @@ def run(**kwargs):
         custom_test_path = kwargs.get("path", "") or None
         # 录制脚本运行模式：converted | raw | all
         recording_mode = (kwargs.get("recording", "") or "converted").lower()
+        # 并行worker进程数，默认使用RunConfig.workers的值
+        workers = int(kwargs.get("workers") or RunConfig.workers)
 
         # ------------------------ 动态加载项目配置 ------------------------
         # Load Project Configuration
         # 这一块代码负责根据命令行参数 dynamic load 项目特有的配置和测试用例
         project_test_path = ""
+        project_path = None
         if project_name:
             # 构造项目根路径：当前工作目录/projects/项目名
             project_path = os.path.join(os.getcwd(), "projects", project_name)
@@ -100,6 +235,10 @@ def run(**kwargs):
                         global ENV_VARS
                         ENV_VARS = project_settings.ENV_VARS
                         logger.info(f"Loaded ENV_VARS from {settings_path}")
+
+                    # 提取项目配置中的网络请求过滤规则，通过 GLOBAL_VARS 传递给浏览器上下文
+                    if getattr(project_settings, "NETWORK_RULES", None):
+                        GLOBAL_VARS["network_rules"] = project_settings.NETWORK_RULES
             else:
                 logger.error(f"Project path not found: {project_path}")
                 return
@@ -116,6 +255,10 @@ def run(**kwargs):
         video = kwargs.get("video", "") or None
         RunConfig.video = video.lower() if video else RunConfig.video
 
+        # 如果命令行没有传递har， 默认使用RunConfig.har的值
+        har = kwargs.get("har", "") or None
+        RunConfig.har = har.lower() if har else RunConfig.har
+
         # ------------------------ 捕获日志----------------------------
         # ------------------------ 设置pytest相关参数 ------------------------
         arg_list = ["-vs", f"--maxfail={RunConfig.max_fail}", f"--reruns={RunConfig.rerun}",
@@ -125,6 +268,12 @@ def run(**kwargs):
         if RunConfig.video:
              arg_list.append(f"--video={RunConfig.video}")
 
+        # HAR录制/回放，HAR文件保存在项目目录下（已加入.gitignore，请求体、响应体中可能包含账号和token，不要提交到代码库）
+        if RunConfig.har != "off":
+            arg_list.append(f"--har={RunConfig.har}")
+            if project_path:
+                arg_list.append(f"--har-dir={os.path.join(project_path, 'hars')}")
+
         if RunConfig.mode == "headed":
             arg_list.append("--headed")
 
@@ -166,9 +315,11 @@ def run(**kwargs):
         GLOBAL_VARS.update(ENV_VARS[env_key])
         # ------------------------ pytest执行测试用例 ------------------------
         logger.debug(f"pytest运行的参数：{arg_list}")
-        pytest.main(args=arg_list)
+        if workers > 1:
+            run_in_workers(arg_list=arg_list, workers=workers, project_path=project_path)
+        else:
+            pytest.main(args=arg_list)
         # ------------------------ 生成测试报告 ------------------------
-        # ------------------------ 启动报告服务 ------------------------
         if kwargs.get("report") == "yes":
             # generate_allure_report 会将 json 结果转换成 html 报告，并打包成 zip
             report_path, attachment_path = generate_allure_report(allure_results=ALLURE_RESULTS_DIR,
@@ -181,6 +332,11 @@ def run(**kwargs):
                                                                   attachment_path=os.path.join(REPORT_DIR,
                                                                                                f'autotest_report.zip'))
 
+            # ------------------------ 发送测试结果 ------------------------
+            # 测试结果从 test_results.jsonl 汇总，不需要等待报告服务打开、关闭后再发送
+            send_result(report_info=ENV_VARS["common"], report_path=report_path, attachment_path=attachment_path)
+
+            # ------------------------ 启动报告服务 ------------------------
             # 如果不是定时任务模式，则自动打开报告
             if kwargs.get("scheduled") != "on":
                 # 自动打开报告并在60s后关闭
@@ -204,10 +360,6 @@ def run(**kwargs):
                     logger.info("测试报告服务已关闭。")
             else:
                 logger.info("定时任务模式，跳过自动打开测试报告。")
-
-            # ------------------------ 发送测试结果 ------------------------
-
-            send_result(report_info=ENV_VARS["common"], report_path=report_path, attachment_path=attachment_path)
     except Exception as e:
         raise e
 
@@ -227,6 +379,8 @@ if __name__ == '__main__':
     parser.add_argument("-recording", default="converted",
                         help="选择运行录制脚本模式：converted（默认）| raw | all")
     parser.add_argument("-video", default="off", help="是否开启视频录制：on, off, retain-on-failure")
+    parser.add_argument("-har", help="HAR录制/回放模式：off, record, replay（回放不调用登录接口，需要登录的用例使用.auth中缓存的登录态）")
+    parser.add_argument("-workers", type=int, help="并行执行的worker进程数，默认1（不开启并行）")
     args = parser.parse_args()
     run(**vars(args))
 
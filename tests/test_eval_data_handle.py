@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# @Version: Python 3.13
+# @Author  : 会飞的🐟
+# @File    : test_eval_data_handle.py
+# @Software: PyCharm
+# @Desc: ${}表达式沙箱的回归用例：表达式不能通过命名空间中的对象访问到 os、sys 等模块
+
+import os
+import json
+import pytest
+from utils.data_utils.data_handle import DataHandle, data_handle
+from utils.data_utils.eval_data_handle import UnsafeExpressionError, safe_eval
+
+NAMESPACE = DataHandle().namespace
+
+
+@pytest.mark.parametrize("expr", [
+    "json.codecs.sys.modules['os'].getcwd()",
+    "json.codecs.sys",
+    "random.os",
+    "datetime.sys",
+    "base64.binascii",
+])
+def test_module_attribute_chain_is_rejected(expr):
+    with pytest.raises((UnsafeExpressionError, AttributeError)):
+        safe_eval(expr, NAMESPACE)
+
+
+@pytest.mark.parametrize("expr", [
+    "${json.codecs.sys.modules['os'].getcwd()}",
+    "${random.os.system('echo unsafe')}",
+])
+def test_data_handle_does_not_escape_sandbox(expr):
+    assert data_handle(expr, {}) == expr
+    assert data_handle(expr, {}) != os.getcwd()
+
+
+@pytest.mark.parametrize("expr", ["m.codecs", "m.codecs.sys.modules['os'].getcwd()", "[m][0]", "{'m': m}['m']"])
+def test_attribute_or_subscript_returning_module_is_rejected(expr):
+    # 即使模块被放进了命名空间，通过属性访问、下标也取不到模块
+    with pytest.raises(UnsafeExpressionError):
+        safe_eval(expr, {"m": json})
+
+
+@pytest.mark.parametrize("expr", ["d.now().__class__", "len.__self__", "FakerData.mro()"])
+def test_private_and_forbidden_attributes_are_rejected(expr):
+    with pytest.raises(UnsafeExpressionError):
+        safe_eval(expr, NAMESPACE)
+
+
+@pytest.mark.parametrize("expr, expected", [
+    ("${random.choice([1])}", 1),
+    ("${json.dumps({'a': 1})}", '{"a": 1}'),
+    ("${base64.b64encode(b'a').decode()}", "YQ=="),
+    ("${datetime(2024, 1, 2).year}", 2024),
+    ("${[1, 2][1]}", 2),
+])
+def test_whitelisted_functions_still_work(expr, expected):
+    assert data_handle(expr, {}) == expected
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# @Version: Python 3.13
+# @Author  : 会飞的🐟
+# @File    : test_network_filter.py
+# @Software: PyCharm
+# @Desc: 静态资源缓存的回归用例：只有文件名中带内容哈希的资源才认为不可变，其他资源需要重新校验
+
+import pytest
+from utils.base_utils.network_filter import is_immutable
+
+
+@pytest.mark.parametrize("url", [
+    "https://cdn.example.com/static/main.3f9a8b2c.js",
+    "https://cdn.example.com/assets/index-BfK2x9a1.css",
+    "https://cdn.example.com/umi.a1b2c3d4e5f6.js?v=1",
+    "https://cdn.example.com/chunk-0123456789abcdef.js",
+])
+def test_content_hashed_names_are_immutable(url):
+    assert is_immutable(url, {})
+
+
+@pytest.mark.parametrize("url", [
+    "https://cdn.example.com/app_v2_bundle1.js",
+    "https://cdn.example.com/vendor_20240101.js",
+    "https://cdn.example.com/umi.js",
+    "https://cdn.example.com/static/bootstrap.min.css",
+    "https://cdn.example.com/static/components.js",
+])
+def test_names_without_content_hash_are_revalidated(url):
+    assert not is_immutable(url, {})
+
+
+def test_cache_control_immutable():
+    assert is_immutable("https://cdn.example.com/umi.js", {"cache-control": "public, max-age=31536000, immutable"})
@@ -11,8 +11,33 @@ from playwright.sync_api import APIResponse
 from loguru import logger
 from utils.models import AssertMethod
 from utils.assertion_utils import assert_function
-from utils.data_utils.extract_data_handle import json_extractor, re_extract
-from utils.database_utils.mysql_handle import MysqlServer
+from utils.data_utils.extract_data_handle import json_extractor, re_extract, stream_extract
+from utils.database_utils.mysql_handle import mysql_pool
+
+
+def _stop_when_contains(expect_value):
+    seen = False
+
+    def satisfied(found, matches):
+        nonlocal seen
+        seen = seen or expect_value in found["actual"]
+        return seen and len(matches["actual"]) > 1
+
+    return satisfied
+
+
+def _stop_when_length_reaches(minimum):
+    return lambda found, matches: len(matches["actual"]) > 1 and len(matches["actual"]) >= minimum
+
+
+# 流式断言中可以提前停止读取的断言类型：{断言类型: 根据预期结果生成 stream_extract 的 satisfied 参数}
+# 只包含结果随行数增加不会被推翻的断言：包含某个值、长度至少为N（length_less_than 即 预期值 < 实际长度）；
+# 至少匹配到2个值后才停止，此时提取结果已经是列表，与读完全部数据后的结果类型一致
+_STREAM_EARLY_STOP = {
+    "contains": _stop_when_contains,
+    "length_less_than": lambda expect_value: _stop_when_length_reaches(expect_value + 1),
+    "length_less_than_or_equals": _stop_when_length_reaches,
+}
 
 
 class AssertUtils:
@@ -27,8 +52,8 @@ class AssertUtils:
 
         self.assert_data = assert_data
         self.response = response
-        if assert_data and db_info:
-            self.db_connect = MysqlServer(**db_info)
+        # 数据库连接在查询时才从连接池借出，查询结束后归还
+        self.db_info = db_info
 
     @property
     def get_message(self):
@@ -59,7 +84,8 @@ class AssertUtils:
         if "sql" not in self.assert_data.keys() or self.assert_data["sql"] is None:
             logger.error(f"断言数据: {self.assert_data} 缺少 'sql' 属性或 'sql' 为空")
             raise ValueError("断言数据: {self.assert_data} 缺少 'sql' 属性或 'sql' 为空")
-        return self.db_connect.query_all(sql=self.assert_data["sql"])
+        with mysql_pool.connection(self.db_info) as db_connect:
+            return db_connect.query_all(sql=self.assert_data["sql"])
 
     def get_actual_value_by_response(self):
         """
@@ -84,6 +110,8 @@ class AssertUtils:
         通过jsonpath表达式从数据库查询结果中获取实际结果
         通过正则表达式从数据库查询结果中获取实际结果
         """
+        if self.assert_data.get("stream"):
+            return self.get_actual_value_by_sql_stream()
         if "type_jsonpath" in self.assert_data and self.assert_data["type_jsonpath"]:
             return json_extractor(obj=self.get_sql_result, expr=self.assert_data["type_jsonpath"])
         elif "type_re" in self.assert_data and self.assert_data["type_re"]:
@@ -91,6 +119,34 @@ class AssertUtils:
         else:
             return self.get_sql_result
 
+    def get_actual_value_by_sql_stream(self):
+        """
+        断言数据中配置了 stream: true 时，逐行读取数据库查询结果并提取实际结果
+        jsonpath 表达式以单行数据为根，例如：$.id；正则表达式匹配单行数据转换成的字符串
+
+        只有 _STREAM_EARLY_STOP 中的断言类型会在结果已经能让断言通过时不再读取剩余的数据，
+        其他断言类型的结果可能被后面的数据推翻，必须读完整个结果集；
+        匹配数超过 max_matches（默认1000）时直接报错，不会截断后再断言
+        """
+        if self.assert_data.get("type_jsonpath"):
+            expr = ("type_jsonpath", self.assert_data["type_jsonpath"])
+        elif self.assert_data.get("type_re"):
+            expr = ("type_re", self.assert_data["type_re"])
+        else:
+            logger.warning("流式断言需要配置 type_jsonpath 或 type_re，将读取全部查询结果")
+            return self.get_sql_result
+        if not self.assert_data.get("sql"):
+            logger.error(f"断言数据: {self.assert_data} 缺少 'sql' 属性或 'sql' 为空")
+            raise ValueError(f"断言数据: {self.assert_data} 缺少 'sql' 属性或 'sql' 为空")
+
+        early_stop = _STREAM_EARLY_STOP.get(self.get_assert_type)
+        satisfied = early_stop(self.get_expect_value) if early_stop else None
+        with mysql_pool.connection(self.db_info) as db_connect:
+            rows = db_connect.iter_query(sql=self.assert_data["sql"])
+            results = stream_extract(rows, {"actual": expr}, satisfied=satisfied,
+                                     max_matches=self.assert_data.get("max_matches", 1000), strict=True)
+        return results["actual"]
+
     @property
     def get_expect_value(self):
         """
@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+# @Version: Python 3.13
+# @Author  : 会飞的🐟
+# @File    : __init__.py
+# @Software: PyCharm
+# @Desc: TODO: Description
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# @Version: Python 3.13
+# @Author  : 会飞的🐟
+# @File    : storage_state_handle.py
+# @Software: PyCharm
+# @Desc: 登录态(storage_state)缓存，按 环境+用户 保存在 .auth 目录下，过期才重新登录
+
+import os
+import json
+import time
+from typing import Callable, Optional
+from loguru import logger
+from slugify import slugify
+from config.path_config import AUTH_DIR
+from config.settings import AUTH_STATE_TTL
+
+
+class StorageStateCache:
+    """
+    登录态缓存
+
+    使用方式：
+        cache = StorageStateCache(env="https://clueapi-dev.spreadwin.cn", user="xiaojing")
+        auth_path = cache.get(login=lambda path: ...)  # login 负责登录并把 storage_state 写入 path
+        context = browser.new_context(storage_state=auth_path)
+
+    缓存文件按 环境+用户 区分，例如：.auth/clueapi-dev-spreadwin-cn-xiaojing.json，
+    只有在缓存文件不存在、超过有效期(ttl)、或者其中的 cookie 已过期时，才会调用 login 重新登录。
+    """
+
+    def __init__(self, env: str, user: str, ttl: int = AUTH_STATE_TTL, auth_dir: str = AUTH_DIR):
+        """
+        :param env: 环境标识，通常使用接口域名
+        :param user: 登录用户名
+        :param ttl: 缓存有效期（秒）
+        :param auth_dir: 缓存文件保存目录
+        """
+        self.env = env
+        self.user = user
+        self.ttl = ttl
+        self.path = os.path.join(auth_dir, f"{slugify(f'{env}-{user}')}.json")
+
+    def is_valid(self) -> bool:
+        """
+        判断缓存的登录态是否仍然可用
+        """
+        if not os.path.isfile(self.path):
+            return False
+        if time.time() - os.path.getmtime(self.path) > self.ttl:
+            logger.info(f"登录态缓存已超过有效期({self.ttl}s)：{self.path}")
+            return False
+        try:
+            with open(self.path, mode="r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"登录态缓存文件无法解析，将重新登录：{self.path}，错误：{e}")
+            return False
+        # expires=-1 表示会话cookie；预留60秒余量，避免用例执行过程中cookie过期
+        now = time.time() + 60
+        for cookie in state.get("cookies", []):
+            expires = cookie.get("expires", -1)
+            if 0 < expires < now:
+                logger.info(f"登录态缓存中的cookie已过期：{cookie.get('name')}")
+                return False
+        return True
+
+    def get(self, login: Callable[[str], None]) -> str:
+        """
+        获取可用的登录态文件路径，缓存不可用时调用 login 刷新
+        :param login: 登录方法，接收一个文件路径参数，需要将登录后的 storage_state 写入该路径
+        :return: storage_state 文件路径
+        """
+        if self.is_valid():
+            logger.info(f"复用已缓存的登录态：{self.path}")
+            return self.path
+        # 先写临时文件再替换，避免并行的 worker 读到写了一半的文件
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        login(tmp_path)
+        os.replace(tmp_path, self.path)
+        logger.info(f"登录态已刷新并保存至: {self.path}")
+        return self.path
+
+    @property
+    def verified_path(self) -> str:
+        """
+        登录态已在页面上校验过的标记文件
+        """
+        return f"{self.path}.verified"
+
+    def is_verified(self) -> bool:
+        """
+        当前缓存的登录态是否已经校验过：标记文件在登录态文件写入之后生成，登录态刷新后标记自动失效
+        """
+        if not (self.is_valid() and os.path.isfile(self.verified_path)):
+            return False
+        return os.path.getmtime(self.verified_path) >= os.path.getmtime(self.path)
+
+    def mark_verified(self) -> None:
+        """
+        记录当前缓存的登录态已校验通过
+        """
+        with open(self.verified_path, mode="w", encoding="utf-8") as f:
+            f.write(str(time.time()))
+
+    def invalidate(self) -> Optional[str]:
+        """
+        删除缓存的登录态，下次 get 时强制重新登录
+        """
+        if os.path.isfile(self.verified_path):
+            os.remove(self.verified_path)
+        if os.path.isfile(self.path):
+            os.remove(self.path)
+            return self.path
+        return None
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+# @Version: Python 3.13
+# @Author  : 会飞的🐟
+# @File    : action_profiler.py
+# @Software: PyCharm
+# @Desc: 页面操作耗时统计：记录 BasePage 及页面对象每个方法的调用耗时、元素定位和所属页面类
+
+import functools
+import inspect
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 从这些参数中获取操作的目标（元素定位或者url）
+_TARGET_PARAMS = ("locator", "url", "selector")
+
+
+class ActionRecord:
+    """
+    一次页面操作的耗时记录
+    """
+
+    __slots__ = ("test", "page", "method", "target", "stack", "duration_ms", "self_ms")
+
+    def __init__(self, test: Optional[str], page: str, method: str, target: Optional[str], stack: Tuple[str, ...]):
+        self.test = test
+        self.page = page
+        self.method = method
+        self.target = target
+        # 调用栈，最后一个元素是当前操作，例如：("LoginPage.login", "LoginPage.input[#username]")
+        self.stack = stack
+        self.duration_ms = 0.0
+        # 扣除内部调用的其他页面操作后的耗时
+        self.self_ms = 0.0
+
+
+class ActionProfiler:
+    """
+    页面操作耗时统计（进程内共享，使用模块级的 action_profiler 实例）
+
+    BasePage 及其子类的公开方法会自动被 profile_method 包装，每次调用生成一条 ActionRecord；
+    页面对象的方法中调用的其他页面操作会记录为它的下一层，用于生成火焰图格式（folded stacks）的汇总。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.enabled = True
+        # 当前执行的用例，由 pytest 插件设置
+        self.current_test: Optional[str] = None
+        # 尚未按用例取出的记录，以及已经取出的记录
+        self.records: List[ActionRecord] = []
+        self.finished: List[ActionRecord] = []
+
+    def _stack(self) -> List[ActionRecord]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def call(self, page: str, method: str, target: Optional[str], func: Callable, *args, **kwargs) -> Any:
+        """
+        执行并记录一次页面操作
+        """
+        stack = self._stack()
+        # 火焰图格式以 ; 分隔调用栈，元素定位中的 ; 需要替换掉
+        frame = f"{page}.{method}[{target.replace(';', ',')}]" if target is not None else f"{page}.{method}"
+        record = ActionRecord(self.current_test, page, method, target,
+                              (stack[-1].stack if stack else ()) + (frame,))
+        stack.append(record)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record.duration_ms = (time.perf_counter() - start) * 1000
+            record.self_ms += record.duration_ms
+            stack.pop()
+            if stack:
+                stack[-1].self_ms -= record.duration_ms
+            with self._lock:
+                self.records.append(record)
+
+    def caller(self) -> Optional[str]:
+        """
+        当前页面操作的调用方，例如在 AccountPage.click_btn_new_account 中调用 self.wait(2) 时，
+        在 wait 内部获取到的是 "AccountPage.click_btn_new_account"
+        """
+        stack = self._stack()
+        return stack[-2].stack[-1] if len(stack) > 1 else None
+
+    def pop_test_records(self, test: str) -> List[ActionRecord]:
+        """
+        取出指定用例的所有操作记录，未取出的记录（例如session级fixture中的操作）保留在会话汇总中
+        """
+        with self._lock:
+            records = [record for record in self.records if record.test == test]
+            self.finished.extend(records)
+            self.records = [record for record in self.records if record.test != test]
+        return records
+
+    def all_records(self) -> List[ActionRecord]:
+        """
+        会话中的所有操作记录
+        """
+        with self._lock:
+            return self.finished + self.records
+
+
+def folded_stacks(records: List[ActionRecord], root: Optional[str] = None) -> Dict[str, float]:
+    """
+    将操作记录汇总成火焰图格式：{"调用栈(以;分隔)": 自身耗时ms}，可以直接交给 flamegraph.pl / speedscope 生成火焰图
+    :param root: 加在每个调用栈最前面的根节点，例如用例名称
+    """
+    folded: Dict[str, float] = {}
+    for record in records:
+        key = ";".join(((root,) if root else ()) + record.stack)
+        folded[key] = folded.get(key, 0.0) + max(record.self_ms, 0.0)
+    return folded
+
+
+def format_folded(folded: Dict[str, float]) -> str:
+    """
+    输出火焰图格式的文本，每行：调用栈 耗时(ms，取整)，按耗时倒序
+    """
+    return "\n".join(f"{stack} {round(ms)}" for stack, ms in sorted(folded.items(), key=lambda x: -x[1]))
+
+
+def locator_stats(records: List[ActionRecord]) -> List[dict]:
+    """
+    按 页面类+方法+元素定位 汇总耗时，按总耗时倒序
+    """
+    stats: Dict[Tuple[str, str, Optional[str]], dict] = {}
+    for record in records:
+        key = (record.page, record.method, record.target)
+        item = stats.setdefault(key, {"page": record.page, "method": record.method, "target": record.target,
+                                      "count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        item["count"] += 1
+        item["total_ms"] += record.duration_ms
+        item["max_ms"] = max(item["max_ms"], record.duration_ms)
+    return sort_locator_stats(stats.values())
+
+
+def merge_locator_stats(*stats_list: List[dict]) -> List[dict]:
+    """
+    合并多个进程的 locator_stats 结果
+    """
+    merged: Dict[Tuple[str, str, Optional[str]], dict] = {}
+    for stats in stats_list:
+        for item in stats:
+            key = (item["page"], item["method"], item["target"])
+            if key not in merged:
+                merged[key] = {**item}
+                continue
+            merged[key]["count"] += item["count"]
+            merged[key]["total_ms"] += item["total_ms"]
+            merged[key]["max_ms"] = max(merged[key]["max_ms"], item["max_ms"])
+    return sort_locator_stats(merged.values())
+
+
+def sort_locator_stats(stats) -> List[dict]:
+    result = []
+    for item in stats:
+        item["total_ms"] = round(item["total_ms"], 3)
+        item["max_ms"] = round(item["max_ms"], 3)
+        item["avg_ms"] = round(item["total_ms"] / item["count"], 3)
+        result.append(item)
+    return sorted(result, key=lambda x: -x["total_ms"])
+
+
+def format_locator_table(stats: List[dict], limit: int = 20) -> str:
+    """
+    输出最慢元素定位的表格文本
+    """
+    lines = [f"{'total(ms)':>14} {'count':>8} {'avg(ms)':>12} {'max(ms)':>12}  action"]
+    for item in stats[:limit]:
+        target = f" | {item['target']}" if item["target"] is not None else ""
+        lines.append(f"{item['total_ms']:>14.1f} {item['count']:>8} {item['avg_ms']:>12.1f} {item['max_ms']:>12.1f}  "
+                     f"{item['page']}.{item['method']}{target}")
+    return "\n".join(lines)
+
+
+def profile_method(func: Callable) -> Callable:
+    """
+    包装页面对象的方法，调用时记录耗时、元素定位（locator/url/selector参数）和页面类
+    """
+    if getattr(func, "__profiled__", False):
+        return func
+    try:
+        params = list(inspect.signature(func).parameters)
+    except (TypeError, ValueError):
+        params = []
+    target_name = next((name for name in _TARGET_PARAMS if name in params), None)
+    target_index = params.index(target_name) if target_name else None
+    method = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if not action_profiler.enabled:
+            return func(self, *args, **kwargs)
+        target = None
+        if target_name:
+            if target_name in kwargs:
+                target = kwargs[target_name]
+            elif target_index is not None and 0 < target_index <= len(args):
+                target = args[target_index - 1]
+            if target is not None and not isinstance(target, str):
+                target = str(target)
+        return action_profiler.call(type(self).__name__, method, target, func, self, *args, **kwargs)
+
+    wrapper.__profiled__ = True
+    return wrapper
+
+
+def profile_class(cls: type) -> type:
+    """
+    包装类中直接定义的所有公开方法（不包括静态方法、类方法和属性）
+    """
+    for name, value in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.isfunction(value):
+            continue
+        setattr(cls, name, profile_method(value))
+    return cls
+
+
+action_profiler = ActionProfiler()
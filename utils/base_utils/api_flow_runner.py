@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+# @Version: Python 3.13
+# @Author  : 会飞的🐟
+# @File    : api_flow_runner.py
+# @Software: PyCharm
+# @Desc: 接口流程编排：根据接口之间的变量依赖自动并行执行多个接口，返回合并后的变量
+
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Union
+from loguru import logger
+from config.settings import API_CONCURRENCY
+from utils.base_utils.api_registry import api_registry
+from utils.base_utils.async_request_control import AsyncRequestControl, run_with_request_context
+from utils.data_utils.template_handle import compile_template, VAR, EXPR
+
+# extract 中的数据来源关键字，其下一层才是 提取方式: {变量名: 表达式}
+_EXTRACT_SOURCES = {"case", "database", "response"}
+# 数据库提取中不是提取方式的配置项
+_EXTRACT_OPTIONS = {"sql", "stream", "max_matches"}
+# 流程编排使用的配置项，不属于请求数据
+_FLOW_OPTIONS = {"extract", "depends_on", "barrier"}
+# 接口id中包含这些关键字时视为屏障步骤：登录接口通过共享的 APIRequestContext 设置cookie/会话，
+# 后面的接口不一定通过 ${变量} 使用它的提取结果，但都依赖它的登录态
+BARRIER_KEYWORDS = ("login",)
+
+
+def template_vars(obj: Any) -> Set[str]:
+    """
+    获取数据中所有 ${name}、$name 占位符使用的变量名（包括表达式中嵌套的变量）
+    """
+    names: Set[str] = set()
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            names |= template_vars(k)
+            names |= template_vars(v)
+    elif isinstance(obj, (list, tuple)):
+        for v in obj:
+            names |= template_vars(v)
+    elif isinstance(obj, str) and "$" in obj:
+        _collect_vars(compile_template(obj).nodes, names)
+    return names
+
+
+def _collect_vars(nodes: List[tuple], names: Set[str]) -> None:
+    for node in nodes:
+        if node[0] == VAR:
+            names.add(node[1])
+        elif node[0] == EXPR:
+            _collect_vars(node[1], names)
+
+
+def extract_keys(extract: Optional[dict]) -> Set[str]:
+    """
+    获取接口 extract 中定义的所有变量名，例如：
+        {"type_jsonpath": {"user_id": "$.data.id"}, "database": {"sql": "...", "type_re": {"name": "..."}}}
+        --> {"user_id", "name"}
+    """
+    keys: Set[str] = set()
+    for k, v in (extract or {}).items():
+        if not isinstance(v, dict):
+            continue
+        if k.lower() in _EXTRACT_SOURCES:
+            for _k, _v in v.items():
+                if _k.lower() not in _EXTRACT_OPTIONS and isinstance(_v, dict):
+                    keys.update(_v)
+        else:
+            keys.update(v)
+    return keys
+
+
+class FlowStep:
+    """
+    流程中的一个接口
+    """
+
+    __slots__ = ("index", "api", "uses", "produces", "var_sources", "depends", "barrier")
+
+    def __init__(self, index: int, api: dict):
+        self.index = index
+        self.api = api
+        # extract 中的表达式在提取时才使用，不算作请求依赖的变量
+        self.uses = template_vars({k: v for k, v in api.items() if k not in _FLOW_OPTIONS})
+        self.produces = extract_keys(api.get("extract"))
+        # 变量名 -> 提供该变量的步骤序号
+        self.var_sources: Dict[str, int] = {}
+        # 需要等待完成的所有步骤序号：变量依赖 + depends_on 声明的依赖 + 屏障步骤
+        self.depends: Set[int] = set()
+        self.barrier = bool(api.get("barrier")) or any(
+            keyword in str(api.get("id", "")).lower() for keyword in BARRIER_KEYWORDS)
+
+    @property
+    def name(self) -> str:
+        return f"{self.api.get('title')} ({self.api.get('id')})"
+
+
+class ApiFlowRunner:
+    """
+    接口流程编排
+
+    按列表顺序给出一组接口（接口id或接口定义），依赖关系由以下几部分组成：
+    1. 变量依赖：某个接口使用的 ${变量} 由它前面的接口提取时，依赖于最近的那个接口，其余变量从 global_var 中获取
+    2. 显式依赖：接口定义中的 depends_on: [接口id, ...]，依赖前面最近的同id接口；
+       用于变量推断不到的依赖，例如前一个接口修改了后一个接口要查询的数据
+    3. 屏障步骤：接口定义中 barrier: true，或者接口id中包含 BARRIER_KEYWORDS（例如登录接口）。
+       登录态保存在共享的 APIRequestContext 中，变量推断不到，因此屏障步骤等待前面的所有接口完成，
+       后面的所有接口也都等待它完成
+    没有依赖关系的接口并发执行，每个接口在其依赖的接口全部完成后立即开始，
+    总耗时取决于依赖链中最长的那条路径，而不是所有接口耗时之和。
+
+    返回的变量与按列表顺序逐个执行、每次都把提取结果更新到 global_var 的结果一致。
+
+    使用方式：
+        # clue_login 是屏障步骤，先执行完；add_customer、add_label 并发执行，bind_label 等待两者提取的变量
+        runner = ApiFlowRunner(["clue_login", "add_customer", "add_label", "bind_label"], api_file_path=interface_dir)
+        variables = runner.run(global_var=GLOBAL_VARS, base_url=GLOBAL_VARS["host"])
+    """
+
+    def __init__(self, steps: List[Union[str, dict]], api_file_path: str = None, db_info: dict = None):
+        """
+        :param steps: 接口列表，元素为接口id（从 api_file_path 中查找）或接口定义字典
+        :param api_file_path: 接口yaml文件路径，可以是目录，也可以是文件
+        :param db_info: 数据库连接信息，用于数据库断言/数据库提取数据时连接数据库
+        """
+        self.db_info = db_info
+        self.steps: List[FlowStep] = []
+        producers: Dict[str, int] = {}
+        # 接口id -> 最近的该接口的步骤序号
+        step_ids: Dict[str, int] = {}
+        last_barrier: Optional[int] = None
+        for index, step in enumerate(steps):
+            if isinstance(step, str):
+                api = api_registry.get(api_file_path=api_file_path, key=step)
+                if api is None:
+                    raise Exception(f"路径： {api_file_path}， 未找到id为{step}的接口")
+            else:
+                api = step
+            flow_step = FlowStep(index, api)
+            flow_step.var_sources = {var: producers[var] for var in flow_step.uses if var in producers}
+            flow_step.depends = set(flow_step.var_sources.values())
+            for step_id in api.get("depends_on") or []:
+                if step_id not in step_ids:
+                    raise Exception(f"接口 {flow_step.name} 的 depends_on 中的 {step_id} 不在它前面的步骤中")
+                flow_step.depends.add(step_ids[step_id])
+            if flow_step.barrier:
+                flow_step.depends.update(range(index))
+            elif last_barrier is not None:
+                flow_step.depends.add(last_barrier)
+            for var in flow_step.produces:
+                producers[var] = index
+            if api.get("id") is not None:
+                step_ids[api["id"]] = index
+            if flow_step.barrier:
+                last_barrier = index
+            self.steps.append(flow_step)
+
+    def levels(self) -> List[List[FlowStep]]:
+        """
+        按依赖深度对接口分层，同一层的接口之间没有依赖关系；层数即依赖链中最长路径上的接口数
+        """
+        depth: Dict[int, int] = {}
+        result: List[List[FlowStep]] = []
+        for step in self.steps:
+            depth[step.index] = max((depth[i] + 1 for i in step.depends), default=0)
+            if depth[step.index] == len(result):
+                result.append([])
+            result[depth[step.index]].append(step)
+        return result
+
+    async def run_async(self, control: AsyncRequestControl, global_var: dict = None,
+                        concurrency: int = API_CONCURRENCY) -> Dict[str, Any]:
+        """
+        执行流程
+        :param control: 发送请求使用的 AsyncRequestControl
+        :param global_var: 全局变量，用于替换接口数据中的 ${}
+        :param concurrency: 同时进行中的请求数上限
+        :return: global_var 与所有接口提取结果合并后的变量
+        :raise: 任意一个接口失败时抛出该异常，尚未完成的接口被取消
+        """
+        global_var = dict(global_var or {})
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks: Dict[int, asyncio.Task] = {}
+
+        async def run_step(step: FlowStep) -> Dict[str, Any]:
+            source = dict(global_var)
+            for index in sorted(step.depends):
+                await tasks[index]
+            for var, index in step.var_sources.items():
+                extracted = tasks[index].result()
+                if var in extracted:
+                    source[var] = extracted[var]
+            async with semaphore:
+                logger.debug("开始执行流程步骤：{}，依赖步骤：{}", step.name, sorted(step.depends))
+                res = await control.api_request_flow_async(request_data=step.api, global_var=source,
+                                                           db_info=self.db_info)
+            return {k: res[k] for k in step.produces if k in res}
+
+        logger.info("开始执行接口流程，接口数：{}，依赖层数：{}", len(self.steps), len(self.levels()))
+        for step in self.steps:
+            tasks[step.index] = asyncio.ensure_future(run_step(step))
+        try:
+            results = await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+        for extracted in results:
+            global_var.update(extracted)
+        return global_var
+
+    def run(self, global_var: dict = None, concurrency: int = API_CONCURRENCY, **context_kwargs) -> Dict[str, Any]:
+        """
+        在同步代码中执行流程，参数见 run_async
+        :param context_kwargs: base_url、storage_state 等 APIRequestContext 参数，见 run_with_request_context
+        """
+        return run_with_request_context(
+            lambda control: self.run_async(control, global_var=global_var, concurrency=concurrency),
+            **context_kwargs)
+
+
+if __name__ == '__main__':
+    demo_steps = [
+        {"id": "clue_login", "title": "登录", "url": "/login", "method": "POST", "request_type": "json",
+         "payload": {"user_name": "${user_name}"}, "extract": {"type_jsonpath": {"token": "$.token"}}},
+        {"id": "add_customer", "title": "新增客户", "url": "/customer", "method": "POST", "request_type": "json",
+         "headers": {"token": "${token}"}, "extract": {"type_jsonpath": {"customer_id": "$.id"}}},
+        {"id": "add_label", "title": "新增标签", "url": "/label", "method": "POST", "request_type": "json",
+         "headers": {"token": "${token}"}, "extract": {"type_jsonpath": {"label_id": "$.id"}}},
+        {"id": "list_customer", "title": "客户列表", "url": "/customer", "method": "GET", "request_type": "params",
+         "depends_on": ["add_customer"]},
+        {"id": "bind_label", "title": "客户绑定标签", "url": "/customer/${customer_id}/labels", "method": "POST",
+         "request_type": "json", "headers": {"token": "${token}"}, "payload": {"label_ids": "${[${label_id}]}"}},
+    ]
+    for level, level_steps in enumerate(ApiFlowRunner(demo_steps).levels()):
+        print(level, [(s.name, sorted(s.depends)) for s in level_steps])
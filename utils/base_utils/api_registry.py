@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# @Version: Python 3.13
+# @Author  : 会飞的🐟
+# @File    : api_registry.py
+# @Software: PyCharm
+# @Desc: 接口定义注册表：interfaces 目录只加载一次，按接口id建立索引，文件修改后自动重新加载
+
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+from loguru import logger
+from utils.files_utils.yaml_handle import YamlHandle
+from utils.files_utils.files_handle import get_files
+
+
+class ApiRegistry:
+    """
+    接口定义注册表（进程内共享，使用模块级的 api_registry 实例）
+
+    - 每个路径（目录或文件）第一次查询时加载其下所有 yaml/yml 文件，建立 接口id(小写) -> 接口定义 的索引
+    - 命中时只检查该接口所在文件的修改时间，文件有变化才重新加载；未命中时重新扫描目录，以便发现新增的文件
+    - 同一路径下存在重复的接口id时，加载时给出警告，使用先加载到的定义（与原先顺序查找的结果一致）
+    - 返回的接口定义是yaml缓存中的只读对象(FrozenDict)，需要修改时先使用 thaw() 复制
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # 文件路径 -> (修改时间, 文件中的接口列表)
+        self._files: Dict[str, Tuple[float, List[dict]]] = {}
+        # 查询路径 -> {接口id(小写): (所在文件, 接口定义)}
+        self._indexes: Dict[str, Dict[str, Tuple[str, dict]]] = {}
+
+    def get(self, api_file_path: str, key: str) -> Optional[dict]:
+        """
+        根据接口id获取接口定义
+        :param api_file_path: 接口yaml文件路径，可以是目录，也可以是文件
+        :param key: 接口id，不区分大小写
+        :return: 接口定义，未找到时返回None
+        """
+        root = os.path.abspath(api_file_path)
+        key = key.lower()
+        with self._lock:
+            index = self._indexes.get(root)
+            if index is not None:
+                hit = index.get(key)
+                if hit and self._mtime(hit[0]) == self._files.get(hit[0], (None,))[0]:
+                    return hit[1]
+            index = self._load(root)
+            hit = index.get(key)
+            return hit[1] if hit else None
+
+    def clear(self) -> None:
+        """
+        清空所有缓存
+        """
+        with self._lock:
+            self._files.clear()
+            self._indexes.clear()
+
+    @staticmethod
+    def _mtime(path: str) -> Optional[float]:
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return None
+
+    def _read_file(self, api_file: str) -> List[dict]:
+        mtime = self._mtime(api_file)
+        cached = self._files.get(api_file)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        apis = YamlHandle(filename=api_file).read_yaml or []
+        self._files[api_file] = (mtime, apis)
+        return apis
+
+    def _load(self, root: str) -> Dict[str, Tuple[str, dict]]:
+        if os.path.isdir(root):
+            api_files = get_files(target=root, end=".yaml") + get_files(target=root, end=".yml")
+        elif os.path.isfile(root):
+            api_files = [root]
+        else:
+            raise FileNotFoundError(f"目标路径错误，请检查！api_file_path={root}")
+
+        index: Dict[str, Tuple[str, dict]] = {}
+        for api_file in api_files:
+            for api in self._read_file(api_file):
+                api_id = str(api["id"]).lower()
+                if api_id in index:
+                    logger.warning(f"接口id重复：{api['id']}，{index[api_id][0]} 与 {api_file} 中都存在，"
+                                   f"使用 {index[api_id][0]} 中的定义")
+                    continue
+                index[api_id] = (api_file, api)
+        self._indexes[root] = index
+        logger.debug(f"接口定义已加载：{root}，文件数：{len(api_files)}，接口数：{len(index)}")
+        return index
+
+
+api_registry = ApiRegistry()
+
+if __name__ == '__main__':
+    from config.path_config import BASE_DIR
+
+    interface_dir = os.path.join(BASE_DIR, "projects", "clue", "interfaces")
+    print(api_registry.get(interface_dir, "clue_login"))
+    print(api_registry.get(interface_dir, "CLUE_LOGIN") is api_registry.get(interface_dir, "clue_login"))
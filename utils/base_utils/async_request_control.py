@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+# @Version: Python 3.13
+# @Author  : 会飞的🐟
+# @File    : async_request_control.py
+# @Software: PyCharm
+# @Desc: 基于 playwright.async_api 的并发接口请求：批量发送yaml中定义的接口，数据处理、断言、提取与 RequestControl 一致
+
+import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+import allure
+from loguru import logger
+from playwright.async_api import async_playwright, APIRequestContext, APIResponse
+from config.settings import API_CONCURRENCY
+from utils.base_utils.request_control import RequestControl
+from utils.assertion_utils.assert_control import AssertHandle
+from utils.report_utils.timing_handle import PhaseTimer
+
+# request_type 与 fetch 参数的对应关系，与 BaseRequest.send_api 保持一致
+_PAYLOAD_KWARGS = {"json": "data", "form": "form", "multipart": "multipart", "params": "params"}
+
+
+class ResponseSnapshot:
+    """
+    异步响应的快照：响应体在事件循环中一次性读取完毕，之后提供与同步 APIResponse 相同的属性和方法，
+    因此 AssertHandle、after_request、response_extract 等同步代码可以直接使用
+    """
+
+    __slots__ = ("url", "status", "status_text", "headers", "headers_array", "_body")
+
+    def __init__(self, url: str, status: int, status_text: str, headers: Dict[str, str],
+                 headers_array: List[Dict[str, str]], body: bytes):
+        self.url = url
+        self.status = status
+        self.status_text = status_text
+        self.headers = headers
+        self.headers_array = headers_array
+        self._body = body
+
+    @classmethod
+    async def read(cls, response: APIResponse) -> "ResponseSnapshot":
+        """
+        读取异步响应并释放其在浏览器进程中占用的响应体
+        """
+        try:
+            body = await response.body()
+        finally:
+            await response.dispose()
+        return cls(url=response.url, status=response.status, status_text=response.status_text,
+                   headers=response.headers, headers_array=response.headers_array, body=body)
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status <= 299
+
+    def body(self) -> bytes:
+        return self._body
+
+    def text(self) -> str:
+        return self._body.decode("utf-8")
+
+    def json(self) -> Any:
+        return json.loads(self.text())
+
+    def dispose(self) -> None:
+        pass
+
+    def __repr__(self) -> str:
+        return f"<ResponseSnapshot url={self.url!r} status={self.status!r}>"
+
+
+class AsyncRequestControl(RequestControl):
+    """
+    并发发送接口请求
+
+    使用方式（async 代码中）：
+        async with async_playwright() as p:
+            api_request_context = await p.request.new_context(base_url=host)
+            results = await AsyncRequestControl(api_request_context).run_batch_async(items, concurrency=20)
+
+    同步代码（例如 pytest 用例、fixture）中使用模块级的 run_batch 方法。
+
+    每个请求的数据处理(before_request)、断言(AssertHandle)、提取(after_request)都复用 RequestControl 的实现，
+    只有网络请求是异步并发的；断言和提取在响应返回后同步执行，不会与其他请求的allure步骤交叉。
+    """
+
+    def __init__(self, api_request_context: APIRequestContext):
+        super().__init__(api_request_context=api_request_context)
+
+    async def send_request_async(self, req_data: dict) -> ResponseSnapshot:
+        """
+        处理请求数据，转换成可用数据发送请求
+        :param req_data: 请求数据
+        :return: 响应快照
+        """
+        request_type = req_data.get("request_type").lower()
+        if request_type not in _PAYLOAD_KWARGS:
+            logger.error(f"不支持的请求类型: {request_type}, request_type可选关键字为params, json, form, multipart")
+            raise ValueError(
+                f"不支持的请求类型: {request_type}, request_type可选关键字为params, json, form, multipart")
+        try:
+            response = await self.api.fetch(req_data.get("url"), method=req_data.get("method").lower(),
+                                            headers=req_data.get("headers", None),
+                                            **{_PAYLOAD_KWARGS[request_type]: req_data.get("payload", None)})
+            return await ResponseSnapshot.read(response)
+        except Exception as e:
+            logger.error(f"请求出错，{str(e)}")
+            raise ValueError(f"请求出错，{str(e)}")
+
+    async def api_request_flow_async(self, request_data: dict = None, global_var: dict = None,
+                                     api_file_path: str = None, key: str = None, db_info: dict = None) -> dict:
+        """
+        api_request_flow 的异步版本：发送请求并进行断言、后置参数提取操作，参数与返回值和 api_request_flow 一致
+        """
+        if request_data:
+            api_info = request_data
+        elif api_file_path and key:
+            api_info = self.get_api_data(api_file_path=api_file_path, key=key)
+        else:
+            logger.error("请求数据异常")
+            raise ValueError("请求数据异常")
+
+        timer = PhaseTimer()
+        with timer.phase("template"):
+            new_api_data = self.before_request(request_data=api_info, source_data=global_var)
+        try:
+            with timer.phase("network"):
+                response = await self.send_request_async(new_api_data)
+        except Exception:
+            self.record_timing(timer, new_api_data)
+            raise
+
+        # 以下均为同步操作，中间没有 await，同一个请求的allure步骤不会被其他协程打断
+        with allure.step(f"--> 发送接口请求, 接口名称：{api_info.get('title')} ({api_info.get('id')})"):
+            try:
+                with timer.phase("decode"):
+                    self.decode_response(response, new_api_data)
+
+                self.api_step_record(**new_api_data)
+
+                # 进行响应断言
+                with timer.phase("assert"):
+                    AssertHandle(assert_data=new_api_data["assert_response"], response=response).assert_handle()
+
+                # 进行响应参数提取，并返回提取后的数据
+                if new_api_data.get("extract"):
+                    with timer.phase("extract"):
+                        extract_results = self.after_request(response=response, api_data=new_api_data,
+                                                             db_info=db_info)
+                    new_api_data.update(extract_results)
+            finally:
+                self.record_timing(timer, new_api_data, response)
+            logger.debug("接口请求完成后，接口请求数据，响应数据 & 提取数据：{}", new_api_data)
+            return new_api_data
+
+    async def run_batch_async(self, items: Iterable[dict], concurrency: int = API_CONCURRENCY,
+                              return_exceptions: bool = False) -> List[Union[dict, BaseException]]:
+        """
+        并发执行一批接口请求
+        :param items: 每一项都是 api_request_flow_async 的参数字典，例如：
+            {"api_file_path": interface_dir, "key": "create_account", "global_var": {"user_name": "autotest_001"}}
+        :param concurrency: 同时进行中的请求数上限
+        :param return_exceptions: 为True时，失败的请求在结果中返回对应的异常，不影响其他请求；
+            为False时，第一个失败的请求会抛出异常，其余未完成的请求被取消
+        :return: 与 items 顺序一致的结果列表
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run_one(item: dict):
+            async with semaphore:
+                return await self.api_request_flow_async(**item)
+
+        tasks = [asyncio.ensure_future(run_one(item)) for item in items]
+        logger.info("开始并发发送接口请求，请求数：{}，并发数：{}", len(tasks), concurrency)
+        try:
+            return await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def run_with_request_context(func: Callable[["AsyncRequestControl"], Awaitable[Any]], base_url: Optional[str] = None,
+                             storage_state: Union[str, dict, None] = None,
+                             extra_http_headers: Optional[Dict[str, str]] = None,
+                             ignore_https_errors: bool = False) -> Any:
+    """
+    在同步代码中执行一个使用 AsyncRequestControl 的协程函数，并返回其结果
+
+    同步 playwright 在当前线程中已经有一个运行中的事件循环，因此这里在独立的线程中启动 async_playwright，
+    新建一个 APIRequestContext，执行完成后关闭。需要登录态时传入 storage_state，
+    例如浏览器上下文的 context.storage_state()，或者 .auth 目录下缓存的登录态文件路径；
+    这些请求中服务端设置的cookie不会同步回浏览器上下文。
+
+    :param func: 协程函数，接收 AsyncRequestControl 实例
+    :param base_url: 接口域名，接口定义中的url为相对路径时使用
+    :param storage_state: 登录态，文件路径或者 storage_state 字典
+    :param extra_http_headers: 每个请求都携带的请求头
+    :param ignore_https_errors: 是否忽略https证书错误
+    """
+
+    async def _run():
+        async with async_playwright() as p:
+            api_request_context = await p.request.new_context(base_url=base_url, storage_state=storage_state,
+                                                              extra_http_headers=extra_http_headers,
+                                                              ignore_https_errors=ignore_https_errors)
+            try:
+                return await func(AsyncRequestControl(api_request_context))
+            finally:
+                await api_request_context.dispose()
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="async-request") as executor:
+        return executor.submit(asyncio.run, _run()).result()
+
+
+def run_batch(items: Iterable[dict], concurrency: int = API_CONCURRENCY, return_exceptions: bool = False,
+              **context_kwargs) -> List[Union[dict, BaseException]]:
+    """
+    在同步代码中并发执行一批接口请求
+    :param items: 每一项都是 api_request_flow 的参数字典，见 AsyncRequestControl.run_batch_async
+    :param concurrency: 同时进行中的请求数上限
+    :param return_exceptions: 见 AsyncRequestControl.run_batch_async
+    :param context_kwargs: base_url、storage_state 等 APIRequestContext 参数，见 run_with_request_context
+    :return: 与 items 顺序一致的结果列表
+    """
+    items = list(items)
+    return run_with_request_context(
+        lambda control: control.run_batch_async(items, concurrency=concurrency, return_exceptions=return_exceptions),
+        **context_kwargs)
+
+
+if __name__ == '__main__':
+    import time
+
+    api_data = {
+        "id": "get_issues",
+        "title": "查询issue列表",
+        "request_type": "params",
+        "url": "/api/v1/floraachy/openCC/issues",
+        "method": "GET",
+        "headers": {"Content-Type": "application/json; charset=utf-8"},
+        "payload": {"page": "${page}", "limit": 1},
+        "assert_response": {"status_code": 200},
+        "extract": {"type_jsonpath": {"total_count": "$.total_count"}}
+    }
+    start = time.perf_counter()
+    results = run_batch([{"request_data": api_data, "global_var": {"page": i}} for i in range(1, 21)],
+                        concurrency=10, base_url="https://www.gitlink.org.cn", return_exceptions=True)
+    print(f"耗时：{time.perf_counter() - start:.2f}s")
+    for res in results:
+        print(res if isinstance(res, BaseException) else res.get("total_count"))
@@ -7,11 +7,15 @@
 
 import os
 import re
-from typing import Union, Pattern, Optional, Literal, AnyStr
+import time
+from typing import Any, Callable, Union, Pattern, Optional, Literal, AnyStr
 import allure
 from loguru import logger
-from playwright.sync_api import Page
+from playwright.sync_api import Page, Response
 from playwright.sync_api import expect
+from utils.base_utils.action_profiler import action_profiler, profile_class
+from utils.base_utils.wait_handle import poll, sleep_ledger
+from utils.report_utils.attachment_store import attachment_store
 
 
 class BasePage:
@@ -19,6 +23,27 @@ class BasePage:
     Playwright UI自动化基础操作封装
     """
 
+    # --------------------------------- 页面就绪条件 ---------------------------------#
+    """
+    visit/refresh 之后等待页面"就绪"的条件，页面对象可以按需覆写：
+        • ready_state：等待的加载事件，默认 domcontentloaded。
+          不再默认等待 networkidle：有轮询接口的页面（例如数据看板）永远达不到500ms无请求，只会白白等到超时
+        • ready_locator：页面就绪时可见的元素，例如首页侧边栏菜单、登录页的用户名输入框
+        • ready_js：页面就绪时返回真值的js表达式，例如前端在渲染完成后设置的 "() => window.__APP_READY__ === true"
+        • ready_timeout：等待 ready_locator/ready_js 的超时时间（秒）
+    """
+    ready_state: Literal["commit", "domcontentloaded", "load", "networkidle"] = "domcontentloaded"
+    ready_locator: Optional[str] = None
+    ready_js: Optional[str] = None
+    ready_timeout: float = 30
+
+    def __init_subclass__(cls, **kwargs):
+        """
+        页面对象类的公开方法自动记录耗时，见 action_profiler
+        """
+        super().__init_subclass__(**kwargs)
+        profile_class(cls)
+
     def __init__(self, page: Page):
         self.page = page
         self.context = self.page.context
@@ -35,55 +60,181 @@ class BasePage:
     @allure.step("--> 访问页面，路由：{url}，超时时间： {timeout} 秒")
     def visit(self, url: str, timeout=5) -> None:
         """
-        访问页面
+        访问页面，等到页面对象定义的就绪条件满足后返回
         :param url: url
-        :param timeout: 超时时间，默认是50000ms
+        :param timeout: 页面导航的超时时间，默认是5s
         """
-        logger.info(f"--> 访问页面，路由：{url}")
-        self.page.goto(url, timeout=timeout * 1000)
-        self.wait_for_load_state()
+        logger.info("--> 访问页面，路由：{}", url)
+        self.page.goto(url, timeout=timeout * 1000, wait_until=self.ready_state)
+        self.wait_until_ready()
 
     @allure.step("--> 刷新页面，且状态为：{state}， 超时时间： {timeout} 秒")
     def refresh(self, timeout=5,
-                state: Optional[Literal["domcontentloaded", "load", "networkidle"]] = 'networkidle') -> None:
+                state: Optional[Literal["domcontentloaded", "load", "networkidle"]] = None) -> None:
         """
-        刷新页面
-        :param timeout: 超时时间，默认是50000ms
-        :param state: Optional[Literal["domcontentloaded", "load", "networkidle"]] = 'networkidle'
-        官方默认是默认为 load， 该方法默认是networkidle
+        刷新页面，等到页面对象定义的就绪条件满足后返回
+        :param timeout: 超时时间，默认是5s
+        :param state: Optional[Literal["domcontentloaded", "load", "networkidle"]] = None
+        不传时使用页面对象的 ready_state（默认 domcontentloaded）
         state:
         domcontentloaded - 等到加载DOMContentLoaded事件
         load - 等到加载load事件
         networkidle - 等到500 ms没有网络请求
         """
-        logger.info(f"--> 刷新页面，且状态为：{state}， 超时时间： {timeout} 秒")
+        state = state or self.ready_state
+        logger.info("--> 刷新页面，且状态为：{}， 超时时间： {} 秒", state, timeout)
         self.page.reload(timeout=timeout * 1000, wait_until=state)
+        self.wait_until_ready()
 
     # --------------------------------- 等待 ---------------------------------#
+    """
+    尽量不要使用强制等待 wait，改为等待具体的条件，条件成立后立即返回：
+        • wait_for_element：元素达到指定状态（visible、hidden、attached、detached）
+        • wait_for_url：页面跳转到指定的url
+        • wait_for_response：执行操作并等待指定的接口响应
+        • wait_for_js：js条件成立
+        • wait_until：任意python条件，按退避间隔轮询
+    迁移时通过 replaces 参数传入原先强制等待的秒数，会话结束时汇总迁移前后花在等待上的时间，见 sleep_ledger
+    """
+
     @allure.step("--> 强制等待{timeout}秒")
     def wait(self, timeout=3):
         """
         强制等待，官方默认单位是毫秒，这里的timeout传参默认单位是秒
+        不推荐使用，每次调用都会记录到 sleep_ledger，请改用上面的条件等待方法
         """
-        logger.info(f'--> 强制等待{timeout}秒')
+        logger.info('--> 强制等待{}秒', timeout)
         self.page.wait_for_timeout(timeout * 1000)
+        sleep_ledger.add_sleep(action_profiler.caller() or f"{type(self).__name__}.wait", timeout)
+
+    def _record_wait(self, method: str, start: float, replaces: Optional[float]) -> None:
+        sleep_ledger.add_wait(action_profiler.caller() or f"{type(self).__name__}.{method}",
+                              time.perf_counter() - start, replaces)
+
+    @allure.step("--> 等待条件成立：{message}，超时{timeout}秒")
+    def wait_until(self, condition: Callable[[], Any], timeout: float = 10, message: str = "",
+                   interval: float = 0.05, max_interval: float = 1, replaces: Optional[float] = None) -> Any:
+        """
+        轮询条件，条件返回真值时立即返回该值；轮询间隔从 interval 开始按倍数增长，最大 max_interval
+        :param condition: 条件函数，抛出异常视为条件不成立
+        :param timeout: 超时时间（秒）
+        :param message: 条件描述，用于日志和超时报错
+        :param interval: 初始轮询间隔（秒）
+        :param max_interval: 最大轮询间隔（秒）
+        :param replaces: 迁移前此处强制等待的秒数
+        """
+        logger.info('--> 等待条件成立：{}', message or condition)
+        start = time.perf_counter()
+        try:
+            return poll(condition, timeout=timeout, interval=interval, max_interval=max_interval,
+                        sleep=lambda seconds: self.page.wait_for_timeout(seconds * 1000), message=message)
+        finally:
+            self._record_wait("wait_until", start, replaces)
+
+    @allure.step("--> 等待元素状态为：{state} | 元素定位：{locator}，超时{timeout}秒")
+    def wait_for_element(self, locator: str,
+                         state: Literal["attached", "detached", "hidden", "visible"] = "visible",
+                         timeout: float = 10, replaces: Optional[float] = None) -> None:
+        """
+        等待元素达到指定状态
+        :param locator: 元素定位，匹配多个元素时以第一个为准
+        :param state: attached - 元素在DOM中，detached - 元素不在DOM中，visible - 元素可见，hidden - 元素不可见或不在DOM中
+        :param timeout: 超时时间（秒）
+        :param replaces: 迁移前此处强制等待的秒数
+        """
+        logger.info('--> 等待元素状态为：{} | 元素定位：{}', state, locator)
+        start = time.perf_counter()
+        try:
+            self.page.locator(locator).first.wait_for(state=state, timeout=timeout * 1000)
+        finally:
+            self._record_wait("wait_for_element", start, replaces)
+
+    @allure.step("--> 等待页面跳转至：{url}，超时{timeout}秒")
+    def wait_for_url(self, url: Union[str, Pattern[str], Callable[[str], bool]], timeout: float = 10,
+                     replaces: Optional[float] = None) -> None:
+        """
+        等待页面跳转到指定的url
+        :param url: url通配符（例如 "**/welcome"）、正则，或者接收url返回bool的函数
+        :param timeout: 超时时间（秒）
+        :param replaces: 迁移前此处强制等待的秒数
+        """
+        logger.info('--> 等待页面跳转至：{}', url)
+        start = time.perf_counter()
+        try:
+            self.page.wait_for_url(url, timeout=timeout * 1000, wait_until=self.ready_state)
+        finally:
+            self._record_wait("wait_for_url", start, replaces)
+
+    @allure.step("--> 等待接口响应：{url}，超时{timeout}秒")
+    def wait_for_response(self, url: Union[str, Pattern[str], Callable[[Response], bool]],
+                          action: Callable[[], Any], timeout: float = 10,
+                          replaces: Optional[float] = None) -> Response:
+        """
+        执行操作，并等待该操作触发的接口响应，例如：
+            self.wait_for_response("**/api/clue/v1/account", lambda: self.click(self.locator_btn_confirm))
+        :param url: 接口url通配符、正则，或者接收 Response 返回bool的函数
+        :param action: 触发请求的操作
+        :param timeout: 超时时间（秒）
+        :param replaces: 迁移前此处强制等待的秒数
+        :return: 接口响应
+        """
+        logger.info('--> 等待接口响应：{}', url)
+        start = time.perf_counter()
+        try:
+            with self.page.expect_response(url, timeout=timeout * 1000) as response_info:
+                action()
+            return response_info.value
+        finally:
+            self._record_wait("wait_for_response", start, replaces)
+
+    @allure.step("--> 等待js条件成立：{expression}，超时{timeout}秒")
+    def wait_for_js(self, expression: str, arg: Any = None, timeout: float = 10,
+                    replaces: Optional[float] = None) -> Any:
+        """
+        等待js条件成立，例如：self.wait_for_js("() => document.querySelectorAll('.ant-spin').length === 0")
+        :param expression: js表达式或函数
+        :param arg: 传给js函数的参数
+        :param timeout: 超时时间（秒）
+        :param replaces: 迁移前此处强制等待的秒数
+        """
+        logger.info('--> 等待js条件成立：{}', expression)
+        start = time.perf_counter()
+        try:
+            return self.page.wait_for_function(expression, arg=arg, timeout=timeout * 1000)
+        finally:
+            self._record_wait("wait_for_js", start, replaces)
 
     @allure.step("--> 等待页面加载，且状态为：{state}, 超时{timeout}秒")
     def wait_for_load_state(self,
-                            state: Optional[Literal["domcontentloaded", "load", "networkidle"]] = 'networkidle',
+                            state: Optional[Literal["domcontentloaded", "load", "networkidle"]] = None,
                             timeout=30):
         """
         在页面达到所需的加载状态时返回
         官方默认的timeout单位是毫秒，这里timeout传参默认是秒
-        官方默认是默认为 load， 该方法默认是networkidle
+        官方默认是默认为 load， 该方法不传时使用页面对象的 ready_state（默认 domcontentloaded）
         state:
         domcontentloaded - 等到加载DOMContentLoaded事件
         load - 等到加载load事件
         networkidle - 等到500 ms没有网络请求
         """
-        logger.info(f'--> 等待页面加载，且状态为:{state}')
+        state = state or self.ready_state
+        logger.info('--> 等待页面加载，且状态为:{}', state)
         self.page.wait_for_load_state(state, timeout=timeout * 1000)
 
+    @allure.step("--> 等待页面就绪")
+    def wait_until_ready(self, timeout: Optional[float] = None) -> None:
+        """
+        等待页面对象定义的就绪条件：ready_locator 可见、ready_js 返回真值，两者都没有定义时直接返回
+        :param timeout: 超时时间（秒），不传时使用 ready_timeout
+        """
+        timeout_ms = (timeout or self.ready_timeout) * 1000
+        if self.ready_locator:
+            logger.info('--> 等待页面就绪，元素可见：{}', self.ready_locator)
+            self.page.locator(self.ready_locator).first.wait_for(state="visible", timeout=timeout_ms)
+        if self.ready_js:
+            logger.info('--> 等待页面就绪，js条件成立：{}', self.ready_js)
+            self.page.wait_for_function(self.ready_js, timeout=timeout_ms)
+
     # --------------------------------- 页面操作和交互---------------------------------#
     @allure.step("--> 点击元素 | 元素定位：{locator}")
     def click(self, locator: str) -> None:
@@ -97,10 +248,10 @@ class BasePage:
         :param locator: 元素定位 (xpath, css, id 等)
         """
         try:
-            logger.info(f"--> 点击元素 | 元素定位：{locator}")
+            logger.info("--> 点击元素 | 元素定位：{}", locator)
             self.page.click(locator)
         except Exception as e:
-            logger.error(f"--> 点击元素 | 元素定位：{locator}，报错：{e}")
+            logger.error("--> 点击元素 | 元素定位：{}，报错：{}", locator, e)
             raise Exception(f"--> 点击元素 | 元素定位：{locator}，报错：{e}")
 
     @allure.step("--> checkbox勾选元素 | 元素定位： {locator}")
@@ -110,7 +261,7 @@ class BasePage:
         注意：仅适用于 input[type=checkbox] 或 input[type=radio] 元素
         :param locator: 元素定位
         """
-        logger.info(f"--> checkbox勾选元素 | 元素定位：{locator}")
+        logger.info("--> checkbox勾选元素 | 元素定位：{}", locator)
         self.page.check(locator)
 
     @allure.step("--> checkbox取消勾选元素 | 元素定位： {locator}")
@@ -119,7 +270,7 @@ class BasePage:
         取消勾选checkbox
         :param locator: 元素定位
         """
-        logger.info(f"--> checkbox取消勾选元素 | 元素定位： {locator}")
+        logger.info("--> checkbox取消勾选元素 | 元素定位： {}", locator)
         self.page.uncheck(locator)
 
     @allure.step("--> 鼠标悬浮在元素上，元素定位： {locator}")
@@ -129,13 +280,13 @@ class BasePage:
         场景：触发下拉菜单、显示提示信息等
         :param locator: 元素定位
         """
-        logger.info(f"--> 鼠标悬浮在元素上，元素定位： {locator}")
+        logger.info("--> 鼠标悬浮在元素上，元素定位： {}", locator)
         self.page.hover(locator)
 
     @allure.step("--> 聚焦定位元素，元素定位： {locator}")
     def focus(self, locator):
         """ 聚焦定位元素，通常用于触发输入框的 focus 事件 """
-        logger.debug(f'--> 聚焦定位元素，元素定位： {locator}')
+        logger.debug('--> 聚焦定位元素，元素定位： {}', locator)
         self.page.focus(locator)
 
     @allure.step("--> 输入内容： {text} | 元素定位： {locator}")
@@ -149,10 +300,10 @@ class BasePage:
         :param text: 输入的内容
         """
         try:
-            logger.info(f"--> 输入内容： {text} | 元素定位： {locator}")
+            logger.info("--> 输入内容： {} | 元素定位： {}", text, locator)
             self.page.fill(selector=locator, value=text)
         except Exception as e:
-            logger.error(f"--> 输入内容： {text} | 元素定位： {locator}， 报错：{e}")
+            logger.error("--> 输入内容： {} | 元素定位： {}， 报错：{}", text, locator, e)
             raise Exception(f"--> 输入内容： {text} | 元素定位： {locator}， 报错：{e}")
 
     @allure.step("--> 键盘键入内容： {text} | 元素定位： {locator}")
@@ -165,17 +316,17 @@ class BasePage:
         :param locator: 元素定位
         :param text: 输入的内容
         """
-        logger.info(f"--> 键盘键入内容： {text} | 元素定位： {locator}")
+        logger.info("--> 键盘键入内容： {} | 元素定位： {}", text, locator)
         self.page.type(selector=locator, text=text)
 
     @allure.step("--> 清除元素内容，元素定位： {locator}")
     def clear(self, locator: str):
         self.page.locator(locator).click()
         try:
-            logger.info(f'--> 清除元素内容，元素定位： {locator}')
+            logger.info('--> 清除元素内容，元素定位： {}', locator)
             self.page.locator(locator).clear()
         except Exception as e:
-            logger.error(f'ERROR-->清除失败：{e}')
+            logger.error('ERROR-->清除失败：{}', e)
 
     @allure.step("--> 选择选项： {option} | 元素定位： {locator}")
     def select_option(self, locator: str, option: str) -> None:
@@ -184,7 +335,7 @@ class BasePage:
         :param locator: 元素定位
         :param option: 选项内容
         """
-        logger.info(f"--> 选择选项： {option} | 元素定位： {locator}")
+        logger.info("--> 选择选项： {} | 元素定位： {}", option, locator)
         self.page.select_option(selector=locator, value=option)
 
     @allure.step("--> 上传文件： {file_path} | 元素定位： {locator}")
@@ -195,12 +346,15 @@ class BasePage:
         :param file_path: 文件路径
         """
         if os.path.isfile(file_path):
-            logger.info(f"--> 上传文件： {file_path} | 元素定位： {locator}")
-            allure.attach.file(file_path, name=file_path)
+            logger.info("--> 上传文件： {} | 元素定位： {}", file_path, locator)
+            attachment_store.attach_file(file_path, name=file_path)
             self.page.set_input_files(selector=locator, files=file_path)
-            self.wait(timeout=1)
+            # 等待 input 上的文件已选择，不再固定等待1秒
+            self.wait_until(
+                lambda: self.page.locator(locator).first.evaluate("el => !el.files || el.files.length > 0"),
+                timeout=5, message="文件已选择", replaces=1)
         else:
-            logger.error(f"ERROR --> 上传文件失败，附件未找到，请检查{file_path}下是否存在该文件")
+            logger.error("ERROR --> 上传文件失败，附件未找到，请检查{}下是否存在该文件", file_path)
             raise ValueError(f"--> 上传文件失败，附件未找到，请检查{file_path}下是否存在该文件")
 
 
@@ -211,7 +365,7 @@ class BasePage:
         执行javascript脚本
         :param js: javascript脚本
         """
-        logger.info(f"--> 执行js脚本： {js}, 可选参数：{args}")
+        logger.info("--> 执行js脚本： {}, 可选参数：{}", js, args)
         self.page.evaluate(js, *args)
 
     @allure.step("--> 按{keyboard}键 | 元素定位： {locator}")
@@ -220,19 +374,19 @@ class BasePage:
         :param locator: 元素定位
         :param keyboard: 键
         """
-        logger.info(f"--> 按{keyboard}键 | 元素定位： {locator}")
+        logger.info("--> 按{}键 | 元素定位： {}", keyboard, locator)
         self.page.press(locator, keyboard)
 
     @allure.step("--> 截图， 全屏={full_page} | 元素定位： {locator}， 图片保存路径：{path}")
     def screenshot(self, path, full_page=True, locator=None):
         """截图功能，默认截取全屏，如果传入定位器表示截取元素"""
         if locator is not None:
-            logger.info(f"--> 截图， 全屏={full_page} | 元素定位： {locator}， 图片保存路径：{path}")
+            logger.info("--> 截图， 全屏={} | 元素定位： {}， 图片保存路径：{}", full_page, locator, path)
             self.page.locator(locator).screenshot(path=path)
             return path
-        logger.info(f"--> 截图， 全屏={full_page} | 元素定位： {locator}， 图片保存路径：{path}")
+        logger.info("--> 截图， 全屏={} | 元素定位： {}， 图片保存路径：{}", full_page, locator, path)
         self.page.screenshot(path=path, full_page=full_page)
-        allure.attach.file(path, name=path)
+        attachment_store.attach_file(path, name=path)
         return path
 
     # --------------------------------- UI断言 ---------------------------------#
@@ -245,10 +399,10 @@ class BasePage:
         :param timeout: 超时时间(ms)
         """
         try:
-            logger.info(f"--> 断言 | 验证元素包含文本：{text} | 元素定位：{locator}")
+            logger.info("--> 断言 | 验证元素包含文本：{} | 元素定位：{}", text, locator)
             expect(self.page.locator(locator)).to_contain_text(text, timeout=timeout)
         except Exception as e:
-            logger.error(f"断言失败 | 元素 {locator} 未包含文本 {text}")
+            logger.error("断言失败 | 元素 {} 未包含文本 {}", locator, text)
             raise e
 
     @allure.step("--> 断言 | 验证元素文本等于：{text} | 元素定位：{locator}")
@@ -260,10 +414,10 @@ class BasePage:
         :param timeout: 超时时间(ms)
         """
         try:
-            logger.info(f"--> 断言 | 验证元素文本等于：{text} | 元素定位：{locator}")
+            logger.info("--> 断言 | 验证元素文本等于：{} | 元素定位：{}", text, locator)
             expect(self.page.locator(locator)).to_have_text(text, timeout=timeout)
         except Exception as e:
-            logger.error(f"断言失败 | 元素 {locator} 文本不等于 {text}")
+            logger.error("断言失败 | 元素 {} 文本不等于 {}", locator, text)
             raise e
 
     @allure.step("--> 断言 | 验证元素可见 | 元素定位：{locator}")
@@ -274,10 +428,10 @@ class BasePage:
         :param timeout: 超时时间(ms)
         """
         try:
-            logger.info(f"--> 断言 | 验证元素可见 | 元素定位：{locator}")
+            logger.info("--> 断言 | 验证元素可见 | 元素定位：{}", locator)
             expect(self.page.locator(locator)).to_be_visible(timeout=timeout)
         except Exception as e:
-            logger.error(f"断言失败 | 元素 {locator} 不可见")
+            logger.error("断言失败 | 元素 {} 不可见", locator)
             raise e
 
     @allure.step("--> 断言 | 验证元素不可见 | 元素定位：{locator}")
@@ -288,10 +442,10 @@ class BasePage:
         :param timeout: 超时时间(ms)
         """
         try:
-            logger.info(f"--> 断言 | 验证元素不可见 | 元素定位：{locator}")
+            logger.info("--> 断言 | 验证元素不可见 | 元素定位：{}", locator)
             expect(self.page.locator(locator)).to_be_hidden(timeout=timeout)
         except Exception as e:
-            logger.error(f"断言失败 | 元素 {locator} 居然可见了")
+            logger.error("断言失败 | 元素 {} 居然可见了", locator)
             raise e
 
     @allure.step("--> 断言 | 验证页面URL包含：{url}")
@@ -302,10 +456,10 @@ class BasePage:
         :param timeout: 超时时间(ms)
         """
         try:
-            logger.info(f"--> 断言 | 验证页面URL包含：{url}")
+            logger.info("--> 断言 | 验证页面URL包含：{}", url)
             expect(self.page).to_have_url(re.compile(url), timeout=timeout)
         except Exception as e:
-            logger.error(f"断言失败 | 当前URL不包含 {url}")
+            logger.error("断言失败 | 当前URL不包含 {}", url)
             raise e
 
     @allure.step("--> 断言 | 验证页面标题包含：{title}")
@@ -316,10 +470,10 @@ class BasePage:
         :param timeout: 超时时间(ms)
         """
         try:
-            logger.info(f"--> 断言 | 验证页面标题包含：{title}")
+            logger.info("--> 断言 | 验证页面标题包含：{}", title)
             expect(self.page).to_have_title(re.compile(title), timeout=timeout)
         except Exception as e:
-            logger.error(f"断言失败 | 当前标题不包含 {title}")
+            logger.error("断言失败 | 当前标题不包含 {}", title)
             raise e
 
     # --------------------------------- 页面元素定位 ---------------------------------#
@@ -332,13 +486,13 @@ class BasePage:
         :return: 元素/None
         """
         try:
-            logger.info(f"--> 获取所有的元素 | 元素定位： {locator}")
+            logger.info("--> 获取所有的元素 | 元素定位： {}", locator)
             elems = self.page.query_selector_all(locator)
-            allure.attach(str(elems), name="elems", attachment_type=allure.attachment_type.TEXT)
-            logger.success(f"--> 获取到的元素：{elems}")
+            attachment_store.attach(str(elems), name="elems", low_value=True)
+            logger.success("--> 获取到的元素：{}", elems)
             return elems
         except Exception as e:
-            logger.error(f"ERROR --> 获取所有的元素失败 | 元素定位： {locator}，报错信息：{e} ")
+            logger.error("ERROR --> 获取所有的元素失败 | 元素定位： {}，报错信息：{} ", locator, e)
             raise e
 
     @allure.step("--> 获取元素文本值 | 元素定位： {locator}")
@@ -350,13 +504,13 @@ class BasePage:
         :return: 文本值/None
         """
         try:
-            logger.info(f"--> 获取元素文本值 | 元素定位： {locator}")
+            logger.info("--> 获取元素文本值 | 元素定位： {}", locator)
             text_value = self.page.locator(locator).text_content()
-            logger.success(f"--> 获取到的文本值： {text_value}")
-            allure.attach(text_value, name="text_value", attachment_type=allure.attachment_type.TEXT)
+            logger.success("--> 获取到的文本值： {}", text_value)
+            attachment_store.attach(text_value, name="text_value", low_value=True)
             return text_value
         except Exception as e:
-            logger.error(f"ERROR --> 获取元素文本值 | 元素定位： {locator}，报错信息：{e} ")
+            logger.error("ERROR --> 获取元素文本值 | 元素定位： {}，报错信息：{} ", locator, e)
             raise e
 
     @allure.step("--> 获取所有符合定位要求的元素的文本内容 | 元素定位： {locator}")
@@ -367,14 +521,14 @@ class BasePage:
         :return: 文本值/None
         """
         try:
-            logger.info(f"--> 获取所有符合定位要求的元素的文本内容 | 元素定位： {locator}")
+            logger.info("--> 获取所有符合定位要求的元素的文本内容 | 元素定位： {}", locator)
             elements = self.get_all_elements(locator)
             elems_text = [element.text_content() for element in elements]
-            logger.success(f"--> 获取所有符合定位要求的元素的文本内容：{elems_text}")
-            allure.attach(str(elems_text), name="elems_text", attachment_type=allure.attachment_type.TEXT)
+            logger.success("--> 获取所有符合定位要求的元素的文本内容：{}", elems_text)
+            attachment_store.attach(str(elems_text), name="elems_text", low_value=True)
             return elems_text
         except Exception as e:
-            logger.error(f"ERROR --> 获取所有符合定位要求的元素的文本内容 | 元素定位： {locator}，报错信息：{e} ")
+            logger.error("ERROR --> 获取所有符合定位要求的元素的文本内容 | 元素定位： {}，报错信息：{} ", locator, e)
             raise e
 
     @allure.step("--> 根据元素的属性获取对应属性值 | 元素定位： {locator}, 属性名称：{attr_name}")
@@ -386,13 +540,13 @@ class BasePage:
         :return: 元素属性值
         """
         try:
-            logger.info(f"--> 根据元素的属性获取对应属性值 | 元素定位： {locator}, 属性名称：{attr_name}")
+            logger.info("--> 根据元素的属性获取对应属性值 | 元素定位： {}, 属性名称：{}", locator, attr_name)
             attr_value = self.page.locator(locator).get_attribute(name=attr_name)
-            logger.success(f"--> 获取到的属性值：{attr_value}")
-            allure.attach(attr_value, name="attr_value", attachment_type=allure.attachment_type.TEXT)
+            logger.success("--> 获取到的属性值：{}", attr_value)
+            attachment_store.attach(attr_value, name="attr_value", low_value=True)
             return attr_value
         except Exception as e:
-            logger.error(f"--> 获取元素属性值 | 元素定位： {locator}，报错信息：{e} ")
+            logger.error("--> 获取元素属性值 | 元素定位： {}，报错信息：{} ", locator, e)
             return None
 
     @allure.step("--> 获取元素的文本内容 | 元素定位： {locator}")
@@ -403,13 +557,13 @@ class BasePage:
         :return: 内部文本值
         """
         try:
-            logger.info(f"--> 获取元素的文本内容 | 元素定位： {locator}")
+            logger.info("--> 获取元素的文本内容 | 元素定位： {}", locator)
             text_value = self.page.inner_text(selector=locator)
-            logger.success(f"--> 获取到的元素文本内容：{text_value}")
-            allure.attach(text_value, name="text_value", attachment_type=allure.attachment_type.TEXT)
+            logger.success("--> 获取到的元素文本内容：{}", text_value)
+            attachment_store.attach(text_value, name="text_value", low_value=True)
             return text_value
         except Exception as e:
-            logger.error(f"ERROR-->获取元素的文本内容 | 元素定位： {locator}，报错信息：{e} ")
+            logger.error("ERROR-->获取元素的文本内容 | 元素定位： {}，报错信息：{} ", locator, e)
             return None
 
     @allure.step("--> 获取元素的整个html源码内容 | 元素定位： {locator}")
@@ -420,13 +574,13 @@ class BasePage:
         :return: html值
         """
         try:
-            logger.info(f"--> 获取元素的整个html源码内容 | 元素定位： {locator}")
+            logger.info("--> 获取元素的整个html源码内容 | 元素定位： {}", locator)
             html_value = self.page.inner_html(selector=locator)
-            logger.success(f"--> 获取元素的整个html值：{html_value}")
-            allure.attach(html_value, name="html_value", attachment_type=allure.attachment_type.TEXT)
+            logger.success("--> 获取元素的整个html值：{}", html_value)
+            attachment_store.attach(html_value, name="html_value", low_value=True)
             return html_value
         except Exception as e:
-            logger.error(f"ERROR-->获取元素的整个html源码内容 | 元素定位： {locator}，报错信息：{e} ")
+            logger.error("ERROR-->获取元素的整个html源码内容 | 元素定位： {}，报错信息：{} ", locator, e)
             return None
 
     @allure.step("获取当前页面的url")
@@ -438,11 +592,11 @@ class BasePage:
         try:
             logger.info(f"--> 获取当前页面的url")
             url_value = self.page.url
-            allure.attach(url_value, name="URL Value", attachment_type=allure.attachment_type.TEXT)
-            logger.success(f"--> 获取到的url值：{url_value}")
+            attachment_store.attach(url_value, name="URL Value", low_value=True)
+            logger.success("--> 获取到的url值：{}", url_value)
             return url_value
         except Exception as e:
-            logger.error(f"ERROR --> 获取当前页面的url，报错信息：{e} ")
+            logger.error("ERROR --> 获取当前页面的url，报错信息：{} ", e)
             return None
 
     # --------------------------------- 断言（页面断言） ---------------------------------#
@@ -485,7 +639,7 @@ class BasePage:
         断言：验证复选框是否被选中
         :param locator: 元素定位
         """
-        logger.info(f"--> 断言 | 验证元素checkbox被选中 | 元素定位： {locator}")
+        logger.info("--> 断言 | 验证元素checkbox被选中 | 元素定位： {}", locator)
         elem = self.page.locator(locator)
         expect(elem).to_be_checked()
 
@@ -495,7 +649,7 @@ class BasePage:
         断言：验证元素是否被禁用
         :param locator: 元素定位
         """
-        logger.info(f"--> 断言 | 验证元素被禁用 | 元素定位： {locator}")
+        logger.info("--> 断言 | 验证元素被禁用 | 元素定位： {}", locator)
         elem = self.page.locator(locator)
         expect(elem).to_be_disabled()
 
@@ -506,7 +660,7 @@ class BasePage:
         :param locator: 元素定位
         :param timeout: 超时时间， 默认5000ms
         """
-        logger.info(f"--> 断言 | 验证输入框可编辑 | 元素定位： {locator}")
+        logger.info("--> 断言 | 验证输入框可编辑 | 元素定位： {}", locator)
         elem = self.page.locator(locator)
         expect(elem).to_be_editable(timeout=timeout * 1000)
 
@@ -516,7 +670,7 @@ class BasePage:
         断言：验证容器是否为空
         :param locator: 元素定位
         """
-        logger.info(f"--> 断言 | 验证容器为空 | 元素定位： {locator}")
+        logger.info("--> 断言 | 验证容器为空 | 元素定位： {}", locator)
         elem = self.page.locator(locator)
         expect(elem).to_be_empty()
 
@@ -526,7 +680,7 @@ class BasePage:
         断言：验证元素是否启用
         :param locator: 元素定位
         """
-        logger.info(f"--> 断言 | 验证元素为启用状态 | 元素定位： {locator}")
+        logger.info("--> 断言 | 验证元素为启用状态 | 元素定位： {}", locator)
         elem = self.page.locator(locator)
         expect(elem).to_be_enabled()
 
@@ -536,7 +690,7 @@ class BasePage:
         断言：验证元素是否获得焦点
         :param locator: 元素定位
         """
-        logger.info(f"--> 断言 | 验证元素获得焦点 | 元素定位： {locator}")
+        logger.info("--> 断言 | 验证元素获得焦点 | 元素定位： {}", locator)
         elem = self.page.locator(locator)
         expect(elem).to_be_focused()
 
@@ -546,7 +700,7 @@ class BasePage:
         断言：验证元素是否隐藏
         :param locator: 元素定位
         """
-        logger.info(f"--> 断言 | 验证元素被隐藏 | 元素定位： {locator}")
+        logger.info("--> 断言 | 验证元素被隐藏 | 元素定位： {}", locator)
         elem = self.page.locator(locator)
         expect(elem).to_be_hidden()
 
@@ -558,7 +712,7 @@ class BasePage:
         :param value: 指定值
         :param timeout: 超时时间， 默认5000ms
         """
-        logger.info(f"--> 断言 | 验证元素具有值(预期)： {value} | 元素定位： {locator}")
+        logger.info("--> 断言 | 验证元素具有值(预期)： {} | 元素定位： {}", value, locator)
         elem = self.page.locator(locator)
         expect(elem).to_have_value(value=value, timeout=timeout * 1000)
 
@@ -570,7 +724,7 @@ class BasePage:
         :param value: 指定值
         :param timeout: 超时时间， 默认5000ms
         """
-        logger.info(f"--> 断言 | 验证元素具有值(预期)： {value} | 元素定位： {locator}")
+        logger.info("--> 断言 | 验证元素具有值(预期)： {} | 元素定位： {}", value, locator)
         elem = self.page.locator(locator)
         expect(elem).not_to_have_value(value=value, timeout=timeout * 1000)
 
@@ -581,7 +735,7 @@ class BasePage:
         :param locator: 元素定位
         :param text: 文本内容
         """
-        logger.info(f"--> 断言 | 验证元素具有： {text} | 元素定位： {locator}")
+        logger.info("--> 断言 | 验证元素具有： {} | 元素定位： {}", text, locator)
         expect(self.page.locator(locator)).to_have_text(text)
 
     @allure.step("--> 断言 | 验证元素包含： {text} | 元素定位： {locator}")
@@ -591,7 +745,7 @@ class BasePage:
         :param locator: 元素定位
         :param text: 文本内容
         """
-        logger.info(f"--> 断言 | 验证元素包含： {text} | 元素定位： {locator}")
+        logger.info("--> 断言 | 验证元素包含： {} | 元素定位： {}", text, locator)
         expect(self.page.locator(locator)).to_contain_text(text)
 
     @allure.step("---> 断言 | 验证元素具有类属性(预期)： {class_name} | 元素定位： {locator}")
@@ -601,7 +755,7 @@ class BasePage:
         :param locator: 元素定位
         :param class_name: 预期类名称
         """
-        logger.info(f"---> 断言 | 验证元素具有类属性(预期)： {class_name} | 元素定位： {locator}")
+        logger.info("---> 断言 | 验证元素具有类属性(预期)： {} | 元素定位： {}", class_name, locator)
         elem = self.page.locator(locator)
         expect(elem).to_have_class(class_name)
 
@@ -612,7 +766,7 @@ class BasePage:
         :param locator: 元素定位
         :param attr_name: 预期元素属性名称
         """
-        logger.info(f"--> 断言 | 验证元素具有属性(预期)： {attr_name} | 元素定位： {locator}")
+        logger.info("--> 断言 | 验证元素具有属性(预期)： {} | 元素定位： {}", attr_name, locator)
         elem = self.page.locator(locator)
         expect(elem).to_have_attribute(attr_name)
 
@@ -623,7 +777,7 @@ class BasePage:
         :param locator: 元素定位
         :param elem_count: 预期元素个数
         """
-        logger.info(f"---> 断言 | 验证元素具有指定个数(预期)： {elem_count} | 元素定位： {locator}")
+        logger.info("---> 断言 | 验证元素具有指定个数(预期)： {} | 元素定位： {}", elem_count, locator)
         elem = self.page.locator(locator)
         expect(elem).to_have_count(elem_count)
 
@@ -634,7 +788,7 @@ class BasePage:
         :param locator: 元素定位
         :param css_value: css属性，接收str以及正则表达式， 例如"button"， 或者"display", "flex"
         """
-        logger.info(f"---> 断言 | 验证元素具有CSS属性(预期)： {css_value} | 元素定位： {locator}")
+        logger.info("---> 断言 | 验证元素具有CSS属性(预期)： {} | 元素定位： {}", css_value, locator)
         elem = self.page.locator(locator)
         expect(elem).to_have_css(css_value)
 
@@ -645,7 +799,7 @@ class BasePage:
         :param locator: 元素定位
         :param id_name: 元素id属性
         """
-        logger.info(f"---> 断言 | 验证元素具有ID(预期)： {id_name} | 元素定位： {locator}")
+        logger.info("---> 断言 | 验证元素具有ID(预期)： {} | 元素定位： {}", id_name, locator)
         elem = self.page.locator(locator)
         expect(elem).to_have_css(id_name)
 
@@ -656,7 +810,7 @@ class BasePage:
         :param locator: 元素定位
         :param js_value: 元素id属性
         """
-        logger.info(f"---> 断言 | 验证元素具有JavaScript属性(预期)： {js_value} | 元素定位： {locator}")
+        logger.info("---> 断言 | 验证元素具有JavaScript属性(预期)： {} | 元素定位： {}", js_value, locator)
         expect(locator).to_have_js_property(js_value)
 
     # --------------------------------- 断言（自定义） ---------------------------------#
@@ -668,9 +822,9 @@ class BasePage:
         :param attr_name: 元素属性名称
         :param value: 文本内容
         """
-        logger.info(f"--> 断言 | 验证元素的属性 {attr_name} 具有值(预期)： {value} | 元素定位： {locator}")
+        logger.info("--> 断言 | 验证元素的属性 {} 具有值(预期)： {} | 元素定位： {}", attr_name, value, locator)
         actual_value = self.get_element_attribute(locator=locator, attr_name=attr_name)
-        logger.info(f"--> 验证元素的属性 {attr_name} 实际值： {actual_value}")
+        logger.info("--> 验证元素的属性 {} 实际值： {}", attr_name, actual_value)
         assert value == actual_value
 
     # --------------------------------- 断言（判断页面元素状态checkbox和radio） ---------------------------------#
@@ -698,3 +852,7 @@ class BasePage:
         • element_handle.is_hidden()
         • element_handle.is_visible()
     """
+
+
+# BasePage 自身的方法同样记录耗时（子类由 __init_subclass__ 处理）
+profile_class(BasePage)
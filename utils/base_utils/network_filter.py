@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+# @Version: Python 3.13
+# @Author  : 会飞的🐟
+# @File    : network_filter.py
+# @Software: PyCharm
+# @Desc: 浏览器网络请求过滤：按项目配置中止或伪造不需要的资源请求，静态资源缓存到本地磁盘供所有上下文共享
+
+import os
+import re
+import json
+import time
+import fnmatch
+import hashlib
+import threading
+from typing import Dict, Iterable, Optional, Pattern, Tuple
+from urllib.parse import urlparse
+from loguru import logger
+from playwright.sync_api import BrowserContext, Route, Request
+from config.path_config import ASSET_CACHE_DIR
+
+# 伪造响应的内容：图片返回1x1透明gif，其余类型返回空内容
+_STUB_GIF = (b"GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\x00\x00\x00!\xf9\x04\x01\x00\x00\x00\x00"
+             b",\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;")
+_STUB_RESPONSES = {
+    "image": ("image/gif", _STUB_GIF),
+    "script": ("application/javascript", b""),
+    "stylesheet": ("text/css", b""),
+    "font": ("font/woff2", b""),
+}
+# 缓存的响应体是解压后的内容，这些响应头不能原样返回
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+# 文件名中带内容哈希的资源（例如 main.3f9a8b2c.js、index-BfK2x9a1.css），内容变化时url一定变化；
+# 哈希段以 . 或 - 分隔，是8位以上的十六进制，或者同时包含数字和字母的8位以上字母数字，app_v2_bundle1.js 这类文件名不算
+_HASHED_NAME = re.compile(r"[.\-]([0-9a-f]{8,}|(?=[A-Za-z0-9]*\d)(?=[A-Za-z0-9]*[A-Za-z])[A-Za-z0-9]{8,})\.\w+$")
+
+
+def is_immutable(url: str, headers: Dict[str, str]) -> bool:
+    """
+    判断资源内容是否不会在url不变的情况下发生变化：响应头带 Cache-Control: immutable，或者文件名中带内容哈希
+    """
+    if "immutable" in headers.get("cache-control", "").lower():
+        return True
+    return _HASHED_NAME.search(urlparse(url).path) is not None
+
+
+def _compile_patterns(patterns: Optional[Iterable[str]]) -> Optional[Pattern[str]]:
+    """
+    将url通配符列表（fnmatch语法，* 可以匹配任意字符，包括 /）编译成一个正则
+    """
+    patterns = list(patterns or [])
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{fnmatch.translate(pattern)})" for pattern in patterns))
+
+
+class AssetCache:
+    """
+    静态资源的本地磁盘缓存，按url保存响应状态码、响应头和响应体，多个上下文、多个worker进程共享
+
+    开启路由(context.route)后浏览器自身的http缓存会失效，每个上下文都要重新下载所有静态资源，因此由这里缓存js/css等资源：
+    - 不可变的资源（见 is_immutable）在 ttl 秒内直接使用缓存，不发请求
+    - 其他资源每次都带上 If-None-Match/If-Modified-Since 向服务端确认，返回304时才使用缓存，
+      前端重新部署后不会继续使用旧的文件；没有 ETag/Last-Modified 的资源无法确认，不缓存
+    """
+
+    def __init__(self, cache_dir: str = ASSET_CACHE_DIR, ttl: int = 24 * 3600):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode("utf-8")).hexdigest())
+
+    def get(self, url: str) -> Optional[Tuple[dict, bytes]]:
+        """
+        获取缓存的响应，不存在时返回None；是否可以不经确认直接使用见 is_fresh
+        :return: (响应信息{"status", "headers", "immutable", "created"}, 响应体)
+        """
+        path = self._path(url)
+        try:
+            with open(f"{path}.json", mode="r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(f"{path}.body", mode="rb") as f:
+                return meta, f.read()
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, meta: dict) -> bool:
+        """
+        缓存是否可以不向服务端确认直接使用：只有不可变的资源，且未超过 ttl
+        """
+        return bool(meta.get("immutable")) and time.time() - meta.get("created", 0) <= self.ttl
+
+    def put(self, url: str, status: int, headers: Dict[str, str], body: bytes) -> None:
+        """
+        保存响应，先写临时文件再替换，避免并行的 worker 读到写了一半的文件
+        """
+        path = self._path(url)
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        meta = {"url": url, "status": status, "created": time.time(), "immutable": is_immutable(url, headers),
+                "headers": {k: v for k, v in headers.items() if k.lower() not in _DROP_HEADERS}}
+        with open(f"{path}.body{suffix}", mode="wb") as f:
+            f.write(body)
+        os.replace(f"{path}.body{suffix}", f"{path}.body")
+        with open(f"{path}.json{suffix}", mode="w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(f"{path}.json{suffix}", f"{path}.json")
+
+
+def _validators(headers: Dict[str, str]) -> Dict[str, str]:
+    """
+    根据缓存的响应头生成条件请求头
+    """
+    headers = {k.lower(): v for k, v in headers.items()}
+    validators = {}
+    if headers.get("etag"):
+        validators["if-none-match"] = headers["etag"]
+    if headers.get("last-modified"):
+        validators["if-modified-since"] = headers["last-modified"]
+    return validators
+
+
+class NetworkFilter:
+    """
+    按规则过滤浏览器上下文中的网络请求
+
+    规则在各项目的 project_settings.py 中通过 NETWORK_RULES 配置，例如：
+        NETWORK_RULES = {
+            "block_resource_types": ["font", "media"],        # 直接中止的资源类型
+            "block_urls": ["*hm.baidu.com/*"],                 # 直接中止的url
+            "stub_resource_types": ["image"],                  # 返回伪造的空响应的资源类型
+            "stub_urls": ["*webapi.amap.com/*"],               # 返回伪造的空响应的url（中止后页面会报错的脚本）
+            "cache_resource_types": ["script", "stylesheet"],  # 缓存到本地磁盘的资源类型，见 AssetCache
+            "cache_urls": [],                                  # 缓存到本地磁盘的url
+            "cache_ttl": 86400,                                # 不可变资源的缓存有效期（秒）
+            "allow_urls": ["*/api/*"],                         # 不做任何处理的url，优先级最高
+        }
+    资源类型即 playwright 的 request.resource_type：document、stylesheet、image、media、font、script、
+    texttrack、xhr、fetch、eventsource、websocket、manifest、other
+
+    使用方式：
+        network_filter = NetworkFilter(rules)
+        network_filter.attach(context)
+    """
+
+    def __init__(self, rules: dict, cache: Optional[AssetCache] = None):
+        self.allow_urls = _compile_patterns(rules.get("allow_urls"))
+        self.block_types = set(rules.get("block_resource_types") or [])
+        self.block_urls = _compile_patterns(rules.get("block_urls"))
+        self.stub_types = set(rules.get("stub_resource_types") or [])
+        self.stub_urls = _compile_patterns(rules.get("stub_urls"))
+        self.cache_types = set(rules.get("cache_resource_types") or [])
+        self.cache_urls = _compile_patterns(rules.get("cache_urls"))
+        if cache is None and (self.cache_types or self.cache_urls):
+            cache = AssetCache(ttl=rules.get("cache_ttl", 24 * 3600))
+        self.cache = cache
+        self._lock = threading.Lock()
+        self.stats = {"blocked": 0, "stubbed": 0, "cache_hit": 0, "cache_revalidated": 0, "cache_miss": 0,
+                      "cache_hit_bytes": 0}
+
+    def _count(self, key: str, value: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += value
+
+    @staticmethod
+    def _match(pattern: Optional[Pattern[str]], url: str) -> bool:
+        return pattern is not None and pattern.match(url) is not None
+
+    def attach(self, context: BrowserContext) -> None:
+        """
+        在浏览器上下文上注册路由，该上下文中的所有请求都经过过滤
+        """
+        context.route("**/*", self.handle)
+
+    def handle(self, route: Route, request: Request) -> None:
+        url = request.url
+        resource_type = request.resource_type
+        if self._match(self.allow_urls, url) or resource_type == "document":
+            route.fallback()
+        elif resource_type in self.block_types or self._match(self.block_urls, url):
+            self._count("blocked")
+            route.abort("blockedbyclient")
+        elif resource_type in self.stub_types or self._match(self.stub_urls, url):
+            self._count("stubbed")
+            content_type, body = _STUB_RESPONSES.get(resource_type, ("text/plain", b""))
+            route.fulfill(status=200, content_type=content_type, body=body)
+        elif self.cache and request.method == "GET" and (
+                resource_type in self.cache_types or self._match(self.cache_urls, url)):
+            self._handle_cache(route, request)
+        else:
+            route.fallback()
+
+    def _handle_cache(self, route: Route, request: Request) -> None:
+        url = request.url
+        cached = self.cache.get(url)
+        if cached and self.cache.is_fresh(cached[0]):
+            meta, body = cached
+            self._count("cache_hit")
+            self._count("cache_hit_bytes", len(body))
+            route.fulfill(status=meta["status"], headers=meta["headers"], body=body)
+            return
+        validators = _validators(cached[0]["headers"]) if cached else {}
+        if validators:
+            # 带上缓存的 ETag/Last-Modified 向服务端确认，未变化时服务端返回304，不传输响应体
+            response = route.fetch(headers={**request.headers, **validators})
+            if response.status == 304:
+                meta, body = cached
+                self._count("cache_revalidated")
+                self._count("cache_hit_bytes", len(body))
+                route.fulfill(status=meta["status"], headers=meta["headers"], body=body)
+                return
+        else:
+            response = route.fetch()
+        self._count("cache_miss")
+        body = response.body()
+        headers = response.headers
+        if response.status == 200 and "no-store" not in headers.get("cache-control", "") and (
+                is_immutable(url, headers) or _validators(headers)):
+            self.cache.put(url, response.status, headers, body)
+        route.fulfill(response=response, body=body)
+
+    def log_stats(self) -> None:
+        logger.info("网络请求过滤统计：中止 {blocked} 个，伪造响应 {stubbed} 个，缓存命中 {cache_hit} 个，"
+                    "确认未变化后使用缓存 {cache_revalidated} 个（共 {cache_hit_bytes} 字节），缓存未命中 {cache_miss} 个",
+                    **self.stats)
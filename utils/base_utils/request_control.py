@@ -5,18 +5,17 @@
 # @Software: PyCharm
 # @Desc: TODO: Description
 
-import os
 import allure
 from loguru import logger
 from playwright.sync_api import sync_playwright, BrowserContext, Page, APIRequestContext, APIResponse
 from utils.base_utils.base_request import BaseRequest
 from utils.data_utils.data_handle import data_handle, eval_data
-from utils.data_utils.extract_data_handle import json_extractor, re_extract, response_extract
+from utils.data_utils.extract_data_handle import json_extract_many, re_extract_many, response_extract, stream_extract
 from utils.report_utils.allure_handle import allure_step
+from utils.report_utils.timing_handle import PhaseTimer, timing_collector
 from utils.assertion_utils.assert_control import AssertHandle
-from utils.files_utils.yaml_handle import YamlHandle
-from utils.files_utils.files_handle import get_files
-from utils.database_utils.mysql_handle import MysqlServer
+from utils.base_utils.api_registry import api_registry
+from utils.database_utils.mysql_handle import mysql_pool
 
 
 class RequestControl(BaseRequest):
@@ -31,65 +30,55 @@ class RequestControl(BaseRequest):
     def get_api_data(self, api_file_path: str, key: str):
         """
         根据指定的yaml文件路径，以及key值，获取对应的接口
+        接口定义从进程内共享的注册表中查找，yaml文件只在首次使用或修改后才会重新解析
         :param:api_file_path 接口yaml文件路径，可以是目录，也可以是文件
         :param:key 对应接口的id
         """
-        api_data = []
-        if os.path.isdir(api_file_path):
-            logger.debug(f"获取接口数据的目标路径是一个目录：{api_file_path}")
-            api_files = get_files(target=api_file_path, end=".yaml") + get_files(target=api_file_path, end=".yml")
-            for api_file in api_files:
-                api_data.append(YamlHandle(filename=api_file).read_yaml)
-        elif os.path.isfile(api_file_path):
-            logger.debug(f"获取接口数据的目标路径是一个文件：{api_file_path}")
-            api_data.append(YamlHandle(filename=api_file_path).read_yaml)
-
-        else:
-            logger.error(f"目标路径错误，请检查！api_file_path={api_file_path}")
+        try:
+            single_api = api_registry.get(api_file_path=api_file_path, key=key)
+        except FileNotFoundError as e:
+            logger.error(e)
             return None
-
-        for single_api_file in api_data:
-            for single_api in single_api_file:
-                if single_api["id"].lower() == key.lower():
-                    logger.debug("\n----------匹配到的api----------\n"
-                                 f"匹配文件路径：{api_file_path}\n"
-                                 f"匹配接口key：{key}\n"
-                                 f"类型：{type(single_api)}\n"
-                                 f"值：{single_api}\n")
-                    return single_api
-        logger.warning(f"路径： {api_file_path}， 未找到id为{key}的接口， 返回值是None")
-        raise Exception(f"路径： {api_file_path}， 未找到id为{key}的接口， 返回值是None")
+        if single_api is None:
+            logger.warning(f"路径： {api_file_path}， 未找到id为{key}的接口， 返回值是None")
+            raise Exception(f"路径： {api_file_path}， 未找到id为{key}的接口， 返回值是None")
+        logger.opt(lazy=True).debug("{}", lambda: ("\n----------匹配到的api----------\n"
+                                                   f"匹配文件路径：{api_file_path}\n"
+                                                   f"匹配接口key：{key}\n"
+                                                   f"类型：{type(single_api)}\n"
+                                                   f"值：{single_api}\n"))
+        return single_api
 
     def before_request(self, request_data: dict, source_data: dict = None):
         """
         针请求前，对接口数据进行处理，识别用例数据中的关键字${xxxx}，使用全局变量进行替换或者执行关键字中的方法替换为具体值
         """
         try:
-            logger.debug(f"\n======================================================\n" \
-                         "-------------用例数据处理前--------------------\n"
-                         f"用例ID:  {type(request_data.get('id', None))} || {request_data.get('id', None)}\n" \
-                         f"用例标题(title):  {type(request_data.get('title', None))} || {request_data.get('title', None)}\n" \
-                         f"请求路径(url): {type(request_data.get('url', None))} || {request_data.get('url', None)}\n" \
-                         f"请求方式(method): {type(request_data.get('method', None))} || {request_data.get('method', None)}\n" \
-                         f"请求头(headers): {type(request_data.get('headers', None))} || {request_data.get('headers', None)}\n" \
-                         f"请求类型(request_type): {type(request_data.get('request_type', None))} || {request_data.get('request_type', None)}\n" \
-                         f"请求参数(payload): {type(request_data.get('payload', None))} || {request_data.get('payload', None)}\n" \
-                         f"响应断言(assert_response): {type(request_data.get('assert_response', None))} || {request_data.get('assert_response', None)}\n" \
-                         f"后置提取参数(extract): {type(request_data.get('extract', None))} || {request_data.get('extract', None)}\n")
+            logger.opt(lazy=True).debug("{}", lambda: (f"\n======================================================\n" \
+                                                       "-------------用例数据处理前--------------------\n"
+                                                       f"用例ID:  {type(request_data.get('id', None))} || {request_data.get('id', None)}\n" \
+                                                       f"用例标题(title):  {type(request_data.get('title', None))} || {request_data.get('title', None)}\n" \
+                                                       f"请求路径(url): {type(request_data.get('url', None))} || {request_data.get('url', None)}\n" \
+                                                       f"请求方式(method): {type(request_data.get('method', None))} || {request_data.get('method', None)}\n" \
+                                                       f"请求头(headers): {type(request_data.get('headers', None))} || {request_data.get('headers', None)}\n" \
+                                                       f"请求类型(request_type): {type(request_data.get('request_type', None))} || {request_data.get('request_type', None)}\n" \
+                                                       f"请求参数(payload): {type(request_data.get('payload', None))} || {request_data.get('payload', None)}\n" \
+                                                       f"响应断言(assert_response): {type(request_data.get('assert_response', None))} || {request_data.get('assert_response', None)}\n" \
+                                                       f"后置提取参数(extract): {type(request_data.get('extract', None))} || {request_data.get('extract', None)}\n"))
 
             new_request_data = data_handle(obj=request_data, source=source_data)
 
-            logger.debug("\n-------------用例数据处理后--------------------\n"
-                         f"用例ID:  {type(new_request_data.get('id', None))} || {new_request_data.get('id', None)}\n" \
-                         f"用例标题(title):  {type(new_request_data.get('title', None))} || {new_request_data.get('title', None)}\n" \
-                         f"请求路径(url): {type(new_request_data.get('url', None))} || {new_request_data.get('url', None)}\n" \
-                         f"请求方式(method): {type(new_request_data.get('method', None))} || {new_request_data.get('method', None)}\n" \
-                         f"请求头(headers): {type(new_request_data.get('headers', None))} || {new_request_data.get('headers', None)}\n" \
-                         f"请求类型(request_type): {type(new_request_data.get('request_type', None))} || {new_request_data.get('request_type', None)}\n" \
-                         f"请求参数(payload): {type(new_request_data.get('payload', None))} || {new_request_data.get('payload', None)}\n" \
-                         f"响应断言(assert_response): {type(new_request_data.get('assert_response', None))} || {new_request_data.get('assert_response', None)}\n" \
-                         f"后置提取参数(extract): {type(new_request_data.get('extract', None))} || {new_request_data.get('extract', None)}\n" \
-                         "=====================================================")
+            logger.opt(lazy=True).debug("{}", lambda: ("\n-------------用例数据处理后--------------------\n"
+                                                       f"用例ID:  {type(new_request_data.get('id', None))} || {new_request_data.get('id', None)}\n" \
+                                                       f"用例标题(title):  {type(new_request_data.get('title', None))} || {new_request_data.get('title', None)}\n" \
+                                                       f"请求路径(url): {type(new_request_data.get('url', None))} || {new_request_data.get('url', None)}\n" \
+                                                       f"请求方式(method): {type(new_request_data.get('method', None))} || {new_request_data.get('method', None)}\n" \
+                                                       f"请求头(headers): {type(new_request_data.get('headers', None))} || {new_request_data.get('headers', None)}\n" \
+                                                       f"请求类型(request_type): {type(new_request_data.get('request_type', None))} || {new_request_data.get('request_type', None)}\n" \
+                                                       f"请求参数(payload): {type(new_request_data.get('payload', None))} || {new_request_data.get('payload', None)}\n" \
+                                                       f"响应断言(assert_response): {type(new_request_data.get('assert_response', None))} || {new_request_data.get('assert_response', None)}\n" \
+                                                       f"后置提取参数(extract): {type(new_request_data.get('extract', None))} || {new_request_data.get('extract', None)}\n" \
+                                                       "====================================================="))
             return new_request_data
         except Exception as e:
             logger.error(f"接口数据处理异常：{e}")
@@ -113,19 +102,18 @@ class RequestControl(BaseRequest):
         response_body = kwargs.get("response_body")
         response_result = kwargs.get("response_result")
 
-        _res = ("\n-------------发送请求--------------------\n" \
-                f"ID: {key}\n" \
-                f"标题: {title}\n" \
-                f"请求URL: {url}\n" \
-                f"请求方式: {method}\n" \
-                f"请求头:   {headers}\n" \
-                f"请求关键字: {request_type}\n" \
-                f"请求参数: {payload}\n" \
-                f"响应码: {status_code}\n" \
-                f"响应header: {response_header}\n"
-                # f"响应body: {response_body}\n" \
-                f"响应结果: {response_result}\n")
-        logger.info(_res)
+        logger.opt(lazy=True).info("{}", lambda: ("\n-------------发送请求--------------------\n" \
+                                                  f"ID: {key}\n" \
+                                                  f"标题: {title}\n" \
+                                                  f"请求URL: {url}\n" \
+                                                  f"请求方式: {method}\n" \
+                                                  f"请求头:   {headers}\n" \
+                                                  f"请求关键字: {request_type}\n" \
+                                                  f"请求参数: {payload}\n" \
+                                                  f"响应码: {status_code}\n" \
+                                                  f"响应header: {response_header}\n"
+                                                  # f"响应body: {response_body}\n" \
+                                                  f"响应结果: {response_result}\n"))
         allure_step(f"ID: {key}")
         allure_step(f"标题: {title}")
         allure_step(f"请求URL: {url}")
@@ -162,30 +150,58 @@ class RequestControl(BaseRequest):
             raise ValueError("请求数据异常")
 
         with allure.step(f"--> 发送接口请求, 接口名称：{api_info.get('title')} ({api_info.get('id')})"):
-            new_api_data = self.before_request(request_data=api_info, source_data=global_var)
-
-            response = self.send_request(new_api_data)
-
-            new_api_data["status_code"] = response.status
-            new_api_data["response_header"] = response.headers
-            new_api_data["response_body"] = response.body().decode('utf-8')
+            # 分阶段计时，结束后（包括断言失败时）生成耗时记录
+            timer = PhaseTimer()
+            with timer.phase("template"):
+                new_api_data = self.before_request(request_data=api_info, source_data=global_var)
 
+            response = None
             try:
-                new_api_data["response_result"] = response.json()
-            except:
-                new_api_data["response_result"] = response.text()
+                with timer.phase("network"):
+                    response = self.send_request(new_api_data)
+
+                with timer.phase("decode"):
+                    self.decode_response(response, new_api_data)
+
+                self.api_step_record(**new_api_data)
+
+                # 进行响应断言
+                with timer.phase("assert"):
+                    AssertHandle(assert_data=new_api_data["assert_response"], response=response).assert_handle()
+
+                # 进行响应参数提取，并返回提取后的数据
+                if new_api_data.get("extract"):
+                    with timer.phase("extract"):
+                        extract_results = self.after_request(response=response, api_data=new_api_data,
+                                                             db_info=db_info)
+                    new_api_data.update(extract_results)
+            finally:
+                self.record_timing(timer, new_api_data, response)
+            logger.debug("接口请求完成后，接口请求数据，响应数据 & 提取数据：{}", new_api_data)
+            return new_api_data
 
-            self.api_step_record(**new_api_data)
+    @staticmethod
+    def decode_response(response: APIResponse, api_data: dict) -> None:
+        """
+        解析响应，将响应码、响应头、响应内容写入接口数据
+        """
+        api_data["status_code"] = response.status
+        api_data["response_header"] = response.headers
+        api_data["response_body"] = response.body().decode('utf-8')
 
-            # 进行响应断言
-            AssertHandle(assert_data=new_api_data["assert_response"], response=response).assert_handle()
+        try:
+            api_data["response_result"] = response.json()
+        except Exception:
+            api_data["response_result"] = response.text()
 
-            # 进行响应参数提取，并返回提取后的数据
-            if new_api_data.get("extract"):
-                extract_results = self.after_request(response=response, api_data=new_api_data, db_info=db_info)
-                new_api_data.update(extract_results)
-            logger.debug(f"接口请求完成后，接口请求数据，响应数据 & 提取数据：{new_api_data}")
-            return new_api_data
+    @staticmethod
+    def record_timing(timer: PhaseTimer, api_data: dict, response: APIResponse = None) -> None:
+        """
+        生成接口的分阶段耗时记录，附加到allure并加入会话汇总
+        """
+        timing_collector.add(timer.record(api_id=api_data.get("id"), title=api_data.get("title"),
+                                          url=api_data.get("url"), method=api_data.get("method"),
+                                          status=response.status if response is not None else None))
 
     def after_request(self, response: APIResponse, api_data, db_info=None):
         """
@@ -198,8 +214,10 @@ class RequestControl(BaseRequest):
 
        """
         extract = api_data.get("extract")
-        logger.info(f"断言成功后需要进行提取操作，extract={extract}")
+        logger.info("断言成功后需要进行提取操作，extract={}", extract)
 
+        # 响应的json/text在多个提取表达式之间共用，只解析一次
+        parsed = {}
         case_results = {}
         response_results = {}
         database_results = {}
@@ -207,25 +225,32 @@ class RequestControl(BaseRequest):
 
         for k, v in extract.items():
             if k.lower() == "case":
-                logger.info(f"数据来源：{k}")
+                logger.info("数据来源：{}", k)
                 # 将用例数据作为来源
                 for _k, _v in v.items():
                     if _k.lower() == "type_jsonpath":
-                        for i, j in _v.items():
-                            case_results[i] = json_extractor(api_data, j)
+                        case_results.update(json_extract_many(api_data, _v))
 
                     elif _k.lower() == "type_re":
-                        for i, j in _v.items():
-                            case_results[i] = re_extract(str(api_data), j)
+                        case_results.update(re_extract_many(str(api_data), _v))
                     else:
                         logger.error(f"提取方式： {_k} 错误，仅支持type_jsonpath、type_re两种")
-                logger.info(f"数据来源：{k}， 提取结果：{case_results} --")
+                logger.info("数据来源：{}， 提取结果：{} --", k, case_results)
             elif k.lower() == "database":
-                logger.info(f"数据来源：{k}")
+                logger.info("数据来源：{}", k)
                 # 将数据库SQL执行结果作为来源
-                if v.get("sql"):
-                    mysql = MysqlServer(**db_info)
-                    sql_result = mysql.query_all(v["sql"])
+                stream = v.pop("stream", False)
+                max_matches = v.pop("max_matches", 1000)
+                if v.get("sql") and stream:
+                    # 流式提取：逐行读取结果集并提取，结果集不会整体加载到内存中
+                    exprs = {i: (_k, j) for _k, _v in v.items() if _k != "sql" for i, j in _v.items()}
+                    with mysql_pool.connection(db_info) as mysql:
+                        database_results.update(
+                            stream_extract(mysql.iter_query(v.pop("sql")), exprs, max_matches=max_matches))
+                    sql_result = None
+                elif v.get("sql"):
+                    with mysql_pool.connection(db_info) as mysql:
+                        sql_result = mysql.query_all(v["sql"])
                     v.pop("sql")
                 else:
                     sql_result = None
@@ -233,51 +258,49 @@ class RequestControl(BaseRequest):
                 if sql_result:
                     for _k, _v in v.items():
                         if _k.lower() == "type_jsonpath":
-                            for i, j in _v.items():
-                                database_results[i] = json_extractor(sql_result, j)
+                            database_results.update(json_extract_many(sql_result, _v))
 
                         elif _k.lower() == "type_re":
-                            for i, j in _v.items():
-                                database_results[i] = re_extract(str(sql_result), j)
+                            database_results.update(re_extract_many(str(sql_result), _v))
                         else:
                             logger.error(f"提取方式： {_k} 错误，仅支持type_jsonpath、type_re两种")
-                logger.info(f"数据来源：{k}， 提取结果：{database_results} --")
+                logger.info("数据来源：{}， 提取结果：{} --", k, database_results)
             elif k.lower() == "response":
-                logger.info(f"数据来源：{k}")
+                logger.info("数据来源：{}", k)
                 # 来源=response
                 for _k, _v in v.items():
-                    if _k.lower() == "type_jsonpath":
-                        for i, j in _v.items():
-                            response_results[i] = json_extractor(response.json(), j)
-                    elif _k.lower() == "type_re":
-                        for i, j in _v.items():
-                            response_results[i] = re_extract(response.text, j)
-                    elif _k.lower() == "type_response":
-                        for i, j in _v.items():
-                            response_results[i] = response_extract(response, j)
-                    else:
-                        logger.error(f"提取方式： {_k} 错误，仅支持type_jsonpath、type_re、type_response三种")
-                logger.info(f"数据来源：{k}， 提取结果：{response_results} --")
+                    response_results.update(self._extract_from_response(response, _k, _v, parsed))
+                logger.info("数据来源：{}， 提取结果：{} --", k, response_results)
             else:
                 logger.info(f"数据来源：Response对象")
                 # 直接k=type_jsonpath, type_re, type_response, 来源默认是response
-                if k.lower() == "type_jsonpath":
-                    for i, j in v.items():
-                        default_results[i] = json_extractor(response.json(), j)
-                elif k.lower() == "type_re":
-                    for i, j in v.items():
-                        default_results[i] = re_extract(response.text, j)
-                elif k.lower() == "type_response":
-                    for i, j in v.items():
-                        default_results[i] = response_extract(response, j)
-                else:
-                    logger.error(
-                        f"数据来源默认是Response对象， 提取方式： {k} 错误，仅支持type_jsonpath、type_re、type_response三种")
-
-                logger.info(f"数据来源：Response对象， 提取结果：{default_results}")
+                default_results.update(self._extract_from_response(response, k, v, parsed))
+                logger.info("数据来源：Response对象， 提取结果：{}", default_results)
 
         return {**case_results, **response_results, **database_results, **default_results}
 
+    @staticmethod
+    def _extract_from_response(response: APIResponse, extract_type: str, exprs: dict, parsed: dict) -> dict:
+        """
+        按提取方式从响应中批量提取数据
+        :param extract_type: 提取方式，type_jsonpath、type_re、type_response
+        :param exprs: {变量名: 提取表达式}
+        :param parsed: 已解析的响应内容缓存，key为json/text
+        """
+        if extract_type.lower() == "type_jsonpath":
+            if "json" not in parsed:
+                parsed["json"] = response.json()
+            return json_extract_many(parsed["json"], exprs)
+        elif extract_type.lower() == "type_re":
+            if "text" not in parsed:
+                parsed["text"] = response.text()
+            return re_extract_many(parsed["text"], exprs)
+        elif extract_type.lower() == "type_response":
+            return {i: response_extract(response, j) for i, j in exprs.items()}
+        else:
+            logger.error(f"提取方式： {extract_type} 错误，仅支持type_jsonpath、type_re、type_response三种")
+            return {}
+
 
 if __name__ == '__main__':
     import getpass
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+# @Version: Python 3.13
+# @Author  : 会飞的🐟
+# @File    : wait_handle.py
+# @Software: PyCharm
+# @Desc: 条件等待：按退避间隔轮询条件，条件成立立即返回；并记录强制等待与条件等待的耗时
+
+import time
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+
+class WaitTimeoutError(TimeoutError):
+    """
+    条件等待超时
+    """
+
+
+def poll(condition: Callable[[], Any], timeout: float = 10, interval: float = 0.05, max_interval: float = 1,
+         backoff: float = 2, sleep: Callable[[float], None] = time.sleep, message: str = "") -> Any:
+    """
+    轮询条件，条件返回真值时立即返回该值
+    轮询间隔从 interval 开始，每次乘以 backoff，最大不超过 max_interval；条件抛出的异常视为条件不成立
+
+    :param condition: 条件函数
+    :param timeout: 超时时间（秒）
+    :param interval: 初始轮询间隔（秒）
+    :param max_interval: 最大轮询间隔（秒）
+    :param backoff: 间隔增长倍数
+    :param sleep: 等待方法（秒），同步playwright中应使用 page.wait_for_timeout，等待期间仍然处理页面事件
+    :param message: 超时时的提示信息
+    :raise WaitTimeoutError: 超时后条件仍不成立
+    """
+    deadline = time.perf_counter() + timeout
+    last_error = None
+    while True:
+        try:
+            result = condition()
+            if result:
+                return result
+        except Exception as e:
+            last_error = e
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            detail = f"，最后一次报错：{last_error}" if last_error else ""
+            raise WaitTimeoutError(f"等待条件超时({timeout}s)：{message or condition}{detail}")
+        sleep(min(interval, remaining))
+        interval = min(interval * backoff, max_interval)
+
+
+class SleepLedger:
+    """
+    等待耗时台账（进程内共享，使用模块级的 sleep_ledger 实例）
+
+    - 强制等待（BasePage.wait）：按调用位置记录次数和等待时长
+    - 条件等待（BasePage.wait_until 等）：记录实际等待时长，以及迁移前在此处的强制等待时长(replaces)，
+      两者之差即为迁移节省的时间
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 调用位置 -> {"count": 次数, "seconds": 等待时长}
+        self.sleeps: Dict[str, dict] = {}
+        # 调用位置 -> {"count": 次数, "seconds": 实际等待时长, "replaced": 被替换的强制等待时长}
+        self.waits: Dict[str, dict] = {}
+
+    def add_sleep(self, site: str, seconds: float) -> None:
+        with self._lock:
+            item = self.sleeps.setdefault(site, {"count": 0, "seconds": 0.0})
+            item["count"] += 1
+            item["seconds"] += seconds
+
+    def add_wait(self, site: str, seconds: float, replaced: Optional[float] = None) -> None:
+        with self._lock:
+            item = self.waits.setdefault(site, {"count": 0, "seconds": 0.0, "replaced": 0.0})
+            item["count"] += 1
+            item["seconds"] += seconds
+            item["replaced"] += replaced or 0.0
+
+    def summary(self) -> dict:
+        with self._lock:
+            return summarize_sleeps(self.sleeps, self.waits)
+
+
+def summarize_sleeps(sleeps: Dict[str, dict], waits: Dict[str, dict]) -> dict:
+    """
+    汇总等待台账：强制等待、条件等待的总时长，以及迁移前后花在等待上的时间
+    """
+    def rows(items: Dict[str, dict]) -> List[dict]:
+        return sorted(({"site": site, **{k: round(v, 3) for k, v in item.items()}} for site, item in items.items()),
+                      key=lambda x: -x["seconds"])
+
+    hard_sleep = sum(item["seconds"] for item in sleeps.values())
+    waited = sum(item["seconds"] for item in waits.values())
+    replaced = sum(item["replaced"] for item in waits.values())
+    migrated = sum(item["seconds"] for item in waits.values() if item["replaced"])
+    return {
+        "hard_sleep_seconds": round(hard_sleep, 3),
+        "conditional_wait_seconds": round(waited, 3),
+        # 迁移前：强制等待 + 已被条件等待替换掉的强制等待；迁移后：强制等待 + 替换后的条件等待实际耗时
+        "before_seconds": round(hard_sleep + replaced, 3),
+        "after_seconds": round(hard_sleep + migrated, 3),
+        "hard_sleeps": rows(sleeps),
+        "waits": rows(waits),
+    }
+
+
+def merge_sleep_summaries(*summaries: dict) -> dict:
+    """
+    合并多个进程的等待台账汇总
+    """
+    sleeps: Dict[str, dict] = {}
+    waits: Dict[str, dict] = {}
+    for summary in summaries:
+        for target, key in ((sleeps, "hard_sleeps"), (waits, "waits")):
+            for row in summary[key]:
+                item = target.setdefault(row["site"], {k: 0 for k in row if k != "site"})
+                for k, v in row.items():
+                    if k != "site":
+                        item[k] += v
+    return summarize_sleeps(sleeps, waits)
+
+
+def format_sleep_summary(summary: dict, limit: int = 10) -> str:
+    """
+    输出等待台账的文本汇总
+    """
+    lines = [f"hard sleeps: {summary['hard_sleep_seconds']:.1f}s, conditional waits: "
+             f"{summary['conditional_wait_seconds']:.1f}s, before: {summary['before_seconds']:.1f}s, "
+             f"after: {summary['after_seconds']:.1f}s"]
+    for row in summary["hard_sleeps"][:limit]:
+        lines.append(f"  sleep {row['seconds']:>8.1f}s {row['count']:>5}x  {row['site']}")
+    return "\n".join(lines)
+
+
+sleep_ledger = SleepLedger()
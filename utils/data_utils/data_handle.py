@@ -11,13 +11,12 @@ import re, uuid
 import os
 import base64
 from datetime import datetime, timedelta
-import copy
 from loguru import logger
-from string import Template
 from requests.cookies import RequestsCookieJar
 from requests.utils import dict_from_cookiejar
 from utils.data_utils.faker_handle import FakerData
-from utils.data_utils.eval_data_handle import eval_data
+from utils.data_utils.eval_data_handle import eval_data, expose, safe_eval
+from utils.data_utils.template_handle import compile_template
 from utils.files_utils.files_handle import file_to_base64, filepath_to_base64, get_files
 from config.path_config import FILES_DIR
 from utils.tools.aes_encrypt_decrypt import Encrypt
@@ -30,6 +29,11 @@ class DataHandle:
         # 获取FakerData类所有自定义方法
         self.method_list = [method for method in dir(FakerData) if
                             callable(getattr(FakerData, method)) and not method.startswith("__")]
+        # 执行${}表达式时可以使用的名称：FakerData类方法、faker、fk_zh、EXPR_GLOBALS中列出的类和函数、EXPR_MODULES
+        self.namespace = {name: globals()[name] for name in EXPR_GLOBALS}
+        self.namespace.update(EXPR_MODULES)
+        self.namespace.update({method: getattr(self.FakerDataClass, method) for method in self.method_list})
+        self.namespace.update(faker=self.FakerDataClass.faker, fk_zh=self.FakerDataClass.fk_zh)
 
     def process_cookie_jar(self, data):
         """
@@ -78,92 +82,86 @@ class DataHandle:
             return replaced_text, result
 
     def data_handle(self, obj, source=None):
-        obj = copy.deepcopy(eval_data(obj))
-        # obj = eval_data(obj)
-        return self.data_handle_(obj, source)
-
-    def data_handle_(self, obj, source=None):
         """
-        递归处理字典、列表中的字符串，将${}占位符替换成source中的值
+        递归处理字典、列表中的字符串，将${}占位符替换成source中的值，并执行${}中的python表达式
+        不会修改传入的obj，返回处理后的新对象
+        :param obj: 待处理的数据
+        :param source: 用于替换的变量字典
         """
-        func = {}
-        keys = {}
-
         source = {} if not source or not isinstance(source, dict) else source
-        logger.trace(f"source={source}")
+        logger.trace("source={}", source)
 
         # 处理一下source，检测到里面存在RequestsCookieJar，转成dict，再转换成JSON 格式的字符串（序列化）。
         # 避免传递过来一个RequestsCookieJar，替换后变成了'RequestsCookieJar'，导致cookies无法使用的问题
         source = self.process_cookie_jar(data=source)
+        return self.render(eval_data(obj), source)
 
-        # 如果进来的是字符串，先将各种类型的表达式处理完
-        if isinstance(obj, str):
-            # 先把python表达式找出来存着，这里会漏掉一些诸如1+1的表达式
-            pattern = r"\${([^}]+\))}"  # 匹配以 "${" 开头、以 ")}" 结尾的字符串，并在括号内提取内容，括号内不能包含"}"字符
-            obj, func = self.replace_and_store_placeholders(pattern, obj)
-
-            # 模板替换
-            should_eval = 0
-            if obj.startswith("${") and obj.endswith("}"):
-                if source.get(obj[2:-1]) and not isinstance(source[obj[2:-1]], str):
-                    should_eval = 1
-            obj = Template(obj).safe_substitute(source)
-            if should_eval == 1:
-                obj = eval_data(obj)
+    def data_handle_(self, obj, source=None):
+        """
+        与data_handle相同，但不会先对obj整体执行eval_data
+        """
+        source = {} if not source or not isinstance(source, dict) else source
+        return self.render(obj, self.process_cookie_jar(data=source))
 
-            if not isinstance(obj, str):
-                return self.data_handle(obj)
-
-            # 再找一遍剩余的${}跟第一步的结果合并，提取漏掉的诸如1+1的表达式(在此认为关键字无法替换的都是表达式，最后表达式也无法处理的情况就报错或者原样返回)
-            pattern = r'\$\{([^}]+)\}'  # 定义匹配以"${"开头，"}"结尾的字符串的正则表达式
-            obj, func_temp = self.replace_and_store_placeholders(pattern, obj)
-            func.update(func_temp)
-            # 进行函数调用替换
-            obj = self.invoke_funcs(obj, func)
-            if not isinstance(obj, str):
-                return self.data_handle(obj)
-            # 直接返回最后的结果
-            return obj
+    def render(self, obj, source):
+        """
+        按source渲染obj，字符串使用编译缓存的模板（utils.data_utils.template_handle），
+        字典、列表构造新的对象返回，无需深拷贝
+        """
+        if isinstance(obj, str):
+            return self.render_str(obj, source)
         elif isinstance(obj, list):
-            for index, item in enumerate(obj):
-                obj[index] = self.data_handle(item, source)
-            return obj
+            return [self.render(eval_data(item), source) for item in obj]
         elif isinstance(obj, dict):
-            for key, value in obj.items():
-                obj[key] = self.data_handle(value, source)
-            return obj
+            return {key: self.render(eval_data(value), source) for key, value in obj.items()}
         else:
             return obj
 
+    def render_str(self, obj, source):
+        if "$" not in obj:
+            return obj
+        template = compile_template(obj)
+        if template.static:
+            return template.text
+
+        # 整个字符串就是一个${key}，且source中的值不是字符串，需要保留原来的类型，例如：列表、字典、数字
+        name = template.single_var
+        if name is not None and source.get(name) and not isinstance(source[name], str):
+            value = source[name]
+            if not isinstance(value, (list, dict)):
+                # 与字符串替换后再eval的结果保持一致，例如：数字106得到的是字符串'106'
+                value = eval_data(str(value))
+            return self.render(value, {})
+
+        obj, should_eval = template.render(source, self.call_func)
+        if should_eval:
+            # ${}中的函数返回了非字符串的结果，尝试把替换后的整个字符串当作python表达式执行
+            try:
+                obj = self.call_func(obj)
+            except Exception:
+                logger.warning(
+                    f"\nWarn: --------处理函数方法后，尝试eval({obj})失败，可能原始的字符串并不是python表达式-------")
+            if not isinstance(obj, str):
+                return self.render(obj, {})
+        return obj
+
+    def call_func(self, func):
+        """
+        执行${}中的函数或python表达式，返回执行结果，无法执行时抛出异常
+        表达式只能使用白名单内的语法和self.namespace中的名称，见 utils.data_utils.eval_data_handle.safe_eval
+        :param func: 函数或表达式，例如：generate_name(lan='zh')、faker.name()、random.choice([1, 2])、1+1
+        """
+        return safe_eval(func, self.namespace)
+
     def invoke_funcs(self, obj, funcs):
         """
         调用方法，并将方法返回的结果替换到obj中去
+        :param funcs: replace_and_store_placeholders返回的占位符字典
         """
         for key, funcs in funcs.items():  # 遍历方法字典调用并替换
             func = funcs[1]
-            # logger.debug("invoke func : ", func)
             try:
-                if "." in func:
-                    if func.startswith("faker."):
-                        # 英文的faker数据：self.faker = Faker()
-                        faker = self.FakerDataClass.faker
-                        obj = self.deal_func_res(obj, key, eval(func))
-                    elif func.startswith("fk_zh."):
-                        # 中文的faker数据： self.fk_zh = Faker(locale='zh_CN')
-                        fk_zh = self.FakerDataClass.fk_zh
-                        obj = self.deal_func_res(obj, key, eval(func))
-                    else:
-                        obj = self.deal_func_res(obj, key, eval(func))
-                else:
-                    func_parts = func.split('(')
-                    func_name = func_parts[0]
-                    func_args_str = ''.join(func_parts[1:])[:-1]
-                    if func_name in self.method_list:  # 证明是FakerData类方法
-                        method = getattr(self.FakerDataClass, func_name)
-                        res = eval(f"method({func_args_str})")  # 尝试直接调用
-                        obj = self.deal_func_res(obj, key, res)
-                    else:  # 不是FakerData类方法，但有可能是 1+1 这样的
-                        obj = self.deal_func_res(obj, key, eval(func))
+                obj = self.deal_func_res(obj, key, self.call_func(func))
             except:
                 logger.warning("Warn: --------函数：%s 无法调用成功, 请检查是否存在该函数-------" % func)
                 obj = obj.replace(key, funcs[0])
@@ -174,7 +172,7 @@ class DataHandle:
         obj = obj.replace(key, str(res))
         try:
             if not isinstance(res, str):
-                obj = eval(obj)
+                obj = safe_eval(obj, self.namespace)
         except:
             msg = (f"\nobj --> {obj}\n"
                    f"函数返回值 --> {res}\n"
@@ -344,6 +342,21 @@ def aes_encrypt_data(target_str: str, ace_key):
     return ace.aes_encrypt(target_str)
 
 
+# ${}表达式中可以直接使用的类和函数，新增的工具函数需要加到这里才能在用例数据中调用
+# 模块不能直接放进来（通过模块的属性可以访问到 os、sys），只通过 expose 暴露其中用到的函数
+EXPR_MODULES = {
+    "random": expose(choice=random.choice, choices=random.choices, randint=random.randint, random=random.random,
+                     sample=random.sample, uniform=random.uniform),
+    "json": expose(dumps=json.dumps, loads=json.loads),
+    "base64": expose(b64encode=base64.b64encode, b64decode=base64.b64decode),
+}
+EXPR_GLOBALS = (
+    "datetime", "timedelta", "FakerData",
+    "get_file_content", "list_to_str", "string_to_base64", "str_to_list", "none_to_null", "get_file_base64",
+    "get_filepath_base64", "get_base64_content", "base64_decode", "update_wiki_sidebar", "get_current_week",
+    "aes_encrypt_data",
+)
+
 # 声明data_handle方法，这样外部就可以直接import data_handle来使用了
 data_handle = DataHandle().data_handle
 
@@ -355,8 +368,8 @@ if __name__ == '__main__':
     print(new, type(new),
           end="\n\n---------------------------------------------------------------------------------------------\n\n")
 
-    print("-----------测试场景2：识别${python表达式}，可以在当前文件导入其他模块，一样可以识别替换---------------------")
-    # 导入其他方法，也可以直接使用
+    print("-----------测试场景2：识别${python表达式}，可以在当前文件导入其他模块，加到EXPR_GLOBALS后一样可以识别替换---------------------")
+    # 导入其他方法，加到EXPR_GLOBALS中，也可以直接使用
     # from common_utils.time_handle import test_fun_a
     # data = "${test_fun_a()}"
     # new = data_handle(data)
@@ -3,11 +3,125 @@
 # @Author  : 会飞的🐟
 # @File    : eval_data_handle.py
 # @Software: PyCharm
-# @Desc: TODO: Description
+# @Desc: 受限的python表达式执行：只允许白名单内的语法，名称只能来自传入的命名空间
 
+import ast
+import types
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional
 from loguru import logger
 
 
+class UnsafeExpressionError(ValueError):
+    """
+    表达式中包含不允许执行的语法或名称
+    """
+
+
+# 允许出现的语法节点：字面量、容器、运算、比较、条件表达式、下标/切片、属性访问和函数调用
+_ALLOWED_NODES = (
+    ast.Expression, ast.Constant, ast.List, ast.Tuple, ast.Dict, ast.Set,
+    ast.Name, ast.Load, ast.Attribute, ast.Call, ast.keyword, ast.Starred,
+    ast.Subscript, ast.Slice, ast.IfExp, ast.JoinedStr, ast.FormattedValue,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.UnaryOp, ast.UAdd, ast.USub, ast.Not,
+    ast.BoolOp, ast.And, ast.Or,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn, ast.Is, ast.IsNot,
+)
+
+# 即使在白名单对象上也不允许访问的属性：str.format 可以绕过属性检查读取私有属性
+_FORBIDDEN_ATTRS = {"format", "format_map", "mro"}
+
+# 表达式中可以直接使用的内置函数
+SAFE_BUILTINS: Dict[str, Any] = {
+    name: __builtins__[name] if isinstance(__builtins__, dict) else getattr(__builtins__, name)
+    for name in ("abs", "all", "any", "bool", "dict", "enumerate", "float", "int", "len", "list", "max", "min",
+                 "range", "reversed", "round", "set", "sorted", "str", "sum", "tuple", "zip")
+}
+
+# 属性访问、下标取值的结果不允许是这些类型：通过模块、类、栈帧可以一路访问到 os、sys 等模块
+_FORBIDDEN_VALUE_TYPES = (types.ModuleType, type, types.FrameType, types.CodeType, types.TracebackType)
+# 运行时检查函数在表达式中的名称，用户表达式中不允许出现下划线开头的名称，不会冲突
+_GUARD_NAME = "__expr_guard__"
+
+
+def _guard(value: Any) -> Any:
+    if isinstance(value, _FORBIDDEN_VALUE_TYPES):
+        raise UnsafeExpressionError(f"表达式中不允许访问模块、类或栈帧：{value!r}")
+    return value
+
+
+_SAFE_GLOBALS = {"__builtins__": SAFE_BUILTINS, _GUARD_NAME: _guard}
+
+
+def expose(**funcs: Callable) -> types.SimpleNamespace:
+    """
+    把若干函数包装成一个只带这些函数的命名空间对象，代替模块放入表达式的命名空间，
+    例如 expose(choice=random.choice) 之后表达式中仍然可以写 random.choice([1, 2])，但访问不到 random 模块的其他属性
+    """
+    return types.SimpleNamespace(**funcs)
+
+
+class _GuardTransformer(ast.NodeTransformer):
+    """
+    把表达式中的每个属性访问、下标取值 x 改写成 __expr_guard__(x)，执行时检查取到的值
+    """
+
+    def _wrap(self, node: ast.AST) -> ast.AST:
+        self.generic_visit(node)
+        return ast.copy_location(ast.Call(func=ast.Name(id=_GUARD_NAME, ctx=ast.Load()), args=[node], keywords=[]),
+                                 node)
+
+    visit_Attribute = _wrap
+    visit_Subscript = _wrap
+
+
+def _check_node(node: ast.AST, expr: str) -> None:
+    for child in ast.walk(node):
+        if not isinstance(child, _ALLOWED_NODES):
+            raise UnsafeExpressionError(f"表达式中不允许使用 {type(child).__name__}：{expr}")
+        if isinstance(child, ast.Name) and child.id.startswith("_"):
+            raise UnsafeExpressionError(f"表达式中不允许使用私有名称 {child.id}：{expr}")
+        if isinstance(child, ast.Attribute) and (child.attr.startswith("_") or child.attr in _FORBIDDEN_ATTRS):
+            raise UnsafeExpressionError(f"表达式中不允许访问属性 {child.attr}：{expr}")
+
+
+@lru_cache(maxsize=4096)
+def _compile(expr: str):
+    try:
+        tree = ast.parse(expr.strip(), mode="eval")
+        _check_node(tree, expr)
+        tree = ast.fix_missing_locations(_GuardTransformer().visit(tree))
+        return compile(tree, "<expr>", "eval"), None
+    except (SyntaxError, ValueError) as e:
+        # 编译失败的结果也缓存起来，普通文本不会被反复解析
+        return None, e
+
+
+def compile_expr(expr: str):
+    """
+    解析并校验python表达式，返回编译后的代码对象，结果按表达式字符串缓存
+    :raise SyntaxError: 不是合法的python表达式
+    :raise UnsafeExpressionError: 包含白名单以外的语法，或访问了私有名称、属性
+    执行时属性访问、下标取值得到模块、类或栈帧时同样抛出 UnsafeExpressionError
+    """
+    code, error = _compile(expr)
+    if error is not None:
+        raise error
+    return code
+
+
+def safe_eval(expr: str, namespace: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    执行受限的python表达式
+    支持字面量、算术/比较/逻辑运算、下标、属性访问以及对命名空间中对象的调用，属性访问和下标不能取到模块、类或栈帧，例如：
+        safe_eval("[1, 2, 3]")、safe_eval("1+1")、safe_eval("faker.name()", {"faker": Faker()})
+    :param expr: 表达式字符串
+    :param namespace: 表达式中可以使用的名称，不传则只能使用 SAFE_BUILTINS 中的内置函数
+    """
+    return eval(compile_expr(expr), _SAFE_GLOBALS, namespace or {})
+
+
 def eval_data(data):
     """
     执行一个字符串表达式，并返回其表达式的值
@@ -17,10 +131,17 @@ def eval_data(data):
             return data
         if data.isdigit():
             return data
-        value = eval(data)
+        value = safe_eval(data)
         if hasattr(value, "__call__"):
             return data
         return value
     except Exception as e:
         logger.trace(f"{data} --> 该数据不能被eval\n报错：{e}")
         return data
+
+
+if __name__ == '__main__':
+    print(eval_data("[1, '1', [1, 2], {'name':'flora', 'age': '1'}]"))
+    print(eval_data("1+1"), eval_data("hello world"), eval_data("106"))
+    print(eval_data("__import__('os').system('echo unsafe')"))
+    print(eval_data("().__class__.__bases__"))
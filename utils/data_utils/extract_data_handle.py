@@ -7,10 +7,66 @@
 
 import re
 import json
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
 from jsonpath import jsonpath
 from loguru import logger
 from playwright.sync_api import APIResponse
 from utils.data_utils.data_handle import data_handle
+from utils.data_utils.eval_data_handle import safe_eval
+
+
+# 只包含 .key、['key']、[0] 的简单jsonpath，可以直接按路径取值，不需要经过jsonpath库的解析
+_SIMPLE_JSONPATH = re.compile(r"^\$((?:\.[A-Za-z_][A-Za-z0-9_-]*|\[\d+\]|\['[^'\[\];,.*?()@!$]+'\])+)$")
+_SIMPLE_JSONPATH_STEP = re.compile(r"\.([A-Za-z_][A-Za-z0-9_-]*)|\[(\d+)\]|\['([^']+)'\]")
+
+
+@lru_cache(maxsize=1024)
+def compile_jsonpath(expr: str) -> Optional[Tuple[str, ...]]:
+    """
+    编译jsonpath表达式，结果按表达式缓存
+    :return: 简单路径返回每一级的key组成的元组，例如 $.data.list[0].id -> ('data', 'list', '0', 'id')；
+             包含通配符、过滤器、切片等的表达式返回None，交给jsonpath库处理
+    """
+    m = _SIMPLE_JSONPATH.match(expr.strip())
+    if not m:
+        return None
+    return tuple(a or b or c for a, b, c in _SIMPLE_JSONPATH_STEP.findall(m.group(1)))
+
+
+@lru_cache(maxsize=1024)
+def compile_regex(expr: str):
+    """
+    编译正则表达式，结果按表达式缓存
+    """
+    return re.compile(expr)
+
+
+def jsonpath_values(obj, expr: str):
+    """
+    执行jsonpath表达式，返回值与 jsonpath(obj, expr) 一致：匹配到的值组成的列表，未匹配返回False
+    简单路径直接逐级取值：字典按key取值，列表按数字下标取值，与jsonpath库的规则相同
+    """
+    steps = compile_jsonpath(expr)
+    if steps is None:
+        return jsonpath(obj, expr)
+    if not obj:
+        return False
+    for step in steps:
+        if isinstance(obj, dict) and step in obj:
+            obj = obj[step]
+        elif isinstance(obj, list) and step.isdigit() and int(step) < len(obj):
+            obj = obj[int(step)]
+        else:
+            return False
+    return [obj]
+
+
+def _single_or_list(values):
+    """
+    只有一个匹配时返回该值，否则返回列表
+    """
+    return values[0] if len(values) == 1 else values
 
 
 def json_extractor(obj, expr: str = '.'):
@@ -21,12 +77,15 @@ def json_extractor(obj, expr: str = '.'):
     :return result: 提取的结果，未提取到返回 None
     """
     try:
-        result = jsonpath(obj, expr)[0] if len(jsonpath(obj, expr)) == 1 else jsonpath(obj, expr)
-        result = data_handle(obj=result)
-        logger.debug(f"\n提取对象：{obj}\n"
-                     f"提取表达式： {expr} \n"
-                     f"提取值类型： {type(result)}\n"
-                     f"提取值：{result}\n")
+        values = jsonpath_values(obj, expr)
+        if not values:
+            logger.warning(f"\n提取表达式： {expr}\n未提取到数据\n")
+            return None
+        result = data_handle(obj=_single_or_list(values))
+        logger.opt(lazy=True).debug("{}", lambda: (f"\n提取对象：{obj}\n"
+                                                   f"提取表达式： {expr} \n"
+                                                   f"提取值类型： {type(result)}\n"
+                                                   f"提取值：{result}\n"))
         return result
     except Exception as e:
         logger.error(f"\n提取对象：{obj}\n"
@@ -43,13 +102,13 @@ def re_extract(obj: str, expr: str = '.'):
     """
     try:
         # 如果提取后的数据长度为1，则取第一个元素（返回str），否则返回列表
-        result = re.findall(expr, obj)[0] if len(re.findall(expr, obj)) == 1 else re.findall(expr, obj)
+        result = _single_or_list(compile_regex(expr).findall(obj))
         # 由于提取出来的数据都是str格式，将eval一样，还原数据格式
         result = data_handle(obj=result)
-        logger.debug(f"\n提取对象：{obj}\n"
-                     f"提取表达式： {expr}\n"
-                     f"提取值类型： {type(result)}\n"
-                     f"提取值：{result}\n")
+        logger.opt(lazy=True).debug("{}", lambda: (f"\n提取对象：{obj}\n"
+                                                   f"提取表达式： {expr}\n"
+                                                   f"提取值类型： {type(result)}\n"
+                                                   f"提取值：{result}\n"))
         return result
     except Exception as e:
         logger.error(f"\n提取对象：{obj}\n"
@@ -57,6 +116,119 @@ def re_extract(obj: str, expr: str = '.'):
                      f"错误信息：{e}\n")
 
 
+def json_extract_many(obj, exprs: Dict[str, str]) -> Dict[str, Any]:
+    """
+    从同一个对象中批量提取数据，结果格式与 json_extractor 一致，未提取到的值为None
+    :param obj: json/dict类型数据，只需解析一次
+    :param exprs: {名称: jsonpath表达式}
+    :return: {名称: 提取结果}
+    """
+    raw = {}
+    for name, expr in exprs.items():
+        try:
+            values = jsonpath_values(obj, expr)
+        except Exception as e:
+            logger.error(f"\n提取表达式： {expr}\n错误信息：{e}\n")
+            values = False
+        raw[name] = _single_or_list(values) if values else None
+    # 所有提取结果一起处理，只需调用一次data_handle
+    results = data_handle(obj=raw)
+    logger.opt(lazy=True).debug("{}", lambda: (f"\n提取对象：{obj}\n"
+                                               f"提取表达式： {exprs}\n"
+                                               f"提取值：{results}\n"))
+    return results
+
+
+def re_extract_many(obj: str, exprs: Dict[str, str]) -> Dict[str, Any]:
+    """
+    从同一个字符串中批量提取数据，结果格式与 re_extract 一致，表达式错误时值为None
+    :param obj: 字符串数据
+    :param exprs: {名称: 正则表达式}
+    :return: {名称: 提取结果}
+    """
+    raw = {}
+    for name, expr in exprs.items():
+        try:
+            raw[name] = _single_or_list(compile_regex(expr).findall(obj))
+        except Exception as e:
+            logger.error(f"\n提取表达式： {expr}\n错误信息：{e}\n")
+            raw[name] = None
+    results = data_handle(obj=raw)
+    logger.opt(lazy=True).debug("{}", lambda: (f"\n提取对象：{obj}\n"
+                                               f"提取表达式： {exprs}\n"
+                                               f"提取值：{results}\n"))
+    return results
+
+
+def stream_extract(rows: Iterable[dict], exprs: Dict[str, Tuple[str, str]],
+                   satisfied: Optional[Callable[[Dict[str, list], Dict[str, list]], bool]] = None,
+                   max_matches: int = 1000, strict: bool = False) -> Dict[str, Any]:
+    """
+    逐行从结果集中提取数据，不需要把整个结果集加载到内存或转换成字符串
+    每个表达式针对单行数据执行：jsonpath以单行为根(例如 $.id)，正则匹配 str(单行数据)
+    :param rows: 可迭代的行数据，例如 MysqlServer.iter_query 的返回值
+    :param exprs: 提取表达式，{名称: (提取方式, 表达式)}，提取方式为 type_jsonpath 或 type_re
+    :param satisfied: 每提取到新的值时调用 satisfied(本行新提取到的值, 目前为止所有提取到的值)，值均为原始的匹配列表，
+                      返回True时停止读取剩余的行；只能在剩余的行不可能改变判断结果时返回True
+    :param max_matches: 每个表达式最多保留的匹配数，所有表达式都达到上限后停止读取
+    :param strict: 为True时匹配数超过 max_matches 直接抛出 ValueError，而不是截断后返回（例如断言需要完整的结果）
+    :return: {名称: 提取结果}，格式与 json_extractor/re_extract 一致：只有一个匹配时返回该值，否则返回列表；
+             jsonpath 未匹配返回 None，正则未匹配返回 []
+    """
+    compiled = {}
+    for name, (extract_type, expr) in exprs.items():
+        if extract_type.lower() not in ("type_jsonpath", "type_re"):
+            raise ValueError(f"提取方式： {extract_type} 错误，仅支持type_jsonpath、type_re两种")
+        compiled[name] = (extract_type.lower(), compile_regex(expr) if extract_type.lower() == "type_re" else expr)
+    matches = {name: [] for name in exprs}
+
+    def _results():
+        results = {}
+        for name, values in matches.items():
+            if not values:
+                results[name] = None if compiled[name][0] == "type_jsonpath" else []
+            else:
+                results[name] = data_handle(obj=values[0] if len(values) == 1 else values)
+        return results
+
+    count = 0
+    try:
+        for row in rows:
+            count += 1
+            found = {}
+            for name, (extract_type, expr) in compiled.items():
+                values = matches[name]
+                if len(values) >= max_matches and not strict:
+                    continue
+                if extract_type == "type_jsonpath":
+                    new = jsonpath_values(row, expr) or []
+                else:
+                    new = expr.findall(str(row))
+                if new:
+                    if strict and len(values) + len(new) > max_matches:
+                        raise ValueError(f"提取表达式 {name} 的匹配数超过上限 max_matches={max_matches}，"
+                                         f"请调大 max_matches 或者缩小sql的查询范围")
+                    found[name] = new[:max_matches - len(values)]
+                    values.extend(found[name])
+            if found and satisfied and satisfied(found, matches):
+                logger.debug("第{}行数据提取后已满足条件，停止读取剩余数据", count)
+                break
+            if not strict and all(len(values) >= max_matches for values in matches.values()):
+                logger.warning(f"提取结果已达到上限 max_matches={max_matches}，停止读取剩余数据")
+                break
+    finally:
+        # 提前停止时关闭生成器，释放服务端游标，连接才能继续执行其他sql
+        close = getattr(rows, "close", None)
+        if close:
+            close()
+
+    results = _results()
+    logger.opt(lazy=True).debug("{}", lambda: (f"\n提取表达式： {exprs}\n"
+                                               f"读取行数： {count}\n"
+                                               f"提取值：{results}\n"))
+    return results
+
+
 def response_extract(response: APIResponse, expr: str = '.'):
     """
     从response响应对象提取cookies之类
@@ -65,15 +237,15 @@ def response_extract(response: APIResponse, expr: str = '.'):
     :return result: 提取的结果，未提取到返回 None
     """
     try:
-        result = eval(expr)
-        logger.debug(f"\n提取表达式： {expr}\n"
-                     f"提取值类型： {type(result)}\n"
-                     f"提取值：{result}\n")
+        result = safe_eval(expr, {"response": response})
+        logger.opt(lazy=True).debug("{}", lambda: (f"\n提取表达式： {expr}\n"
+                                                   f"提取值类型： {type(result)}\n"
+                                                   f"提取值：{result}\n"))
         return result
     except Exception as e:
-        logger.debug(f"\n提取表达式： {expr}\n"
-                     f"提取对象： {response}\n"
-                     f"错误信息：{e}\n")
+        logger.opt(lazy=True).debug("{}", lambda: (f"\n提取表达式： {expr}\n"
+                                                   f"提取对象： {response}\n"
+                                                   f"错误信息：{e}\n"))
 
 
 if __name__ == '__main__':
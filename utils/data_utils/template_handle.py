@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+# @Version: Python 3.13
+# @Author  : 会飞的🐟
+# @File    : template_handle.py
+# @Software: PyCharm
+# @Desc: 占位符模板编译：含 ${} 的字符串只解析一次并缓存，之后按不同的 source 渲染时不再重复解析
+
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+
+# 节点类型：普通文本、变量(${name} 或 $name)、表达式(${...}，内部可以嵌套变量和表达式)
+TEXT, VAR, EXPR = 0, 1, 2
+
+# 与 string.Template 的 idpattern 保持一致
+_IDENT = re.compile(r"(?a:[_a-zA-Z][_a-zA-Z0-9]*)")
+_BRACED_IDENT = re.compile(r"\$\{((?a:[_a-zA-Z][_a-zA-Z0-9]*))\}")
+
+
+class CompiledTemplate:
+    """
+    编译后的占位符模板
+
+    节点为元组：(TEXT, 文本)、(VAR, 变量名, 是否带花括号)、(EXPR, 子节点列表)
+    例如："user_id: ${user_id}, name: ${generate_name(lan='zh')}" 编译为：
+        [(TEXT, 'user_id: '), (VAR, 'user_id', True), (TEXT, ', name: '), (EXPR, [(TEXT, "generate_name(lan='zh')")])]
+    """
+
+    __slots__ = ("raw", "nodes", "static", "single_var")
+
+    def __init__(self, raw: str, nodes: List[tuple]):
+        self.raw = raw
+        self.nodes = nodes
+        # 不包含任何占位符，渲染结果是固定的文本（例如 "$$" 会被还原成 "$"）
+        self.static = all(node[0] == TEXT for node in nodes)
+        # 整个字符串就是一个 ${name}，渲染时需要保留变量值原本的类型
+        self.single_var = nodes[0][1] if len(nodes) == 1 and nodes[0][0] == VAR and nodes[0][2] else None
+
+    @property
+    def text(self) -> str:
+        return "".join(node[1] for node in self.nodes)
+
+    def render(self, source: Dict, evaluate: Callable[[str], Any]) -> Tuple[str, bool]:
+        """
+        按 source 渲染模板
+        :param source: 变量字典
+        :param evaluate: 表达式执行方法，接收表达式字符串，返回执行结果，执行失败时抛出异常
+        :return: (渲染后的字符串, 是否有表达式返回了非字符串的结果)
+        """
+        non_str = [False]
+        text = _render_nodes(self.nodes, source, evaluate, non_str)
+        return text, non_str[0]
+
+
+def _render_nodes(nodes: List[tuple], source: Dict, evaluate: Callable[[str], Any], non_str: List[bool]) -> str:
+    parts = []
+    for node in nodes:
+        kind = node[0]
+        if kind == TEXT:
+            parts.append(node[1])
+        elif kind == VAR:
+            name, braced = node[1], node[2]
+            if name in source:
+                parts.append(str(source[name]))
+            elif braced:
+                # 找不到对应变量的 ${name}，当作表达式处理，例如 ${faker}
+                parts.append(_evaluate(name, evaluate, non_str))
+            else:
+                parts.append(f"${name}")
+        else:
+            code = _render_nodes(node[1], source, evaluate, non_str)
+            parts.append(_evaluate(code, evaluate, non_str))
+    return "".join(parts)
+
+
+def _evaluate(code: str, evaluate: Callable[[str], Any], non_str: List[bool]) -> str:
+    try:
+        res = evaluate(code)
+    except Exception:
+        logger.warning("Warn: --------函数：%s 无法调用成功, 请检查是否存在该函数-------" % code)
+        return "${%s}" % code
+    if not isinstance(res, str):
+        non_str[0] = True
+    return str(res)
+
+
+def _parse_expr(raw: str, i: int) -> Optional[Tuple[List[tuple], int]]:
+    """
+    解析 ${ 之后的表达式内容，按花括号深度找到与之匹配的 }
+    :return: (子节点列表, 结束位置)，没有匹配的 } 时返回 None
+    """
+    parts: List[tuple] = []
+    buf: List[str] = []
+    depth = 0
+    n = len(raw)
+    while i < n:
+        if raw.startswith("${", i):
+            if buf:
+                parts.append((TEXT, "".join(buf)))
+                buf = []
+            m = _BRACED_IDENT.match(raw, i)
+            if m:
+                parts.append((VAR, m.group(1), True))
+                i = m.end()
+                continue
+            nested = _parse_expr(raw, i + 2)
+            if nested is None:
+                return None
+            parts.append((EXPR, nested[0]))
+            i = nested[1]
+            continue
+        char = raw[i]
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            if depth == 0:
+                if buf:
+                    parts.append((TEXT, "".join(buf)))
+                return parts, i + 1
+            depth -= 1
+        buf.append(char)
+        i += 1
+    return None
+
+
+def _append_text(nodes: List[tuple], text: str) -> None:
+    if not text:
+        return
+    if nodes and nodes[-1][0] == TEXT:
+        nodes[-1] = (TEXT, nodes[-1][1] + text)
+    else:
+        nodes.append((TEXT, text))
+
+
+@lru_cache(maxsize=4096)
+def compile_template(raw: str) -> CompiledTemplate:
+    """
+    将字符串编译成模板，结果按原始字符串缓存
+    识别规则与 string.Template 一致：$$ 转义为 $，${name}、$name 为变量；
+    ${} 中不是合法变量名的内容视为 python 表达式，表达式中可以嵌套 ${name}，例如：${list_to_str(target=${test_ids})}
+    """
+    nodes: List[tuple] = []
+    i, n = 0, len(raw)
+    while i < n:
+        j = raw.find("$", i)
+        if j < 0:
+            _append_text(nodes, raw[i:])
+            break
+        _append_text(nodes, raw[i:j])
+        nxt = raw[j + 1:j + 2]
+        if nxt == "$":
+            _append_text(nodes, "$")
+            i = j + 2
+        elif nxt == "{":
+            m = _BRACED_IDENT.match(raw, j)
+            if m:
+                nodes.append((VAR, m.group(1), True))
+                i = m.end()
+                continue
+            parsed = _parse_expr(raw, j + 2)
+            if parsed is None:
+                _append_text(nodes, "${")
+                i = j + 2
+            else:
+                nodes.append((EXPR, parsed[0]))
+                i = parsed[1]
+        else:
+            m = _IDENT.match(raw, j + 1)
+            if m:
+                nodes.append((VAR, m.group(0), False))
+                i = m.end()
+            else:
+                _append_text(nodes, "$")
+                i = j + 1
+    return CompiledTemplate(raw, nodes)
+
+
+if __name__ == '__main__':
+    for s in ["user_id: ${user_id}, user_name: $user_name, price: $$10",
+              "${data_keys_to_keep(${added_testcase_test_step},'id')}",
+              "${random.choice(['Ada', 'Agda'])}"]:
+        print(s, "-->", compile_template(s).nodes)
+    print(compile_template("${user_id}").render({"user_id": 104}, eval))
+    print(compile_template.cache_info())
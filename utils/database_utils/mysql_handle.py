@@ -5,45 +5,65 @@
 # @Software: PyCharm
 # @Desc: 使用pymysql模块连接mysql数据库的公共方法
 
-from typing import Union
+from typing import Dict, Iterator, List, Set, Tuple, Union
 import json
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 import pymysql
 from sshtunnel import SSHTunnelForwarder  # pip install sshtunnel
 from loguru import logger
 
 
+def create_ssh_tunnel(db_host, db_port, ssh_host=None, ssh_port=22, ssh_user=None, ssh_pwd=None, **kwargs):
+    """
+    启动一个到 mysql 服务的SSH隧道，本地端口由系统分配，避免多个隧道/多个进程争用同一端口
+    """
+    server = SSHTunnelForwarder(
+        ssh_address_or_host=(ssh_host, int(ssh_port)),  # ssh 目标服务器 ip 和 port
+        ssh_username=ssh_user,  # ssh 目标服务器用户名
+        ssh_password=ssh_pwd,  # ssh 目标服务器用户密码
+        remote_bind_address=(db_host, int(db_port)),  # mysql 服务ip 和 part
+        local_bind_address=('127.0.0.1', 0),  # 本地监听地址，端口为0表示由系统分配空闲端口
+    )
+    server.start()
+    logger.debug("SSH隧道已启动：127.0.0.1:{} -> {} -> {}:{}", server.local_bind_port, ssh_host, db_host, db_port)
+    return server
+
+
 class MysqlServer:
     """
     初始化数据库连接(支持通过SSH隧道的方式连接)，并指定查询的结果集以字典形式返回
     """
 
-    def __init__(self, db_host, db_port, db_user, db_pwd, db_database, ssh=False,
+    def __init__(self, db_host, db_port, db_user, db_pwd, db_database, ssh=False, tunnel=None,
                  **kwargs):
         """
         初始化方法中， 连接mysql数据库， 根据ssh参数决定是否走SSH隧道方式连接mysql数据库
+        :param tunnel: 已启动的SSH隧道，传入时直接复用（由 MysqlPool 管理，close 时不会关闭该隧道）
         """
-        logger.debug("\n======================================================\n" \
-                     "-------------数据库配置信息--------------------\n"
-                     f"db_host: {db_host}\n" \
-                     f"db_port: {db_port}\n" \
-                     f"db_user: {db_user}\n" \
-                     f"db_pwd: {db_pwd}\n" \
-                     f"db_database: {db_database}\n" \
-                     f"ssh: {ssh}\n" \
-                     f"kwargs: {kwargs}\n" \
-                     "=====================================================")
+        logger.opt(lazy=True).debug("{}", lambda: ("\n======================================================\n" \
+                                                   "-------------数据库配置信息--------------------\n"
+                                                   f"db_host: {db_host}\n" \
+                                                   f"db_port: {db_port}\n" \
+                                                   f"db_user: {db_user}\n" \
+                                                   f"db_pwd: {db_pwd}\n" \
+                                                   f"db_database: {db_database}\n" \
+                                                   f"ssh: {ssh}\n" \
+                                                   f"kwargs: {kwargs}\n" \
+                                                   "====================================================="))
         self.server = None
+        self.conn = None
+        self.cursor = None
+        self._in_transaction = False
+        # 自己创建的隧道在 close 时关闭，外部传入的隧道由创建方负责关闭
+        self._own_server = False
         try:
             if ssh:
-                self.server = SSHTunnelForwarder(
-                    ssh_address_or_host=(kwargs.get("ssh_host"), int(kwargs.get("ssh_port"))),  # ssh 目标服务器 ip 和 port
-                    ssh_username=kwargs.get("ssh_user"),  # ssh 目标服务器用户名
-                    ssh_password=kwargs.get("ssh_pwd"),  # ssh 目标服务器用户密码
-                    remote_bind_address=(db_host, db_port),  # mysql 服务ip 和 part
-                    local_bind_address=('127.0.0.1', 5143),  # ssh 目标服务器的用于连接 mysql 或 redis 的端口，该 ip 必须为 127.0.0.1
-                )
-                self.server.start()
+                if tunnel is None:
+                    tunnel = create_ssh_tunnel(db_host, db_port, **kwargs)
+                    self._own_server = True
+                self.server = tunnel
                 db_host = self.server.local_bind_host  # server.local_bind_host 是 参数 local_bind_address 的 ip
                 db_port = self.server.local_bind_port  # server.local_bind_port 是 参数 local_bind_address 的 port
             # 建立连接
@@ -62,107 +82,249 @@ class MysqlServer:
 
     def __del__(self):
         """
-        在对象销毁前，断开游标，关闭数据库连接
+        在对象销毁前，断开游标，关闭数据库连接（兜底，连接池中的连接会在会话结束时显式关闭）
+        """
+        self.close()
+
+    def close(self):
+        """
+        断开游标，关闭数据库连接，多次调用不会报错
         """
         try:
             # 关闭游标
-            self.cursor.close()
+            if self.cursor:
+                self.cursor.close()
             # 关闭数据库链接
-            self.conn.close()
-            # 如果开启了SSH隧道，则关闭
-            if self.server:
+            if self.conn and self.conn.open:
+                self.conn.close()
+            # 如果开启了SSH隧道，且是自己创建的，则关闭
+            if self.server and self._own_server:
                 self.server.close()
-        except AttributeError as error:
-            logger.error("数据库连接失败，失败原因 %s", error)
+        except Exception as error:
+            logger.error(f"关闭数据库连接失败，失败原因 {error}")
+        finally:
+            self.cursor = None
+            self.conn = None
+            self.server = None
 
-    def query_all(self, sql):
+    def ping(self) -> bool:
+        """
+        健康检查：隧道是否可用，连接断开时尝试重连
+        :return: 连接可用返回True
+        """
+        if self.conn is None or (self.server is not None and not self.server.is_active):
+            return False
+        try:
+            self.conn.ping(reconnect=True)
+            return True
+        except Exception as e:
+            logger.warning(f"数据库连接健康检查失败：{e}")
+            return False
+
+    def _refresh_snapshot(self):
+        """
+        查询前提交一次，读取到其他连接最新提交的数据；事务中不提交，避免提前提交事务内的修改
+        """
+        if not self._in_transaction:
+            self.conn.commit()
+
+    def _commit(self, commit):
+        if commit and not self._in_transaction:
+            self.conn.commit()
+
+    def query_all(self, sql, params=None):
         """
         查询所有符合sql条件的数据
-        :param sql: 执行的sql
+        :param sql: 执行的sql，可以使用 %s 或 %(name)s 占位符
+        :param params: 占位符对应的参数，tuple/list 或 dict，由 pymysql 负责转义
         :return: 查询结果
         """
         try:
-            self.conn.commit()
-            self.cursor.execute(sql)
+            self._refresh_snapshot()
+            self.cursor.execute(sql, params)
             data = self.cursor.fetchall()
-            logger.debug("\n======================================================\n" \
-                         "-------------数据库执行结果--------------------\n"
-                         f"SQL: {sql}\n" \
-                         f"result: {data}\n" \
-                         "=====================================================")
+            logger.opt(lazy=True).debug("{}", lambda: ("\n======================================================\n" \
+                                                       "-------------数据库执行结果--------------------\n"
+                                                       f"SQL: {sql}\n" \
+                                                       f"params: {params}\n" \
+                                                       f"result: {data}\n" \
+                                                       "====================================================="))
             return data
         except Exception as e:
             logger.error(f"{sql} --> 报错: {e}")
             raise e
 
-    def query_one(self, sql):
+    def query_one(self, sql, params=None):
         """
         查询符合sql条件的数据的第一条数据
-        :param sql: 执行的sql
+        :param sql: 执行的sql，可以使用 %s 或 %(name)s 占位符
+        :param params: 占位符对应的参数
         :return: 返回查询结果的第一条数据
         """
         try:
-            self.conn.commit()
-            self.cursor.execute(sql)
+            self._refresh_snapshot()
+            self.cursor.execute(sql, params)
             data = self.cursor.fetchone()
-            logger.debug("\n======================================================\n" \
-                         "-------------数据库执行结果--------------------\n"
-                         f"SQL: {sql}\n" \
-                         f"result: {data}\n" \
-                         "=====================================================")
+            logger.opt(lazy=True).debug("{}", lambda: ("\n======================================================\n" \
+                                                       "-------------数据库执行结果--------------------\n"
+                                                       f"SQL: {sql}\n" \
+                                                       f"params: {params}\n" \
+                                                       f"result: {data}\n" \
+                                                       "====================================================="))
             return data
         except Exception as e:
             logger.error(f"{sql} --> 报错: {e}")
             raise e
 
-    def insert(self, sql):
+    def iter_query(self, sql, params=None, batch_size=1000):
+        """
+        使用服务端游标(SSDictCursor)逐行返回查询结果，结果集不会一次性全部加载到内存中
+        注意：遍历结束(或中途break)前，当前连接不能执行其他sql
+        :param sql: 执行的sql，可以使用 %s 或 %(name)s 占位符
+        :param params: 占位符对应的参数
+        :param batch_size: 每次从服务端读取的行数
+        :return: 逐行返回查询结果的生成器
+        """
+        self._refresh_snapshot()
+        cursor = self.conn.cursor(pymysql.cursors.SSDictCursor)
+        count = 0
+        try:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    count += 1
+                    yield row
+        except Exception as e:
+            logger.error(f"{sql} --> 报错: {e}")
+            raise e
+        finally:
+            # 关闭服务端游标时会读完剩余的数据，之后连接才能继续使用
+            cursor.close()
+            logger.opt(lazy=True).debug("{}", lambda: ("\n======================================================\n" \
+                                                       "-------------数据库执行结果(流式读取)--------------------\n"
+                                                       f"SQL: {sql}\n" \
+                                                       f"params: {params}\n" \
+                                                       f"已读取行数: {count}\n" \
+                                                       "====================================================="))
+
+    def insert(self, sql, params=None, commit=True):
         """
         插入数据
-        :param sql: 执行的sql
+        :param sql: 执行的sql，可以使用 %s 或 %(name)s 占位符
+        :param params: 占位符对应的参数
+        :param commit: 是否立即提交，在 transaction() 中时统一由事务提交
+        :return: 影响的行数
         """
         try:
-            self.cursor.execute(sql)
+            rows = self.cursor.execute(sql, params)
             # 提交  只要数据库更新就要commit
-            self.conn.commit()
-            logger.debug("\n======================================================\n" \
-                         "-------------数据库执行结果--------------------\n"
-                         f"SQL: {sql}\n" \
-                         "插入数据成功！\n" \
-                         "=====================================================")
+            self._commit(commit)
+            logger.opt(lazy=True).debug("{}", lambda: ("\n======================================================\n" \
+                                                       "-------------数据库执行结果--------------------\n"
+                                                       f"SQL: {sql}\n" \
+                                                       f"params: {params}\n" \
+                                                       "插入数据成功！\n" \
+                                                       "====================================================="))
+            return rows
         except Exception as e:
             logger.error(f"{sql} --> 报错: {e}")
             raise e
 
-    def update(self, sql):
+    def update(self, sql, params=None, commit=True):
         """
         更新数据
-        :param sql: 执行的sql
+        :param sql: 执行的sql，可以使用 %s 或 %(name)s 占位符
+        :param params: 占位符对应的参数
+        :param commit: 是否立即提交，在 transaction() 中时统一由事务提交
+        :return: 影响的行数
         """
         try:
-            self.cursor.execute(sql)
+            rows = self.cursor.execute(sql, params)
             # 提交 只要数据库更新就要commit
-            self.conn.commit()
-            logger.debug("\n======================================================\n" \
-                         "-------------数据库执行结果--------------------\n"
-                         f"SQL: {sql}\n" \
-                         "更新数据成功！\n" \
-                         "=====================================================")
+            self._commit(commit)
+            logger.opt(lazy=True).debug("{}", lambda: ("\n======================================================\n" \
+                                                       "-------------数据库执行结果--------------------\n"
+                                                       f"SQL: {sql}\n" \
+                                                       f"params: {params}\n" \
+                                                       "更新数据成功！\n" \
+                                                       "====================================================="))
+            return rows
         except Exception as e:
             logger.error(f"{sql} --> 报错: {e}")
             raise e
 
-    def query(self, sql, one=True):
+    def execute_many(self, sql, seq_params, batch_size=1000, commit=True):
+        """
+        批量执行同一条sql，用于造数据等场景。INSERT ... VALUES 语句会被 pymysql 合并成多值插入，减少往返次数
+        :param sql: 执行的sql，例如：INSERT INTO user (name, age) VALUES (%s, %s)
+        :param seq_params: 参数列表，例如：[("flora", 18), ("jack", 20)]，可以是生成器
+        :param batch_size: 每批执行的参数个数
+        :param commit: 全部执行完成后是否提交，执行失败时回滚
+        :return: 影响的总行数
+        """
+        total = 0
+        batch = []
+        try:
+            for params in seq_params:
+                batch.append(params)
+                if len(batch) >= batch_size:
+                    total += self.cursor.executemany(sql, batch) or 0
+                    batch = []
+            if batch:
+                total += self.cursor.executemany(sql, batch) or 0
+            self._commit(commit)
+            logger.opt(lazy=True).debug("{}", lambda: ("\n======================================================\n" \
+                                                       "-------------数据库执行结果--------------------\n"
+                                                       f"SQL: {sql}\n" \
+                                                       f"批量执行成功，影响行数：{total}\n" \
+                                                       "====================================================="))
+            return total
+        except Exception as e:
+            if commit and not self._in_transaction:
+                self.conn.rollback()
+            logger.error(f"{sql} --> 批量执行报错: {e}")
+            raise e
+
+    @contextmanager
+    def transaction(self):
+        """
+        事务：with 代码块中的 insert/update/execute_many 不会单独提交，代码块正常结束时统一提交，出现异常时回滚
+        例如：
+            with mysql.transaction():
+                mysql.insert("INSERT INTO user (name) VALUES (%s)", ("flora",))
+                mysql.update("UPDATE user SET age = %s WHERE name = %s", (18, "flora"))
+        """
+        if self._in_transaction:
+            # 嵌套的事务合并到最外层事务中
+            yield self
+            return
+        self.conn.commit()
+        self._in_transaction = True
+        try:
+            yield self
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            self._in_transaction = False
+
+    def query(self, sql, one=True, params=None):
         """
         根据传值决定查询一条数据还是所有
         :param sql: 查询的SQL语句
         :param one: 默认True. True查一条数据，否则查所有
+        :param params: 占位符对应的参数
         :return:
         """
         try:
             if one:
-                return self.query_one(sql)
+                return self.query_one(sql, params)
             else:
-                return self.query_all(sql)
+                return self.query_all(sql, params)
         except Exception as e:
             logger.error(f"{sql} --> 报错: {e}")
             raise e
@@ -177,3 +339,120 @@ class MysqlServer:
                 if isinstance(v, datetime):
                     result[k] = str(v)
         return result
+
+
+class MysqlPool:
+    """
+    数据库连接池（会话级，使用模块级的 mysql_pool 实例）
+
+    - 按 db_info 缓存空闲的 MysqlServer，通过 connection() 借出，用完归还，同一时间一个连接只被一个线程使用
+      （pymysql 连接不是线程安全的）；线程池中的短生命周期线程也会复用已归还的连接，不会每个线程新建一个连接
+    - 建立连接、健康检查在锁外执行，多个线程可以同时建立连接
+    - 相同SSH目标 + 相同mysql地址 共用一个SSH隧道
+    - 借出连接时做健康检查，连接或隧道不可用时重新创建
+    - 会话结束时由根目录 conftest.py 调用 close_all 显式关闭所有连接和隧道
+
+    使用方式：
+        with mysql_pool.connection(db_info) as mysql:
+            mysql.query_all("SELECT ...")
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tunnel_lock = threading.Lock()
+        # 空闲的连接：db_info -> [MysqlServer, ...]
+        self._idle: Dict[str, List[MysqlServer]] = {}
+        # 创建过的所有连接（包括已借出的），会话结束时统一关闭
+        self._servers: Set[MysqlServer] = set()
+        self._tunnels: Dict[Tuple, SSHTunnelForwarder] = {}
+
+    @staticmethod
+    def _key(db_info: dict) -> str:
+        return json.dumps(db_info, sort_keys=True, default=str)
+
+    def acquire(self, db_info: dict) -> MysqlServer:
+        """
+        借出 db_info 对应的数据库连接，没有空闲的可用连接时新建，用完需要调用 release 归还
+        :param db_info: 数据库连接信息，与 MysqlServer 的参数一致
+        """
+        key = self._key(db_info)
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                server = idle.pop() if idle else None
+            if server is None:
+                break
+            if server.ping():
+                return server
+            logger.warning("数据库连接不可用，重新创建连接")
+            self._discard(server)
+        tunnel = self._get_tunnel(db_info) if db_info.get("ssh") else None
+        server = MysqlServer(**db_info, tunnel=tunnel)
+        if server.conn is not None:
+            with self._lock:
+                self._servers.add(server)
+        return server
+
+    def release(self, db_info: dict, server: MysqlServer) -> None:
+        """
+        归还连接，连接失败（conn为None）的 MysqlServer 不放回池中
+        """
+        if server.conn is None:
+            return
+        with self._lock:
+            if server in self._servers:
+                self._idle.setdefault(self._key(db_info), []).append(server)
+                return
+        # 池已经关闭（close_all 之后才归还的连接）
+        server.close()
+
+    @contextmanager
+    def connection(self, db_info: dict) -> Iterator[MysqlServer]:
+        """
+        借出连接，with 代码块结束时归还
+        """
+        server = self.acquire(db_info)
+        try:
+            yield server
+        finally:
+            self.release(db_info, server)
+
+    def _discard(self, server: MysqlServer) -> None:
+        server.close()
+        with self._lock:
+            self._servers.discard(server)
+
+    def _get_tunnel(self, db_info: dict) -> SSHTunnelForwarder:
+        key = (db_info.get("ssh_host"), db_info.get("ssh_port"), db_info.get("ssh_user"),
+               db_info.get("db_host"), db_info.get("db_port"))
+        with self._tunnel_lock:
+            tunnel = self._tunnels.get(key)
+            if tunnel is not None and tunnel.is_active:
+                return tunnel
+            if tunnel is not None:
+                logger.warning("SSH隧道已断开，重新建立隧道")
+                tunnel.close()
+            tunnel = create_ssh_tunnel(**db_info)
+            self._tunnels[key] = tunnel
+            return tunnel
+
+    def close_all(self):
+        """
+        关闭所有数据库连接和SSH隧道
+        """
+        with self._lock:
+            servers = list(self._servers)
+            self._servers.clear()
+            self._idle.clear()
+        for server in servers:
+            server.close()
+        with self._tunnel_lock:
+            for tunnel in self._tunnels.values():
+                try:
+                    tunnel.close()
+                except Exception as e:
+                    logger.error(f"关闭SSH隧道失败：{e}")
+            self._tunnels.clear()
+
+
+mysql_pool = MysqlPool()
@@ -7,9 +7,13 @@
 
 from loguru import logger
 import os
+import time
 import zipfile
 import shutil
 import base64
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
 
 def get_files(target, start=None, end=None):
@@ -69,28 +73,65 @@ def get_newest_file(dir_path):
     return sorted_files[0][0]
 
 
-def zip_file(in_path: str, out_path: str):
+# 已经压缩过的文件类型，再用deflate压缩几乎没有收益，打包时直接存储
+STORED_SUFFIXES = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".webm", ".mp4", ".zip", ".gz", ".tgz", ".bz2", ".xz",
+                   ".7z", ".rar", ".woff", ".woff2"}
+# 超过该大小的文件不预先读入内存，直接流式写入压缩包
+_PREFETCH_MAX_SIZE = 64 * 1024 * 1024
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, mode="rb") as f:
+        return f.read()
+
+
+def zip_file(in_path: str, out_path: str, workers: Optional[int] = None, level: int = 6):
     """
     压缩指定文件夹
+    图片、视频、zip等已经压缩过的文件直接存储，其他文件deflate压缩；
+    文件内容在多个线程中预先读取，主线程按目录遍历的顺序通过 ZipFile.writestr 写入压缩包
     :param in_path: 目标文件夹路径
     :param out_path: 压缩文件保存路径+xxxx.zip
+    :param workers: 预读文件的线程数，默认为CPU核数
+    :param level: deflate压缩级别
     :return: 无
     """
     # 如果传入的路径是一个目录才进行压缩操作
     if os.path.isdir(in_path):
         logger.debug(f"目标路径:{in_path} 是一个目录，开始进行压缩......")
-        # 写入
-        zip = zipfile.ZipFile(out_path, "w", zipfile.ZIP_DEFLATED)
+        start = time.perf_counter()
+        workers = workers or os.cpu_count() or 1
+        files = []
         for path, dirnames, filenames in os.walk(in_path):
             # 去掉目标跟路径，只对目标文件夹下边的文件及文件夹进行压缩
             fpath = path.replace(in_path, '')
             for filename in filenames:
-                zip.write(
-                    os.path.join(
-                        path, filename), os.path.join(
-                        fpath, filename))
-        zip.close()
-        logger.debug(f"目标路径:{in_path} 压缩完成！, 压缩文件路径：{out_path}")
+                files.append((os.path.join(path, filename), os.path.join(fpath, filename)))
+
+        with zipfile.ZipFile(out_path, "w", zipfile.ZIP_DEFLATED, compresslevel=level) as zf, \
+                ThreadPoolExecutor(max_workers=workers, thread_name_prefix="zip") as executor:
+            # 按顺序写入，同时最多有 workers*2 个文件在后台读取，避免文件内容全部堆积在内存中
+            pending = deque()
+
+            def _write_next():
+                file_path, arcname, future = pending.popleft()
+                stored = file_path.lower().endswith(tuple(STORED_SUFFIXES))
+                compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+                if future is None:
+                    zf.write(file_path, arcname, compress_type=compress_type)
+                else:
+                    zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+                    zf.writestr(zinfo, future.result(), compress_type=compress_type, compresslevel=level)
+
+            for file_path, arcname in files:
+                prefetch = os.path.getsize(file_path) <= _PREFETCH_MAX_SIZE
+                pending.append((file_path, arcname, executor.submit(_read_file, file_path) if prefetch else None))
+                if len(pending) > workers * 2:
+                    _write_next()
+            while pending:
+                _write_next()
+        logger.debug(f"目标路径:{in_path} 压缩完成！, 文件数：{len(files)}，耗时：{time.perf_counter() - start:.2f}s，"
+                     f"压缩文件路径：{out_path}")
     else:
         logger.debug(f"目标路径:{in_path} 不是一个目录，请检查！")
 
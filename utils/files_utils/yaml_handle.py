@@ -5,9 +5,110 @@
 # @Software: PyCharm
 # @Desc: 从日志文件中提取响应数据
 
+import os
+import copy
+import threading
 import yaml  # pip install pyyaml
 from loguru import logger
 
+# 安装了 libyaml 时使用C实现的加载器，解析速度快很多
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class FrozenDict(dict):
+    """
+    只读字典：缓存中的yaml数据以只读形式返回，避免调用方修改后影响其他使用者
+    需要修改时使用 copy.deepcopy 或 thaw 得到普通的 dict
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("yaml缓存数据是只读的，请使用 thaw() 或 copy.deepcopy() 得到可修改的副本")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = __ior__ = _readonly
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return dict, (thaw(self),)
+
+
+class FrozenList(list):
+    """
+    只读列表，说明同 FrozenDict
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("yaml缓存数据是只读的，请使用 thaw() 或 copy.deepcopy() 得到可修改的副本")
+
+    __setitem__ = __delitem__ = append = extend = insert = pop = remove = clear = sort = reverse = _readonly
+    __iadd__ = __imul__ = _readonly
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return list, (thaw(self),)
+
+
+def freeze(data):
+    """
+    将数据递归转换为只读的 FrozenDict/FrozenList
+    """
+    if isinstance(data, dict):
+        return FrozenDict((key, freeze(value)) for key, value in data.items())
+    if isinstance(data, list):
+        return FrozenList(freeze(item) for item in data)
+    return data
+
+
+def thaw(data):
+    """
+    将只读数据递归转换为普通的可修改的 dict/list（深拷贝）
+    """
+    if isinstance(data, dict):
+        return {key: thaw(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [thaw(item) for item in data]
+    return copy.deepcopy(data)
+
+
+class _YamlCache:
+    """
+    进程内共享的yaml缓存，按 文件路径 + 修改时间 + 文件大小 判断是否需要重新解析
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def load(self, filename):
+        path = os.path.abspath(filename)
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._data.get(path)
+            if cached and cached[0] == version:
+                return cached[1]
+        with open(file=path, mode="r", encoding="utf-8") as fp:
+            data = freeze(yaml.load(fp, Loader=SafeLoader))
+        with self._lock:
+            self._data[path] = (version, data)
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+yaml_cache = _YamlCache()
+
 
 class YamlHandle:
 
@@ -20,9 +121,12 @@ class YamlHandle:
 
     @property
     def read_yaml(self):
+        """
+        读取yaml文件，结果按文件修改时间缓存，返回只读数据（FrozenDict/FrozenList）
+        需要修改返回的数据时，请先使用 thaw() 或 copy.deepcopy() 复制一份
+        """
         try:
-            with open(file=self.filename, mode="r", encoding="utf-8") as fp:
-                return yaml.safe_load(fp.read())
+            return yaml_cache.load(self.filename)
         except FileNotFoundError as e:
             logger.error(f"YAML file ({self.filename}) not found: {e}")
             raise e
@@ -39,7 +143,7 @@ class YamlHandle:
         """
         try:
             with open(self.filename, mode=mode, encoding="utf-8") as f:
-                yaml.dump(data, f)
+                yaml.dump(thaw(data), f)
         except yaml.YAMLError as e:
             logger.error(f"Error while writing to YAML file ({self.filename}): {e}")
             raise e
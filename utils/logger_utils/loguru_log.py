@@ -9,7 +9,7 @@ import sys
 from loguru import logger
 
 
-def capture_logs(log_info: list):
+def capture_logs(log_info: list, console_level: str = "DEBUG"):
     """
     日志处理
     文档参考：https://zhuanlan.zhihu.com/p/429452898
@@ -38,13 +38,19 @@ def capture_logs(log_info: list):
             filename: 日志文件名
             filter_type: 日志过滤，如：将日志级别为ERROR的单独记录到一个文件中
             level: 日志级别设置
+        :param console_level 控制台输出的日志级别
+
+       性能说明：
+        loguru 只有在至少一个 sink 接收该级别时才会格式化日志消息。
+        因此调试日志统一写成 logger.debug("xxx：{}", obj) 或 logger.opt(lazy=True).debug("{}", lambda: f"...") 的形式，
+        所有 sink 的级别都高于 DEBUG 时，大对象的 repr 不会被计算。
     """
     logger.remove()  # 移除默认的 handler，避免重复打印
 
     # 添加控制台输出，只添加一次，并开启颜色
     logger.add(
         sink=sys.stderr,
-        level="DEBUG",  # 控制台默认输出 DEBUG 级别及以上
+        level=console_level,  # 控制台默认输出 DEBUG 级别及以上
         format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{module}.{function}.{line}</cyan> : <level>{message}</level>",
         colorize=True
     )
@@ -73,3 +79,26 @@ def capture_logs(log_info: list):
             dic["filter"] = lambda x: filter_type in str(x['level']).upper()
 
         logger.add(**dic)
+
+
+if __name__ == '__main__':
+    # 对比调试日志关闭时，立即格式化(f-string)与延迟格式化的开销
+    import timeit
+
+    logger.remove()
+    logger.add(sink=sys.stderr, level="INFO")
+    payload = {f"key_{i}": {"value": i, "items": list(range(20))} for i in range(200)}
+    number = 2000
+
+    def eager():
+        logger.debug(f"请求参数(payload): {type(payload)} || {payload}")
+
+    def args():
+        logger.debug("请求参数(payload): {} || {}", type(payload), payload)
+
+    def lazy():
+        logger.opt(lazy=True).debug("{}", lambda: f"请求参数(payload): {type(payload)} || {payload}")
+
+    for name, func in (("f-string", eager), ("args", args), ("lazy", lazy)):
+        cost = timeit.timeit(func, number=number) / number * 1e6
+        print(f"{name:<10} 每次调用耗时：{cost:.2f} µs")
@@ -7,11 +7,18 @@
 
 import os
 import json
+import shutil
+import hashlib
 import allure
+from loguru import logger
 from utils.models import AllureAttachmentType
 from utils.report_utils.platform_handle import PlatformHandle
 from utils.files_utils.files_handle import zip_file, copy_file
 
+# 生成报告时使用的allure结果指纹，保存在html报告目录和压缩包旁边（不放在报告目录中，避免被压缩和发布），
+# 结果没有变化时跳过 allure generate 和压缩
+FINGERPRINT_FILE = ".results_fingerprint"
+
 
 def allure_title(title: str) -> None:
     """allure中动态生成用例标题"""
@@ -169,12 +176,92 @@ def allure_logo_change(allure_path, logo_path):
     pass
 
 
+def results_fingerprint(allure_results_dir: str, **params) -> str:
+    """
+    计算allure结果目录的指纹：所有结果文件的相对路径、大小、修改时间，以及影响报告内容的参数（报告标题等）
+    history 目录是从上一次的报告中复制过来的，不参与计算
+    """
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+    for path, dirnames, filenames in os.walk(allure_results_dir):
+        dirnames[:] = sorted(name for name in dirnames if not (path == allure_results_dir and name == "history"))
+        for filename in sorted(filenames):
+            file_path = os.path.join(path, filename)
+            stat = os.stat(file_path)
+            digest.update(f"{os.path.relpath(file_path, allure_results_dir)}|{stat.st_size}|{stat.st_mtime_ns}\n"
+                          .encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _fingerprint_path(path: str) -> str:
+    """
+    报告目录、压缩包对应的指纹文件路径，例如 allure_html -> allure_html.results_fingerprint
+    """
+    return f"{os.path.normpath(path)}{FINGERPRINT_FILE}"
+
+
+def _read_fingerprint(path: str) -> str:
+    if not os.path.isfile(path):
+        return ""
+    with open(path, mode="r", encoding="utf-8") as f:
+        return f.read().strip()
+
+
+def _write_fingerprint(path: str, fingerprint: str) -> None:
+    with open(path, mode="w", encoding="utf-8") as f:
+        f.write(fingerprint)
+
+
+def copy_history(allure_report_dir: str, allure_results_dir: str) -> None:
+    """
+    将上一次生成的html报告中的 history 目录复制到allure结果目录，allure generate 会在此基础上追加本次结果，
+    报告中的趋势图、用例历史不会因为 --clean 而丢失
+    """
+    history_dir = os.path.join(allure_report_dir, "history")
+    if os.path.isdir(history_dir) and os.path.isdir(allure_results_dir):
+        shutil.copytree(history_dir, os.path.join(allure_results_dir, "history"), dirs_exist_ok=True)
+
+
 def generate_allure_report(**kwargs):
     """
     通过allure生成html测试报告，并对报告进行美化
+    allure结果和报告参数都没有变化时（例如重复调用、只重新发送通知），直接复用已生成的报告和压缩包；
+    每次执行用例都会产生新的结果文件，正常执行后总会重新生成，指纹只对结果文件做 stat，不读取内容，计算开销很小
     """
     allure_results_dir = kwargs.get("allure_results")
     allure_report_dir = kwargs.get("allure_report")
+    attachment_path = kwargs.get("attachment_path")  # allure报告压缩的路径，例如：report/allure_report.zip
+    fingerprint = results_fingerprint(allure_results_dir, windows_title=kwargs.get("windows_title"),
+                                      report_name=kwargs.get("report_name"), env_info=kwargs.get("env_info"))
+    report_fingerprint_path = _fingerprint_path(allure_report_dir)
+    if _read_fingerprint(report_fingerprint_path) == fingerprint \
+            and os.path.isfile(os.path.join(allure_report_dir, "index.html")):
+        logger.info(f"allure结果没有变化，复用已生成的html报告：{allure_report_dir}")
+    else:
+        _build_allure_html(fingerprint=fingerprint, **kwargs)
+
+    # ----------------压缩allure测试报告，方便后续发送压缩包------------------------------------------
+    zip_fingerprint_path = _fingerprint_path(attachment_path)
+    if _read_fingerprint(zip_fingerprint_path) == fingerprint and os.path.isfile(attachment_path):
+        logger.info(f"allure结果没有变化，复用已生成的报告压缩包：{attachment_path}")
+    else:
+        zip_file(in_path=allure_report_dir, out_path=attachment_path)
+        _write_fingerprint(zip_fingerprint_path, fingerprint)
+
+    return allure_report_dir, attachment_path
+
+
+def _build_allure_html(fingerprint: str, **kwargs) -> None:
+    """
+    执行 allure generate 生成html报告，并对报告进行美化
+    """
+    allure_results_dir = kwargs.get("allure_results")
+    allure_report_dir = kwargs.get("allure_report")
+    report_fingerprint_path = _fingerprint_path(allure_report_dir)
+    # 先删除旧的指纹，生成失败时下次不会误用未完成的报告
+    if os.path.isfile(report_fingerprint_path):
+        os.remove(report_fingerprint_path)
+    # 保留上一次报告的历史数据
+    copy_history(allure_report_dir, allure_results_dir)
     # ----------------判断运行的平台，是linux还是windows，执行不同的allure命令----------------
     cmd = f"{PlatformHandle().allure} generate {allure_results_dir} -o {allure_report_dir} --clean"
     # 如果html报告没有生成，请检查下是否正确安装jdk(最好默认安装，不要自定义路径)；安装完成后，要注意重启pycharm
@@ -195,7 +282,6 @@ def generate_allure_report(**kwargs):
     allure_beautiful.set_report_env_on_html(
         env_info=kwargs.get("env_info"))
 
-    # ----------------压缩allure测试报告，方便后续发送压缩包------------------------------------------
     # 复制http_server.exe以及双击打开Allure报告.bat，以便windows环境下，直接打开查看allure html报告
     allure_config_path = kwargs.get("allure_config_path")  # 保存http_server.exe及双击打开Allure报告.bat的目录
     copy_file(src_file_path=os.path.join(allure_config_path,
@@ -204,8 +290,4 @@ def generate_allure_report(**kwargs):
     copy_file(src_file_path=os.path.join(allure_config_path,
                                          [i for i in os.listdir(allure_config_path) if i.endswith(".bat")][0]),
               dest_dir_path=allure_report_dir)
-
-    attachment_path = kwargs.get("attachment_path")  # allure报告压缩的路径，例如：report/allure_report.zip
-    zip_file(in_path=allure_report_dir, out_path=attachment_path)
-
-    return allure_report_dir, attachment_path
+    _write_fingerprint(report_fingerprint_path, fingerprint)
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+# @Version: Python 3.13
+# @Author  : 会飞的🐟
+# @File    : artifact_writer.py
+# @Software: PyCharm
+# @Desc: 后台写入测试产物：截图、trace、视频的移动和allure附件的复制在线程池中执行，与下一个用例并行
+
+import os
+import time
+import shutil
+import threading
+from uuid import uuid4
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterable, Optional, Set
+import allure
+from allure_commons import plugin_manager
+from loguru import logger
+from utils.report_utils.attachment_store import allure_reporter, attachment_store
+
+
+class ArtifactWriter:
+    """
+    测试产物的后台写入
+
+    - 文件移动、allure附件的复制提交到线程池执行，用例的 teardown 不再等待这些磁盘IO
+    - 待执行的任务数达到 max_pending 时，提交任务的线程阻塞等待，避免产物堆积占满磁盘和内存
+    - allure附件在提交时（用例执行线程中）登记到当前用例/步骤，后台线程只负责复制文件，
+      因此附件不会因为后台执行时已经切换到下一个用例而挂错位置
+    - 会话结束前调用 flush 等待所有任务完成
+
+    max_workers 为0时所有任务在当前线程中同步执行
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 32):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="artifact-writer") \
+            if max_workers > 0 else None
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._futures: Set[Future] = set()
+        self.tasks = 0
+        self.failed = 0
+        # 后台任务的累计耗时，即从用例 teardown 中节省下来的时间
+        self.busy_seconds = 0.0
+
+    def submit(self, func: Callable, *args, after: Iterable[Optional[Future]] = (), **kwargs) -> Future:
+        """
+        提交一个写入任务
+        :param after: 需要先完成的任务，例如先复制截图到allure结果目录，再删除截图
+        """
+        after = [future for future in after if future is not None]
+
+        def _run() -> Any:
+            wait(after)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                logger.warning("测试产物写入失败：{} {}", getattr(func, "__name__", func), e)
+                raise
+            finally:
+                with self._lock:
+                    self.tasks += 1
+                    self.busy_seconds += time.perf_counter() - start
+
+        if self._executor is None:
+            future = Future()
+            try:
+                future.set_result(_run())
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        self._slots.acquire()
+        future = self._executor.submit(_run)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future: Future) -> None:
+        with self._lock:
+            self._futures.discard(future)
+        self._slots.release()
+
+    def move(self, source: str, destination: str, after: Iterable[Optional[Future]] = ()) -> Future:
+        """
+        移动文件，目标目录不存在时自动创建
+        """
+        def _move() -> None:
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            shutil.move(source, destination)
+
+        return self.submit(_move, after=after)
+
+    def remove(self, path: str, after: Iterable[Optional[Future]] = ()) -> Future:
+        return self.submit(os.remove, path, after=after)
+
+    def attach_file(self, source: str, name: str, attachment_type: Any,
+                    after: Iterable[Optional[Future]] = ()) -> Optional[Future]:
+        """
+        将文件作为附件添加到allure当前的用例/步骤中，必须在用例执行线程中调用
+        文件已经生成时交给 attachment_store 按内容去重，相同内容的截图只复制一次
+        :param after: 文件由这些任务生成时（例如后台移动的视频），等它们完成后再复制
+        """
+        after = [future for future in after if future is not None]
+        if all(future.done() for future in after) and os.path.isfile(source):
+            return attachment_store.attach_file(
+                source, name=name, attachment_type=attachment_type,
+                copy=lambda src, file_name: self.submit(plugin_manager.hook.report_attached_file,
+                                                        source=src, file_name=file_name))
+        reporter = allure_reporter()
+        if reporter is None:
+            return None
+        try:
+            # 在当前线程登记附件，获得附件在allure结果目录中的文件名；文件复制交给后台线程
+            file_name = reporter._attach(uuid4(), name=name, attachment_type=attachment_type)
+        except (KeyError, AttributeError):
+            # 当前没有正在执行的用例/步骤，或者 allure 版本不兼容，退回到同步添加附件
+            wait(after)
+            allure.attach.file(source, name=name, attachment_type=attachment_type)
+            return None
+        return self.submit(plugin_manager.hook.report_attached_file, source=source, file_name=file_name, after=after)
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """
+        等待所有已提交的任务完成
+        """
+        with self._lock:
+            futures = list(self._futures)
+        if futures:
+            start = time.perf_counter()
+            wait(futures, timeout=timeout)
+            logger.info("等待测试产物写入完成，耗时 {:.2f}s", time.perf_counter() - start)
+        logger.info("测试产物后台写入：{} 个任务，失败 {} 个，后台耗时 {:.2f}s", self.tasks, self.failed, self.busy_seconds)
+
+    def shutdown(self) -> None:
+        self.flush()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
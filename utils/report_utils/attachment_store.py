@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+# @Version: Python 3.13
+# @Author  : 会飞的🐟
+# @File    : attachment_store.py
+# @Software: PyCharm
+# @Desc: allure附件去重：按内容哈希命名附件文件，相同内容只写入一次；并按大小预算截断或跳过低价值附件
+
+import os
+import hashlib
+import threading
+from typing import Any, Callable, Optional, Union
+from allure_commons import plugin_manager
+from allure_commons.reporter import AllureReporter
+from allure_commons.types import AttachmentType
+from loguru import logger
+from config.settings import ALLURE_ATTACHMENT_BUDGET_MB, ALLURE_LOW_VALUE_ATTACHMENT_KB
+
+# 可以截断的文本类附件
+_TEXT_MIME_TYPES = ("text/", "application/json", "application/xml")
+
+
+def allure_reporter() -> Optional[AllureReporter]:
+    """
+    获取 allure-pytest 当前使用的 AllureReporter，未开启allure（没有 --alluredir）时返回None
+    """
+    for plugin in plugin_manager.get_plugins():
+        reporter = getattr(plugin, "allure_logger", None)
+        if isinstance(reporter, AllureReporter):
+            return reporter
+    return None
+
+
+def _mime_type(attachment_type: Any) -> Optional[str]:
+    return attachment_type.mime_type if isinstance(attachment_type, AttachmentType) else attachment_type
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, mode="rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class AttachmentStore:
+    """
+    内容寻址的allure附件存储（进程内共享，使用模块级的 attachment_store 实例）
+
+    allure.attach / allure.attach.file 每次调用都会在 allure 结果目录中生成一个新文件，
+    同一个截图、同一个元素取值在多个步骤、多个用例中反复出现时，结果目录会越来越大，allure generate 也越来越慢。
+    这里以内容的sha1作为附件文件名：内容相同的附件只写入一次，之后的附件直接引用已有的文件。
+
+    低价值附件（low_value=True，例如元素取值、页面html）受大小预算控制：
+    - 单个附件超过 ALLURE_LOW_VALUE_ATTACHMENT_KB 时，文本截断，非文本直接跳过
+    - 已写入的附件总大小超过 ALLURE_ATTACHMENT_BUDGET_MB 后，直接跳过
+    截图、视频等附件不受预算限制
+    """
+
+    def __init__(self, budget_mb: int = ALLURE_ATTACHMENT_BUDGET_MB,
+                 low_value_kb: int = ALLURE_LOW_VALUE_ATTACHMENT_KB):
+        self.budget_bytes = budget_mb * 1024 * 1024
+        self.low_value_bytes = low_value_kb * 1024
+        self._lock = threading.Lock()
+        # 已写入的附件文件名
+        self._stored = set()
+        self.stats = {"stored": 0, "stored_bytes": 0, "deduplicated": 0, "saved_bytes": 0,
+                      "truncated": 0, "skipped": 0}
+
+    def _count(self, key: str, value: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += value
+
+    def _over_budget(self, size: int) -> bool:
+        with self._lock:
+            return self.stats["stored_bytes"] + size > self.budget_bytes
+
+    def _claim(self, file_name: str, size: int) -> bool:
+        """
+        登记附件文件，返回是否需要写入（同样内容的文件尚未写入过）
+        """
+        with self._lock:
+            if file_name in self._stored:
+                self.stats["deduplicated"] += 1
+                self.stats["saved_bytes"] += size
+                return False
+            self._stored.add(file_name)
+            self.stats["stored"] += 1
+            self.stats["stored_bytes"] += size
+            return True
+
+    @staticmethod
+    def _register(digest: str, name: str, attachment_type: Any, extension: Optional[str]) -> Optional[str]:
+        """
+        将附件登记到allure当前的用例/步骤中，返回附件在allure结果目录中的文件名：{内容哈希}-attachment.{后缀}
+        未开启allure或者当前没有正在执行的用例/步骤时返回None
+        """
+        reporter = allure_reporter()
+        if reporter is None:
+            return None
+        try:
+            return reporter._attach(digest, name=name, attachment_type=attachment_type, extension=extension)
+        except KeyError:
+            logger.debug("当前没有正在执行的allure用例/步骤，跳过附件：{}", name)
+            return None
+
+    def attach(self, body: Union[str, bytes, Any], name: str, attachment_type: Any = AttachmentType.TEXT,
+               extension: Optional[str] = None, low_value: bool = False) -> Optional[str]:
+        """
+        添加内容附件，替代 allure.attach
+        :param body: 附件内容，非 str/bytes 时转换为字符串
+        :param low_value: 是否为低价值附件，受大小预算控制
+        :return: 附件在allure结果目录中的文件名，跳过时返回None
+        """
+        if not isinstance(body, (str, bytes)):
+            body = str(body)
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        if low_value:
+            if self._over_budget(min(len(data), self.low_value_bytes)):
+                self._count("skipped")
+                return None
+            if len(data) > self.low_value_bytes:
+                if not (_mime_type(attachment_type) or "").startswith(_TEXT_MIME_TYPES):
+                    self._count("skipped")
+                    return None
+                self._count("truncated")
+                data = data[:self.low_value_bytes] + f"\n...(已截断，原始大小 {len(data)} 字节)".encode("utf-8")
+        digest = hashlib.sha1(data).hexdigest()
+        file_name = self._register(digest, name, attachment_type, extension)
+        if file_name and self._claim(file_name, len(data)):
+            plugin_manager.hook.report_attached_data(body=data, file_name=file_name)
+        return file_name
+
+    def attach_file(self, source: str, name: str, attachment_type: Any = None, extension: Optional[str] = None,
+                    low_value: bool = False, copy: Optional[Callable[[str, str], Any]] = None) -> Any:
+        """
+        添加文件附件，替代 allure.attach.file
+        :param low_value: 是否为低价值附件，超过单个附件大小上限或总预算时跳过
+        :param copy: 复制文件到allure结果目录的方法 copy(source, file_name)，例如提交到后台线程执行；默认在当前线程复制
+        :return: copy 的返回值，跳过或者内容已存在时返回None
+        """
+        size = os.path.getsize(source)
+        if low_value and (size > self.low_value_bytes or self._over_budget(size)):
+            self._count("skipped")
+            return None
+        file_name = self._register(_file_digest(source), name, attachment_type, extension)
+        if not file_name or not self._claim(file_name, size):
+            return None
+        if copy is not None:
+            return copy(source, file_name)
+        plugin_manager.hook.report_attached_file(source=source, file_name=file_name)
+        return None
+
+    def log_stats(self) -> None:
+        if not self.stats["stored"] and not self.stats["skipped"]:
+            return
+        logger.info("allure附件：写入 {stored} 个（{stored_bytes} 字节），去重 {deduplicated} 个（节省 {saved_bytes} 字节），"
+                    "截断 {truncated} 个，跳过 {skipped} 个", **self.stats)
+
+
+attachment_store = AttachmentStore()
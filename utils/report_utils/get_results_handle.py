@@ -7,9 +7,141 @@
 
 import os
 import json
+from datetime import datetime
+from typing import Dict, List, Tuple
 from loguru import logger
 from utils.tools.time_handle import timestamp_strftime
 
+# pytest_results 插件在运行过程中逐条写入的用例结果文件，与 test_result.txt 放在同一目录下
+TEST_RESULTS_FILE = "test_results.jsonl"
+# 会话结束时的结果统计（用例数、开始时间、运行时长），并行模式下由 run.py 合并各 worker 的统计后重新生成 test_result.txt
+TEST_RESULT_STATS_FILE = "test_result.json"
+_COUNT_KEYS = ("total", "passed", "failed", "error", "skipped", "xpassed", "xfailed", "rerun")
+
+
+def format_test_result(stats: dict) -> Tuple[str, bool]:
+    """
+    根据结果统计生成 test_result.txt 的内容
+    :param stats: {"start": 开始时间戳, "duration": 运行时长, "reruns_value": --reruns的值, 以及 _COUNT_KEYS 中的用例数}
+    :return: (内容, 是否有实际执行的用例)
+    """
+    executed = stats["passed"] + stats["failed"] + stats["xpassed"] + stats["xfailed"]
+    start_time = datetime.fromtimestamp(stats["start"])
+    _START_TIME = f"{start_time.year}年{start_time.month}月{start_time.day}日 " \
+                  f"{start_time.hour}:{start_time.minute}:{start_time.second}"
+    test_info = f"各位同事, 大家好:\n" \
+                f"自动化用例于 {_START_TIME}- 开始运行，运行时长：{stats['duration']:.2f} s， 目前已执行完成。\n" \
+                f"--------------------------------------\n" \
+                f"#### 执行结果如下:\n" \
+                f"- 用例运行总数: {stats['total']} 个\n" \
+                f"- 跳过用例个数（skipped）: {stats['skipped']} 个\n" \
+                f"- 实际执行用例总数: {executed} 个\n" \
+                f"- 通过用例个数（passed）: {stats['passed']} 个\n" \
+                f"- 失败用例个数（failed）: {stats['failed']} 个\n" \
+                f"- 异常用例个数（error）: {stats['error']} 个\n" \
+                f"- 重跑的用例数(--reruns的值): {stats['rerun']} ({stats['reruns_value']}) 个\n"
+    if executed:
+        _RATE = (stats["passed"] + stats["xpassed"]) / executed * 100
+        return f"{test_info}- 用例成功率: {_RATE:.2f} %\n", True
+    return f"{test_info}- 用例成功率: 0.00 %\n", False
+
+
+def write_test_result(report_dir: str, stats: dict) -> Tuple[str, bool]:
+    """
+    将结果统计写入 report_dir 下的 test_result.json，并生成 test_result.txt（方便在流水线里面发送测试结果到钉钉/企业微信）
+    :return: 同 format_test_result
+    """
+    with open(os.path.join(report_dir, TEST_RESULT_STATS_FILE), mode="w", encoding="utf-8") as f:
+        json.dump(stats, f, ensure_ascii=False)
+    content, executed = format_test_result(stats)
+    with open(os.path.join(report_dir, "test_result.txt"), mode="w", encoding="utf-8") as f:
+        f.write(content)
+    return content, executed
+
+
+def merge_test_result_stats(stats_list: List[dict]) -> dict:
+    """
+    合并多个 worker 的结果统计：各结果的用例数相加，开始时间取最早的，运行时长算到最晚结束的 worker
+    每个 worker 收集到的都是全部用例（再按分片取消选中），用例运行总数取最大值而不是相加
+    """
+    merged = {key: sum(stats[key] for stats in stats_list) for key in _COUNT_KEYS}
+    merged["total"] = max(stats["total"] for stats in stats_list)
+    merged["start"] = min(stats["start"] for stats in stats_list)
+    merged["duration"] = max(stats["start"] + stats["duration"] for stats in stats_list) - merged["start"]
+    merged["reruns_value"] = stats_list[0]["reruns_value"]
+    return merged
+
+
+def read_test_results(report_dir: str) -> List[dict]:
+    """
+    读取 report_dir 下的用例结果记录，文件不存在时返回空列表
+    进程异常退出时最后一行可能不完整，直接忽略
+    """
+    path = os.path.join(report_dir, TEST_RESULTS_FILE)
+    if not os.path.isfile(path):
+        return []
+    records = []
+    with open(path, mode="r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+def summarize_test_results(records: List[dict]) -> Dict:
+    """
+    汇总用例结果记录，返回的字段与 get_test_results_from_from_allure_report 一致：
+    passed、failed、broken、skipped、total、pass_rate、run_time、start_time、stop_time、rerun
+    另外保留 pytest 原始的结果分类 outcomes，例如 {"passed": 3, "xfailed": 1, "rerun": 2}
+
+    - 同一个用例多次执行（失败重跑）时只统计最后一次结果，之前的每一次执行计入 rerun
+    - error（setup/teardown 报错）对应allure的 broken；xfailed 计入 skipped，xpassed 计入 passed
+    - 多个 worker 的记录合并在一起时，开始时间取最早的，结束时间取最晚的
+    """
+    sessions = [record for record in records if record.get("type") == "session"]
+    tests = [record for record in records if record.get("type") == "test"]
+    final: Dict[str, dict] = {}
+    outcomes: Dict[str, int] = {}
+    for record in tests:
+        outcomes[record["outcome"]] = outcomes.get(record["outcome"], 0) + 1
+        if record["outcome"] != "rerun":
+            final[record["nodeid"]] = record
+    counts = {"passed": 0, "failed": 0, "broken": 0, "skipped": 0}
+    mapping = {"passed": "passed", "xpassed": "passed", "failed": "failed", "error": "broken",
+               "skipped": "skipped", "xfailed": "skipped"}
+    for record in final.values():
+        counts[mapping.get(record["outcome"], "broken")] += 1
+    test_results = {**counts, "total": len(final)}
+    test_results["pass_rate"] = round((counts["passed"] + counts["skipped"]) / len(final) * 100, 2) if final else 0.0
+    start = min([record["start"] for record in sessions + tests if record.get("start")] or [0])
+    stop = max([record["stop"] for record in sessions + tests if record.get("stop")] or [start])
+    test_results["run_time"] = round(stop - start, 2)
+    test_results["start_time"] = timestamp_strftime(start * 1000)
+    test_results["stop_time"] = timestamp_strftime(stop * 1000)
+    test_results["rerun"] = outcomes.get("rerun", 0)
+    test_results["outcomes"] = outcomes
+    return test_results
+
+
+def get_test_results(report_dir: str, allure_html_path: str = None) -> Dict:
+    """
+    获取测试结果：优先使用 pytest_results 插件写入的结果文件，不依赖 allure 报告是否已生成；
+    没有结果文件时（例如未加载该插件）再从 allure html 报告中解析
+    :param report_dir: 结果文件所在目录，即 REPORT_DIR
+    :param allure_html_path: allure生成的html报告的绝对路径
+    """
+    records = read_test_results(report_dir)
+    if records:
+        test_results = summarize_test_results(records)
+        logger.debug(f"从 {TEST_RESULTS_FILE} 获取到的测试结果：{test_results}")
+        return test_results
+    if not allure_html_path:
+        logger.warning(f"{report_dir} 下没有用例结果文件 {TEST_RESULTS_FILE}，也未生成allure报告，测试结果按0统计")
+        return summarize_test_results([])
+    return get_test_results_from_from_allure_report(allure_html_path)
+
 
 def get_test_results_from_from_allure_report(allure_html_path):
     """
@@ -7,10 +7,11 @@
 
 from loguru import logger
 from utils.models import NotificationType
+from config.path_config import REPORT_DIR
 from config.settings import SEND_RESULT_TYPE, email, ding_talk, wechat, email_subject, email_content, ding_talk_title, \
     ding_talk_content, wechat_content
 from utils.data_utils.data_handle import data_handle
-from utils.report_utils.get_results_handle import get_test_results_from_from_allure_report
+from utils.report_utils.get_results_handle import get_test_results
 from utils.notify_utils.dingding_bot import DingTalkBot
 from utils.notify_utils.wechat_bot import WechatBot
 from utils.notify_utils.yagmail_bot import YagEmailServe
@@ -69,27 +70,28 @@ def send_wechat(webhook_url, content, attachment=None):
         logger.error(f"发送企业微信通知异常， 错误信息：{e}")
 
 
-def send_result(report_info: dict, report_path: str, attachment_path: str = None):
+def send_result(report_info: dict, report_path: str = None, attachment_path: str = None, results_dir: str = REPORT_DIR):
     """
     发送测试结果通知
     
     功能：
     1. 根据配置文件中的 SEND_RESULT_TYPE 决定发送方式 (邮件、钉钉、企业微信)
-    2. 从 Allure 报告中解析测试统计数据 (通过率、用例数等)
+    2. 从用例结果文件 test_results.jsonl 中汇总测试统计数据 (通过率、用例数等)，没有结果文件时从 Allure 报告中解析
     3. 动态替换通知模板中的变量 (如 ${pass_rate})
     4. 支持单渠道或多渠道同时发送
     
     :param report_info: 报告元数据 (测试人员、部门、环境等)
-    :param report_path: Allure HTML 报告的根目录路径
+    :param report_path: Allure HTML 报告的根目录路径，未生成报告时为None
     :param attachment_path: 附件路径 (通常是 zip 压缩包)
+    :param results_dir: 用例结果文件所在目录
     """
     # 默认不发送任何通知
     if SEND_RESULT_TYPE == NotificationType.DEFAULT.value:
         logger.debug(f"SEND_RESULT_TYPE={SEND_RESULT_TYPE}， 配置了不发送任何邮件")
         return
 
-    # 从 Allure 报告中提取统计信息 (passed, failed, duration 等)
-    results = get_test_results_from_from_allure_report(report_path)
+    # 提取统计信息 (passed, failed, duration 等)，不需要等待 Allure 报告生成
+    results = get_test_results(results_dir, allure_html_path=report_path)
     # 合并传入的 report_info
     for k, v in report_info.items():
         results[k] = v
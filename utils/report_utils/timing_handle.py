@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+# @Version: Python 3.13
+# @Author  : 会飞的🐟
+# @File    : timing_handle.py
+# @Software: PyCharm
+# @Desc: 接口请求分阶段耗时统计：每个请求生成一条耗时记录附加到allure，会话结束时汇总成直方图
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+import allure
+from loguru import logger
+
+# 接口请求的各个阶段
+PHASES = {
+    "template": "数据处理(before_request)",
+    "network": "发送请求(send_request)",
+    "decode": "响应解析(body/json)",
+    "assert": "响应断言(AssertHandle)",
+    "extract": "参数提取(after_request)",
+}
+# 直方图的分桶上限（毫秒），最后一个桶收集所有更慢的记录
+BUCKETS_MS = (10, 50, 100, 250, 500, 1000, 2000, 5000)
+# 会话汇总文件，与 test_result.txt 放在同一目录下
+TIMING_RECORDS_FILE = "api_timing.jsonl"
+TIMING_SUMMARY_FILE = "api_timing.json"
+
+
+class PhaseTimer:
+    """
+    单个接口请求的分阶段计时
+
+    使用方式：
+        timer = PhaseTimer()
+        with timer.phase("network"):
+            response = self.send_request(new_api_data)
+        record = timer.record(api_id="clue_login", url=url, method=method, status=response.status)
+    """
+
+    __slots__ = ("_start", "phases")
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        # 阶段名 -> 耗时（毫秒）
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        统计代码块的耗时，同一阶段多次计时时累加
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+    def record(self, **info) -> dict:
+        """
+        生成耗时记录
+        :param info: 接口标识信息，例如 api_id、title、url、method、status
+        """
+        return {
+            **info,
+            "total_ms": round((time.perf_counter() - self._start) * 1000, 3),
+            "phases": {k: round(v, 3) for k, v in self.phases.items()},
+        }
+
+
+class TimingCollector:
+    """
+    会话级的耗时记录收集（进程内共享，使用模块级的 timing_collector 实例）
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.records: List[dict] = []
+
+    def add(self, record: dict, attach: bool = True) -> None:
+        """
+        保存一条耗时记录，并作为JSON附件添加到当前的allure步骤中
+        """
+        with self._lock:
+            self.records.append(record)
+        logger.debug("接口耗时：{} {}ms {}", record.get("api_id"), record["total_ms"], record["phases"])
+        if attach:
+            allure.attach(body=json.dumps(record, ensure_ascii=False, indent=4), name="接口耗时",
+                          attachment_type=allure.attachment_type.JSON)
+
+    def write(self, report_dir: str) -> Optional[str]:
+        """
+        将本进程的耗时记录和汇总写入 report_dir，没有记录时不生成文件，并删除上一次运行留下的文件
+        :return: 汇总文件路径
+        """
+        with self._lock:
+            records = list(self.records)
+        if not records:
+            for file_name in (TIMING_RECORDS_FILE, TIMING_SUMMARY_FILE):
+                if os.path.isfile(os.path.join(report_dir, file_name)):
+                    os.remove(os.path.join(report_dir, file_name))
+            return None
+        with open(os.path.join(report_dir, TIMING_RECORDS_FILE), mode="w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return write_summary(records, report_dir)
+
+
+def read_records(report_dir: str) -> List[dict]:
+    """
+    读取 report_dir 下的耗时记录文件
+    """
+    path = os.path.join(report_dir, TIMING_RECORDS_FILE)
+    if not os.path.isfile(path):
+        return []
+    with open(path, mode="r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    index = min(len(values) - 1, max(0, round(percent / 100 * len(values)) - 1))
+    return values[index]
+
+
+def _histogram(values: Iterable[float]) -> dict:
+    values = sorted(values)
+    buckets = {f"<={edge}ms": 0 for edge in BUCKETS_MS}
+    buckets[f">{BUCKETS_MS[-1]}ms"] = 0
+    for value in values:
+        for edge in BUCKETS_MS:
+            if value <= edge:
+                buckets[f"<={edge}ms"] += 1
+                break
+        else:
+            buckets[f">{BUCKETS_MS[-1]}ms"] += 1
+    return {
+        "count": len(values),
+        "total_ms": round(sum(values), 3),
+        "mean_ms": round(sum(values) / len(values), 3),
+        "p50_ms": _percentile(values, 50),
+        "p95_ms": _percentile(values, 95),
+        "max_ms": values[-1],
+        "buckets": buckets,
+    }
+
+
+def summarize(records: List[dict], slowest: int = 10) -> dict:
+    """
+    汇总耗时记录：每个阶段以及总耗时的分布直方图，和最慢的若干个请求
+    """
+    phases: Dict[str, List[float]] = {}
+    for record in records:
+        for name, value in record["phases"].items():
+            phases.setdefault(name, []).append(value)
+    return {
+        "requests": len(records),
+        "total": _histogram(record["total_ms"] for record in records),
+        "phases": {name: {"desc": PHASES.get(name, name), **_histogram(values)} for name, values in phases.items()},
+        "slowest": sorted(records, key=lambda record: record["total_ms"], reverse=True)[:slowest],
+    }
+
+
+def write_summary(records: List[dict], report_dir: str) -> str:
+    """
+    将耗时记录的汇总写入 report_dir/api_timing.json
+    """
+    path = os.path.join(report_dir, TIMING_SUMMARY_FILE)
+    with open(path, mode="w", encoding="utf-8") as f:
+        json.dump(summarize(records), f, ensure_ascii=False, indent=4)
+    logger.info("接口分阶段耗时汇总已保存至：{}，请求数：{}", path, len(records))
+    return path
+
+
+timing_collector = TimingCollector()
+
+if __name__ == '__main__':
+    import random
+
+    for i in range(50):
+        timer = PhaseTimer()
+        for phase_name in PHASES:
+            with timer.phase(phase_name):
+                time.sleep(random.expovariate(1 / 20) / 1000 if phase_name == "network" else 0)
+        timing_collector.add(timer.record(api_id=f"api_{i % 5}", url="/demo", method="GET", status=200), attach=False)
+    print(json.dumps(summarize(timing_collector.records, slowest=1), ensure_ascii=False, indent=4))
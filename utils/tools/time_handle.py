@@ -6,6 +6,7 @@
 # @Desc: TODO: Description
 
 import time
+from utils.data_utils.eval_data_handle import safe_eval
 
 
 def timestamp_strftime(timestamp, style="%Y-%m-%d %H:%M:%S"):
@@ -14,7 +15,7 @@ def timestamp_strftime(timestamp, style="%Y-%m-%d %H:%M:%S"):
     """
     try:
         if isinstance(timestamp, str):
-            timestamp = eval(timestamp)
+            timestamp = safe_eval(timestamp)
         return time.strftime(style, time.localtime(float(timestamp / 1000)))
     except Exception as e:
         return f"timestamp或者style格式错误：{e}"